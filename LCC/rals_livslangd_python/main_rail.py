@@ -20,11 +20,13 @@ from rail_analysis.interpolation import plot_all_interpolated_tables
 from rail_analysis.LCC_single_rail import get_annuity_refactored
 from rail_analysis.arkiv.LCC_rail_unfactored import get_annuity
 
+from rail_analysis.sweep import run_sweep, scenario_grid, single_rail_task
+
 from rail_analysis.rail_measures import get_h_index, get_wear_data, get_rcf_residual, get_rcf_depth, get_table
 
 
 
-def plot_variation_annuity_lifetime(data_df_interpolated, rail='high', file_name="input.csv", export_image=False):
+def plot_variation_annuity_lifetime(data_df_interpolated, rail='high', file_name="input.csv", export_image=False, workers=None, cache=None):
     """
     Loops over a range of grinding frequencies (months) with a fixed tamping frequency,
     calculates the annuity and rail lifetime using get_annuity_refactored,
@@ -36,6 +38,8 @@ def plot_variation_annuity_lifetime(data_df_interpolated, rail='high', file_name
       - data_df_interpolated: The interpolated data DataFrame.
       - rail: Choose 'high' for high rail or 'inner' for low rail.
       - file_name: Name of the input data file (without path)
+      - workers: Number of worker processes for the grinding frequencies (default: all cores)
+      - cache: Optional ResultCache (rail_analysis.result_cache) for the evaluated strategies
     """
     # Fixed tamping frequency (in months)
     tamping_freq = 48
@@ -43,22 +47,23 @@ def plot_variation_annuity_lifetime(data_df_interpolated, rail='high', file_name
     # Define a range of grinding frequencies (in months)
     grinding_freqs = list(range(1, 13))
     
-    annuity_values = []
-    lifetime_values = []
-    
-    # Loop over the defined grinding frequencies
-    for grind_freq in grinding_freqs:
-        maint_strategy = (grind_freq, tamping_freq)
-        annuity, lifetime, _ = get_annuity_refactored(
-            data_df_interpolated,
-            maint_strategy,
-            high_or_low_rail=rail,
-            track_results=False, 
-            gauge_widening_per_year=SELECTED_GAUGE_WIDENING,
-            radius=SELECTED_RADIUS
-        )
-        annuity_values.append(annuity)
-        lifetime_values.append(lifetime)
+    # Run the grinding frequencies in parallel
+    results = run_sweep(
+        single_rail_task,
+        scenario_grid(grinding_freq=grinding_freqs),
+        common={
+            'data_df': data_df_interpolated,
+            'gauge_freq': tamping_freq,
+            'high_or_low_rail': rail,
+            'track_results': False,
+            'gauge_widening_per_year': SELECTED_GAUGE_WIDENING,
+            'radius': SELECTED_RADIUS
+        },
+        workers=workers,
+        cache=cache
+    )
+    annuity_values = results['Annuity'].tolist()
+    lifetime_values = results['Lifetime'].tolist()
     
     # Find optimal grinding frequency (minimizes annuity)
     optimal_index = np.argmin(annuity_values)
@@ -1,55 +1,100 @@
+import os
+
 import pandas as pd  # type: ignore
-def read_input_data(file_path):
+
+# file extensions handled by the Excel ingestion path
+EXCEL_EXTENSIONS = ('.xlsx', '.xlsm')
+
+# axle load (t) of the rows without a load
+DEFAULT_LOAD = 32.5
+
+
+def read_input_data(file_path, sheet_name=None, use_cache=True):
     """
     Reads input data from a CSV file with the specified structure
     and returns it as a Pandas DataFrame.
 
+    Excel workbooks (.xlsx/.xlsm) are forwarded to `read_input_excel`, which
+    returns the same long format and stores the parsed table in the
+    persistent table cache.
+
     Parameters:
-    file_path (str): The path to the CSV file.
+    file_path (str): The path to the CSV file (or Excel workbook).
+    sheet_name (str or list, optional): Sheet(s) to read when file_path is a workbook.
+                                        Defaults to None (all sheets with tables).
+    use_cache (bool, optional): Use the persistent table cache for workbooks. Defaults to True.
 
     Returns:
     pandas.DataFrame: A DataFrame containing the data.
     """
+    if os.path.splitext(file_path)[1].lower() in EXCEL_EXTENSIONS:
+        from preprocessings.read_input_excel import read_input_excel
+        return read_input_excel(file_path, sheet_name=sheet_name, use_cache=use_cache)
+
     try:
         # Read the CSV file, handling semicolon as a delimiter
         data = pd.read_csv(file_path, delimiter=";", encoding="utf-8")
 
-        # Replace comma decimal separators with dots for numerical columns
-        for col in data.columns[-12:]:  # Start from 'month 1'
-            data[col] = data[col].str.replace(',', '.').astype(float)
-
-        # Check if the 'Load' column exists
-        if 'Load' in data.columns:
-            # Do the same for the 'Load' column
-            data['Load'] = data['Load'].str.replace(',', '.').astype(float)
-        else:
-            # If 'Load' column does not exist, create it with a default value
-            data['Load'] = 32.5  # Default value for heavy axle load
-
-        # Reshape the DataFrame so that months are in one column
-        id_vars = ['Profile', 'Load', 'Condition', 'Gauge']
-        if 'Radius' in data.columns:
-            # Enforce that Radius is string
-            data['Radius'] = data['Radius'].astype(str)
-            id_vars.append('Radius')
-        if 'Rail' in data.columns:
-            id_vars.append('Rail')
-
-        data_melted = data.melt(
-            id_vars=id_vars,
-            value_vars=[f'month {i}' for i in range(1, 13)],
-            var_name='Month',
-            value_name='Value'
-        )
-
-        # Convert the 'Month' column to numeric by extracting the number
-        data_melted['Month'] = data_melted['Month'].str.extract('(\d+)').astype(int)
-
-        return data_melted
+        return to_long_format(data)
 
     except FileNotFoundError:
         print(f"Error: File not found at {file_path}")
         return None
     except Exception as e:
         print(f"An error occurred while reading the file: {e}")
-        return None
\ No newline at end of file
+        return None
+
+
+def to_long_format(data):
+    """
+    Converts a wide input table (one column per month) into the long format
+    used by the analysis, with one row per month.
+
+    Rows without a load get DEFAULT_LOAD.
+
+    Parameters:
+    data (pandas.DataFrame): Wide table with the columns 'Profile', 'Condition', 'Gauge',
+                             'month 1' ... 'month 12' and optionally 'Load', 'Radius' and 'Rail'.
+
+    Returns:
+    pandas.DataFrame: The melted DataFrame with the columns 'Month' and 'Value'.
+    """
+    # Replace comma decimal separators with dots for numerical columns
+    for col in data.columns[-12:]:  # Start from 'month 1'
+        data[col] = _to_float(data[col])
+
+    # Check if the 'Load' column exists
+    if 'Load' in data.columns:
+        # Do the same for the 'Load' column, and give the rows without a load the default value
+        data['Load'] = _to_float(data['Load']).fillna(DEFAULT_LOAD)
+    else:
+        # If 'Load' column does not exist, create it with a default value
+        data['Load'] = DEFAULT_LOAD  # Default value for heavy axle load
+
+    # Reshape the DataFrame so that months are in one column
+    id_vars = ['Profile', 'Load', 'Condition', 'Gauge']
+    if 'Radius' in data.columns:
+        # Enforce that Radius is string
+        data['Radius'] = data['Radius'].astype(str)
+        id_vars.append('Radius')
+    if 'Rail' in data.columns:
+        id_vars.append('Rail')
+
+    data_melted = data.melt(
+        id_vars=id_vars,
+        value_vars=[f'month {i}' for i in range(1, 13)],
+        var_name='Month',
+        value_name='Value'
+    )
+
+    # Convert the 'Month' column to numeric by extracting the number
+    data_melted['Month'] = data_melted['Month'].str.extract(r'(\d+)').astype(int)
+
+    return data_melted
+
+
+def _to_float(column):
+    """Converts a column with comma or dot decimal separators to float."""
+    if pd.api.types.is_numeric_dtype(column):
+        return column.astype(float)
+    return column.where(column.isna(), column.astype(str).str.replace(',', '.')).astype(float)
@@ -0,0 +1,327 @@
+# preprocessings/read_input_excel.py
+"""
+Excel ingestion path for the simulation result workbooks (e.g. CM2025/BDL_111_results_JL_20250527.xlsx).
+
+Workbooks are streamed sheet by sheet in read-only mode and converted straight into the
+long format returned by `read_input_data` for CSV files. Two sheet layouts are recognised:
+
+- structured sheets, with a header row holding 'Profile', 'Condition', 'Gauge' and
+  'month 1' ... 'month 12' (optionally 'Rail', 'Radius' and 'Load'), as in the CSV files;
+- result blocks, as delivered from the simulations: a title naming the condition
+  (e.g. 'H Index', 'Natural wear ...'), a label such as 'High Rail MB4: 32,5t',
+  a 'month 1' ... 'month 12' header and one row per gauge ('1440 mm' or 'MB6-1450'). Several
+  blocks may sit next to each other on the same rows. A block without a title continues the
+  block to its left on the same rows, else the block above it in the same column, else takes
+  the condition of the sheet name (e.g. 'H_30t'). The radius is read from the
+  'Curve radius (m)' cell or from the sheet name (e.g. 'Wear_RCF_2025_R495'), the load from
+  the label or from the sheet name (e.g. 'H_30t'); rows without a load get the default load
+  of `to_long_format`.
+
+Blocks whose title names no known condition (e.g. 'Grinding depth with 0,2mm') or that have no
+profile are skipped with a warning. Tables repeated on several sheets are kept once; rows with
+the same keys but different values raise a ValueError.
+"""
+
+import re
+
+import numpy as np  # type: ignore
+import pandas as pd  # type: ignore
+
+from preprocessings.read_input_data import to_long_format
+from preprocessings.table_cache import cached_table
+
+MONTH_COLUMNS = [f'month {i}' for i in range(1, 13)]
+WIDE_COLUMNS = ['Rail', 'Radius', 'Profile', 'Load', 'Condition', 'Gauge'] + MONTH_COLUMNS
+
+# keywords identifying the condition of a result block, checked in this order
+CONDITION_PATTERNS = [
+    ('rcf-residual', re.compile(r'residual|rcf[\s_-]*grinding', re.IGNORECASE)),
+    ('rcf-depth', re.compile(r'rcf|damage', re.IGNORECASE)),
+    ('wear', re.compile(r'wear', re.IGNORECASE)),
+    ('h-index', re.compile(r'\bh[\s_-]?index\b|^\s*h(?:_|\s*$)', re.IGNORECASE)),
+]
+
+RAIL_PATTERN = re.compile(r'\b(inner|low|high)\s*rail\b', re.IGNORECASE)
+PROFILE_PATTERN = re.compile(r'\b(MB\d+)\b', re.IGNORECASE)
+LOAD_PATTERN = re.compile(r'MB\d+\s*:\s*(\d+(?:[.,]\d+)?)', re.IGNORECASE)
+GAUGE_PATTERN = re.compile(r'^\s*(?:(?:MB)?\d+\s*-\s*)?(\d{4})(?:\.0)?\s*(?:mm)?\s*$', re.IGNORECASE)
+SHEET_RADIUS_PATTERN = re.compile(r'(?:^|_)R(\d+)\b|(tangent)', re.IGNORECASE)
+SHEET_LOAD_PATTERN = re.compile(r'(?:^|_)(\d+(?:[.,]\d+)?)\s*t(?:_|$)', re.IGNORECASE)
+# cells that are neither block titles nor labels: Excel table headers ('Column1') and month headers
+HEADER_PATTERN = re.compile(r'^\s*(?:column\s*\d+|month\s*\d+)\s*$', re.IGNORECASE)
+
+
+def read_input_excel(file_path, sheet_name=None, use_cache=True):
+    """
+    Reads input data from an Excel workbook and returns it in the same long format
+    as `read_input_data` does for CSV files.
+
+    Parameters:
+    file_path (str): The path to the workbook.
+    sheet_name (str or list, optional): Sheet(s) to read. Defaults to None (all sheets).
+    use_cache (bool, optional): Read/store the parsed table in the persistent table cache.
+                                Defaults to True.
+
+    Returns:
+    pandas.DataFrame: A DataFrame containing the data, or None if the workbook
+                      could not be read or holds no tables.
+    """
+    sheet_names = [sheet_name] if isinstance(sheet_name, str) else sheet_name
+
+    def loader(path):
+        return parse_workbook(path, sheet_names=sheet_names)
+
+    try:
+        if use_cache:
+            data = cached_table(file_path, loader, 'read_input_excel', options={'sheets': sheet_names})
+        else:
+            data = loader(file_path)
+    except FileNotFoundError:
+        print(f"Error: File not found at {file_path}")
+        return None
+    except Exception as e:
+        print(f"An error occurred while reading the file: {e}")
+        return None
+
+    if data is None:
+        print(f"Error: No input tables found in {file_path}")
+    return data
+
+
+def parse_workbook(file_path, sheet_names=None):
+    """
+    Streams the sheets of a workbook and converts the tables found to long format.
+
+    Parameters:
+    file_path (str): The path to the workbook.
+    sheet_names (list, optional): Names of the sheets to read. Defaults to None (all sheets).
+
+    Returns:
+    pandas.DataFrame or None: The long-format data, or None if no table was found.
+    """
+    from openpyxl import load_workbook  # type: ignore
+
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        frames = []
+        for worksheet in workbook.worksheets:
+            if sheet_names is not None and worksheet.title not in sheet_names:
+                continue
+            wide = parse_sheet(worksheet.iter_rows(values_only=True), worksheet.title)
+            if wide is not None and not wide.empty:
+                frames.append(wide)
+    finally:
+        workbook.close()
+
+    if not frames:
+        return None
+
+    wide = pd.concat(frames, ignore_index=True)
+    # drop identifier columns that no sheet provided, as the CSV path does
+    wide = wide[[col for col in WIDE_COLUMNS if col in MONTH_COLUMNS or wide[col].notna().any()]]
+    data = to_long_format(wide).drop_duplicates(ignore_index=True)
+
+    keys = [col for col in data.columns if col != 'Value']
+    conflicting = data.duplicated(keys, keep=False)
+    if conflicting.any():
+        example = data.loc[conflicting, keys].iloc[0].to_dict()
+        raise ValueError(f"{int(conflicting.sum())} rows with the same {keys} but different values "
+                         f"(e.g. {example}); read the sheets that agree with sheet_name")
+    return data
+
+
+def parse_sheet(rows, title=''):
+    """
+    Parses the rows of one sheet into a wide table with the columns of the CSV input files.
+
+    Parameters:
+    rows (iterable): Tuples of cell values, e.g. from worksheet.iter_rows(values_only=True).
+    title (str): The sheet name, used to find the radius, load and condition when the sheet
+                 does not state them.
+
+    Returns:
+    pandas.DataFrame or None: The wide table, or None if the sheet holds no table.
+    """
+    records = []
+    structured_header = None
+    blocks = {}  # gauge column -> metadata of the open result block
+    previous_rows = []  # the last rows seen, searched for block titles and labels
+    column_conditions = {}  # gauge column -> condition of the last block in that column
+    radius = _radius_from_title(title)
+    load = _load_from_title(title)
+
+    for row_number, row in enumerate(rows, 1):
+        row = tuple(row)
+
+        # --- structured layout ---
+        if structured_header is not None:
+            if all(_is_blank(cell) for cell in row):
+                structured_header = None
+                continue
+            record = {name: row[col] if col < len(row) else None for name, col in structured_header.items()}
+            record = {name: _clean(value) for name, value in record.items()}
+            if not _is_blank(record.get('Gauge')):
+                records.append(record)
+            continue
+        header = _structured_header(row)
+        if header is not None:
+            structured_header = header
+            continue
+
+        # --- result blocks ---
+        for col, cell in enumerate(row):
+            if isinstance(cell, str) and cell.strip().lower().startswith('curve radius') and col + 1 < len(row):
+                radius = _clean(row[col + 1])
+
+        month_cols = [col for col, cell in enumerate(row) if _is_month(cell, 1)]
+        if month_cols:
+            row_condition = None
+            for col in month_cols:
+                block = _block_metadata(row, previous_rows, col)
+                if block['Profile'] is None:
+                    _warn_skipped(title, row_number, col, 'no profile')
+                    continue
+                titles = block.pop('Titles')
+                if block['Condition'] is None and not titles:
+                    # untitled: continues the block to its left, the block above or the sheet
+                    block['Condition'] = row_condition or column_conditions.get(col - 1) or _condition(title)
+                if block['Condition'] is None:
+                    _warn_skipped(title, row_number, col, f"unknown condition {titles or [title]}")
+                    continue
+                if block['Load'] is None:
+                    block['Load'] = load
+                row_condition = column_conditions[col - 1] = block['Condition']
+                blocks[col - 1] = block
+        else:
+            for gauge_col in list(blocks):
+                gauge = _gauge(row[gauge_col] if gauge_col < len(row) else None)
+                if gauge is None:
+                    del blocks[gauge_col]
+                    continue
+                values = [_to_number(row[c]) if c < len(row) else np.nan
+                          for c in range(gauge_col + 1, gauge_col + 13)]
+                if all(np.isnan(v) for v in values):
+                    continue
+                block = blocks[gauge_col]
+                record = dict(block, Radius=radius, Gauge=gauge)
+                record.update(zip(MONTH_COLUMNS, values))
+                records.append(record)
+
+        previous_rows = (previous_rows + [row])[-3:]
+
+    if not records:
+        return None
+    return pd.DataFrame.from_records(records, columns=WIDE_COLUMNS)
+
+
+# === HELPER FUNCTIONS ===
+
+def _structured_header(row):
+    """Returns {column name: index} if the row is a CSV-style header, else None."""
+    names = {}
+    for col, cell in enumerate(row):
+        if isinstance(cell, str) and cell.strip():
+            name = cell.strip()
+            for wide_name in WIDE_COLUMNS:
+                if name.lower() == wide_name.lower():
+                    names[wide_name] = col
+    required = ['Profile', 'Condition', 'Gauge'] + MONTH_COLUMNS
+    if all(name in names for name in required):
+        return names
+    return None
+
+
+def _block_metadata(row, previous_rows, month_col):
+    """
+    Finds the condition, rail, profile and load of the block whose 'month 1' header is at
+    month_col (None where not found), and its title texts ('Titles': the texts above the block
+    that are not labels or headers, outside the gauge column).
+    """
+    span = range(max(month_col - 2, 0), month_col + 12)
+    cells = [(col, cell) for prev in reversed(previous_rows + [row]) for col, cell in enumerate(prev)
+             if col in span and isinstance(cell, str) and cell.strip()]
+    texts = [cell for col, cell in cells]
+    titles = [cell for col, cell in cells
+              if col != month_col - 1 and not HEADER_PATTERN.match(cell) and not PROFILE_PATTERN.search(cell)]
+
+    condition = None
+    for text in texts:
+        condition = _condition(text)
+        if condition is not None:
+            break
+
+    rail = profile = load = None
+    for text in texts:
+        if rail is None and RAIL_PATTERN.search(text):
+            rail = RAIL_PATTERN.search(text).group(1).lower()
+            rail = 'High' if rail == 'high' else 'Inner'
+        if profile is None and PROFILE_PATTERN.search(text):
+            profile = PROFILE_PATTERN.search(text).group(1).upper()
+        if load is None and LOAD_PATTERN.search(text):
+            load = float(LOAD_PATTERN.search(text).group(1).replace(',', '.'))
+
+    return {'Rail': rail, 'Profile': profile, 'Load': load, 'Condition': condition, 'Titles': titles}
+
+
+def _warn_skipped(title, row_number, col, reason):
+    print(f"Warning: skipped the block with its 'month 1' header at row {row_number}, column {col + 1} "
+          f"of sheet '{title}': {reason}")
+
+
+def _condition(text):
+    if not isinstance(text, str):
+        return None
+    for condition, pattern in CONDITION_PATTERNS:
+        if pattern.search(text):
+            return condition
+    return None
+
+
+def _radius_from_title(title):
+    match = SHEET_RADIUS_PATTERN.search(title or '')
+    if match is None:
+        return None
+    return match.group(1) if match.group(1) else 'Tangent'
+
+
+def _load_from_title(title):
+    match = SHEET_LOAD_PATTERN.search(title or '')
+    return float(match.group(1).replace(',', '.')) if match else None
+
+
+def _is_month(cell, month):
+    return isinstance(cell, str) and cell.strip().lower() == f'month {month}'
+
+
+def _gauge(cell):
+    if isinstance(cell, (int, float)) and not isinstance(cell, bool) and not np.isnan(cell):
+        return int(cell)
+    if isinstance(cell, str):
+        match = GAUGE_PATTERN.match(cell)
+        if match:
+            return int(match.group(1))
+    return None
+
+
+def _to_number(cell):
+    if isinstance(cell, (int, float)) and not isinstance(cell, bool):
+        return float(cell)
+    if isinstance(cell, str):
+        try:
+            return float(cell.strip().replace(',', '.'))
+        except ValueError:
+            return np.nan
+    return np.nan
+
+
+def _clean(value):
+    if isinstance(value, str):
+        value = value.strip()
+        return value if value else None
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def _is_blank(cell):
+    return cell is None or (isinstance(cell, str) and not cell.strip())
@@ -0,0 +1,117 @@
+# preprocessings/table_cache.py
+"""
+Persistent cache for parsed input tables.
+
+Parsing large workbooks is slow compared to the analysis itself, so parsed
+tables are stored as pickled DataFrames in data/processed/table_cache. Entries
+are keyed by a hash of the source file content together with the loader name
+and its options, so an edited input file is parsed again while an unchanged
+file is only ever parsed once.
+"""
+
+import hashlib
+import json
+import os
+
+import pandas as pd  # type: ignore
+
+# default location of the cache, next to the other processed data files
+TABLE_CACHE_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'processed', 'table_cache'
+)
+
+# bump when the layout or the parsing of the cached tables changes to invalidate old entries
+TABLE_CACHE_VERSION = 2
+
+
+def file_digest(file_path, chunk_size=1 << 20):
+    """
+    Computes the SHA-256 digest of a file's content.
+
+    Parameters:
+    file_path (str): The path to the file.
+    chunk_size (int): Number of bytes read per chunk.
+
+    Returns:
+    str: The hexadecimal digest.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def table_cache_key(file_path, loader_name, options=None):
+    """
+    Builds the cache key for a parsed table.
+
+    Parameters:
+    file_path (str): The path to the source file.
+    loader_name (str): Name of the loader that parses the file.
+    options (dict, optional): Loader options that change the parsed output.
+
+    Returns:
+    str: The cache key.
+    """
+    payload = json.dumps({
+        'content': file_digest(file_path),
+        'loader': loader_name,
+        'options': options or {},
+        'version': TABLE_CACHE_VERSION,
+    }, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def cached_table(file_path, loader, loader_name, options=None, cache_dir=None):
+    """
+    Returns the parsed table for file_path, parsing it with loader only on a cache miss.
+
+    Parameters:
+    file_path (str): The path to the source file.
+    loader (callable): Function called as loader(file_path) returning a DataFrame.
+    loader_name (str): Name of the loader, part of the cache key.
+    options (dict, optional): Loader options, part of the cache key.
+    cache_dir (str, optional): Cache directory. Defaults to TABLE_CACHE_DIR.
+
+    Returns:
+    pandas.DataFrame: The parsed table.
+    """
+    cache_dir = cache_dir or TABLE_CACHE_DIR
+    cache_path = os.path.join(cache_dir, table_cache_key(file_path, loader_name, options) + '.pkl')
+
+    if os.path.exists(cache_path):
+        try:
+            return pd.read_pickle(cache_path)
+        except Exception as e:
+            print(f"Ignoring unreadable cache entry {cache_path}: {e}")
+
+    table = loader(file_path)
+    if table is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+        # write to a temporary file first so that concurrent readers never see a partial entry
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        table.to_pickle(tmp_path)
+        os.replace(tmp_path, cache_path)
+    return table
+
+
+def clear_table_cache(cache_dir=None):
+    """
+    Removes all entries from the table cache.
+
+    Parameters:
+    cache_dir (str, optional): Cache directory. Defaults to TABLE_CACHE_DIR.
+
+    Returns:
+    int: The number of removed entries.
+    """
+    cache_dir = cache_dir or TABLE_CACHE_DIR
+    if not os.path.isdir(cache_dir):
+        return 0
+    removed = 0
+    for name in os.listdir(cache_dir):
+        if name.endswith('.pkl'):
+            os.remove(os.path.join(cache_dir, name))
+            removed += 1
+    return removed
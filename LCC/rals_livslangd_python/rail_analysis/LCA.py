@@ -1,6 +1,11 @@
+import copy
+import os
+from functools import lru_cache
+
+import numpy as np
 import pandas as pd
 
-# Emissionfactors kg Co2e per MJ 
+# Emissionfactors kg Co2e per MJ
 EF_ELECTRICITY = 0.006464924
 EF_DIESEL = 0.063583815
 
@@ -8,51 +13,269 @@ EF_DIESEL = 0.063583815
 DEFAULT_SHARE_EL = 0.4  # 40% electricity
 DEFAULT_CIRCULARITY_COEF = 0.2  # 0% circularity
 
-def get_LCA_renewal(
-      asset_type, 
-      year=2019, 
-      track_length=1000, 
-      circularity_coef=DEFAULT_CIRCULARITY_COEF, 
-      share_electricity=DEFAULT_SHARE_EL
-):
+# CO2e emissions per maintenance event, in kg per meter of track. The LCA input data only covers
+# renewals, so grinding, milling and tamping emit nothing unless set with
+# LCAModel(event_factors={...}) or on a copy made with LCAModel.set_event_factor(). 'rail_renewal'
+# defaults to the emissions of the 'Rail' asset (see LCAModel.event_factor).
+DEFAULT_EVENT_EMISSION_FACTORS = {
+   'grinding': 0.0,
+   'milling': 0.0,
+   'tamping': 0.0,
+}
 
-   # Read LCA-data och CO2e-valuation
-   # absolute path
-   #my_abs_path = r'C:\Users\EmmaFrom\Work Folders\Documents\GitHub\rurut\LCC\rurut\LCC\rals_livslangd_python\data\raw\LCA\\'
-   my_abs_path = r'c:\Users\AbdouAA\Work Folders\Documents\GitHub\rurut\LCC\rals_livslangd_python\data\raw\LCA\\'
-   lca = pd.read_csv(my_abs_path + 'lca_base_data.csv', delimiter=';', encoding='utf-8')
-   co2e = pd.read_csv(my_abs_path + 'co2_valuation.csv', delimiter=';', encoding='utf-8')
-   # read Energy use emissions file
-   energy_emissions = pd.read_csv(my_abs_path + 'Energy use emissions.csv', delimiter=';', encoding='utf-8')
+# Folder with the LCA input files (lca_base_data.csv, co2_valuation.csv, ...).
+# Defaults to data/raw/LCA in this project and can be overridden with the
+# RAIL_LCA_DATA_DIR environment variable or with set_LCA_data_dir().
+DEFAULT_LCA_DATA_DIR = os.path.join(
+   os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'raw', 'LCA'
+)
+_lca_data_dir = None
+
+
+def set_LCA_data_dir(path):
+   """
+   Set the folder the LCA input files are read from.
+
+   Parameters:
+      path (str or None): Folder with the LCA csv files, None to restore the default.
+   """
+   global _lca_data_dir
+   _lca_data_dir = path
+
+   # constants derived from the LCA data are resolved again on next use
+   from rail_analysis.constants import get_track_renewal_cost
+   get_track_renewal_cost.cache_clear()
+
+
+def get_LCA_data_dir():
+   """
+   Return the folder the LCA input files are read from.
+   """
+   if _lca_data_dir is not None:
+      return _lca_data_dir
+   return os.environ.get('RAIL_LCA_DATA_DIR', DEFAULT_LCA_DATA_DIR)
 
-   # clean up data: replace ',' with '.' and convert to float
-   lca = lca.replace(',', '.', regex=True)
-   co2e = co2e.replace(',', '.', regex=True)
-   energy_emissions = energy_emissions.replace(',', '.', regex=True) 
+
+@lru_cache(maxsize=None)
+def _read_LCA_data(data_dir):
+   lca = pd.read_csv(os.path.join(data_dir, 'lca_base_data.csv'), delimiter=';', encoding='utf-8-sig', decimal=',')
+   co2e = pd.read_csv(os.path.join(data_dir, 'co2_valuation.csv'), delimiter=';', encoding='utf-8-sig', decimal=',')
+   # read Energy use emissions file
+   energy_emissions = pd.read_csv(os.path.join(data_dir, 'Energy use emissions.csv'), delimiter=';', encoding='utf-8-sig', decimal=',')
 
    lca['CO2 emissions_kg/m'] = lca['CO2 emissions_kg/m'].astype(float)
    lca['Energy use_MJ_m'] = lca['Energy use_MJ_m'].astype(float)
    co2e['CO2_Valuation (kr/kg Co2e)'] = co2e['CO2_Valuation (kr/kg Co2e)'].astype(float)
+   return lca, co2e, energy_emissions
+
+
+def load_LCA_data(data_dir=None):
+   """
+   Read the LCA base data, the CO2e valuation and the energy use emission factors.
+
+   The files are parsed once per folder and kept in memory; later calls return
+   the same (read-only) DataFrames.
+
+   Parameters:
+      data_dir (str, optional): Folder with the LCA csv files. Defaults to get_LCA_data_dir().
+
+   Returns:
+      tuple: (lca, co2e, energy_emissions) DataFrames
+   """
+   return _read_LCA_data(os.path.abspath(data_dir or get_LCA_data_dir()))
+
+
+def get_LCA_renewal(
+      asset_type,
+      year=2019,
+      track_length=1000,
+      circularity_coef=DEFAULT_CIRCULARITY_COEF,
+      share_electricity=DEFAULT_SHARE_EL
+):
+   """
+   Calculate the LCA cost (SEK) of renewing track_length meters of the given asset type.
+
+   The arguments may also be arrays, see LCAModel.renewal_cost.
+   """
+   return get_LCA_model().renewal_cost(
+      asset_type,
+      year=year,
+      track_length=track_length,
+      circularity_coef=circularity_coef,
+      share_electricity=share_electricity
+   )
+
+
+# === VECTORISED LCA MODEL ===
+
+class LCAModel:
+   """
+   LCA base data and CO2e valuation curve preloaded into indexed arrays.
+
+   All methods broadcast their arguments, so costs for arrays of asset types, years,
+   circularity coefficients and electricity shares are evaluated in one call, e.g.
+
+      model = get_LCA_model()
+      grid = model.renewal_cost('Track', year=np.arange(2025, 2056)[:, None],
+                                circularity_coef=np.linspace(0, 0.5, 6))  # shape (31, 6)
+
+   Parameters:
+      assets (list): Asset names (e.g. 'Rail', 'Track').
+      co2_per_m (array): Direct CO2e emissions per asset in kg/m.
+      energy_per_m (array): Energy use per asset in MJ/m.
+      years (array): Years of the CO2e valuation curve.
+      co2_prices (array): CO2e valuation in SEK/kg for each year.
+      event_factors (dict, optional): CO2e emissions in kg/m per maintenance event
+                                      ('grinding', 'milling', 'tamping', 'rail_renewal'),
+                                      overriding DEFAULT_EVENT_EMISSION_FACTORS. By default
+                                      only rail renewals carry emissions; grinding, milling
+                                      and tamping are 0 unless set here or on a copy made
+                                      with set_event_factor.
+   """
+
+   def __init__(self, assets, co2_per_m, energy_per_m, years, co2_prices, event_factors=None):
+      self.event_factors = dict(DEFAULT_EVENT_EMISSION_FACTORS)
+      self.event_factors.update(event_factors or {})
+      self.assets = [str(asset).strip() for asset in assets]
+      self._asset_index = pd.Index([asset.lower() for asset in self.assets])
+      self.co2_per_m = np.asarray(co2_per_m, dtype=float)
+      self.energy_per_m = np.asarray(energy_per_m, dtype=float)
+
+      # the valuation curve may list a year twice: the first row of a year is used
+      years, first = np.unique(np.asarray(years, dtype=int), return_index=True)
+      self.first_year = int(years[0])
+      self.last_year = int(years[-1])
+      # dense price table indexed by (year - first_year); years missing from the curve are NaN
+      self.co2_price_by_year = np.full(self.last_year - self.first_year + 1, np.nan)
+      self.co2_price_by_year[years - self.first_year] = np.asarray(co2_prices, dtype=float)[first]
+
+   @classmethod
+   def from_base_data(cls, data_dir=None):
+      """Build the model from lca_base_data.csv and co2_valuation.csv."""
+      lca, co2e, _ = load_LCA_data(data_dir)
+      return cls(
+         lca['Asset'],
+         lca['CO2 emissions_kg/m'],
+         lca['Energy use_MJ_m'],
+         co2e['Year'],
+         co2e['CO2_Valuation (kr/kg Co2e)']
+      )
+
+   @classmethod
+   def from_indata_EF(cls, data_dir=None):
+      """Build the model from the 'Reinvestment / year' rows of LCA_indata_EF.csv and co2_valuation.csv."""
+      from rail_analysis.LCA_simple import load_LCA_simple_data
+      lca_data, co2e_data = load_LCA_simple_data(data_dir)
+      rows = lca_data[lca_data['Phase'].astype(str).str.strip().str.lower() == 'reinvestment / year']
+      quantity = rows['Quantity (in meter)'].astype(float)
+      return cls(
+         rows['Asset'],
+         rows['CO2e (kg)'].astype(float) / quantity,
+         rows['Energy (GJ)'].astype(float) * 1000 / quantity,
+         co2e_data['Year'],
+         co2e_data['CO2_Valuation (kr/kg Co2e)']
+      )
+
+   def asset_index(self, asset_type):
+      """Return the row index of each asset type (case-insensitive)."""
+      names = np.char.lower(np.char.strip(np.asarray(asset_type, dtype=str)))
+      index = self._asset_index.get_indexer(names.ravel()).reshape(names.shape)
+      if np.any(index < 0):
+         unknown = sorted(set(names[index < 0].ravel()))
+         raise ValueError(f"Unknown asset type(s) {unknown}, expected one of {self.assets}")
+      return index
+
+   def co2_price(self, year, calendar_year=False):
+      """
+      Return the CO2e valuation (SEK/kg) for the given year(s).
+      Years below 100 are counted from 2019, as in get_LCA_renewal. Years after the last
+      year of the valuation curve keep the price of its last year. With calendar_year, the
+      years are calendar years that must lie on the valuation curve, as in get_LCA_renewal_simple.
+      """
+      year = np.asarray(year).astype(int)
+      if calendar_year:
+         offset = year - self.first_year
+         if np.any((offset < 0) | (offset >= len(self.co2_price_by_year))):
+            raise ValueError(f"CO2e valuation is only available for {self.first_year}-{self.last_year}")
+      else:
+         year = np.where(year < 100, year + 2019, year)
+         offset = np.minimum(year - self.first_year, len(self.co2_price_by_year) - 1)
+         if np.any(offset < 0):
+            raise ValueError(f"CO2e valuation is only available from {self.first_year}")
+      price = self.co2_price_by_year[offset]
+      if np.any(np.isnan(price)):
+         raise ValueError(f"CO2e valuation missing for year(s) {sorted(set(year[np.isnan(price)].ravel()))}")
+      return price
+
+   def emissions_per_m(self, asset_type, share_electricity=DEFAULT_SHARE_EL):
+      """Return the CO2e emissions (kg/m) of renewing the asset type, including energy use."""
+      index = self.asset_index(asset_type)
+      emission_factor = share_electricity * EF_ELECTRICITY + (1 - np.asarray(share_electricity)) * EF_DIESEL
+      return self.co2_per_m[index] + self.energy_per_m[index] * emission_factor
+
+   def event_factor(self, event):
+      """
+      Return the CO2e emissions (kg/m) of one maintenance event ('grinding', 'milling',
+      'tamping' or 'rail_renewal'). Rail renewal defaults to the 'Rail' asset emissions
+      net of the default circularity, consistent with get_LCA_renewal('Rail').
+      """
+      if event in self.event_factors:
+         return self.event_factors[event]
+      if event == 'rail_renewal':
+         return float(self.emissions_per_m('Rail')) * (1 - DEFAULT_CIRCULARITY_COEF)
+      raise ValueError(f"Unknown maintenance event '{event}'")
+
+   def set_event_factor(self, event, kg_per_m):
+      """
+      Return a copy of the model with the CO2e emissions (kg/m) of one maintenance event set.
+      The model itself is not changed, so the shared model of get_LCA_model keeps its factors.
+      """
+      model = copy.copy(self)
+      model.event_factors = dict(self.event_factors, **{event: float(kg_per_m)})
+      return model
+
+   def renewal_cost(
+         self,
+         asset_type,
+         year=2019,
+         track_length=1000,
+         circularity_coef=DEFAULT_CIRCULARITY_COEF,
+         share_electricity=DEFAULT_SHARE_EL,
+         calendar_year=False
+   ):
+      """
+      Calculate the LCA cost (SEK) of renewal, broadcasting over all arguments.
+      The year is read as in co2_price.
+
+      Returns:
+         float or np.ndarray: float if all arguments are scalars, else an array with the broadcast shape.
+      """
+      total_co2_per_m = self.emissions_per_m(asset_type, share_electricity)  # kg/m
+      total_cost = total_co2_per_m * self.co2_price(year, calendar_year) * np.asarray(track_length, dtype=float)  # SEK
+      total_cost = total_cost * (1 - np.asarray(circularity_coef, dtype=float))
+      if np.ndim(total_cost) == 0:
+         return float(total_cost)
+      return total_cost
 
-   # filter asset
-   row = lca[lca['Asset'].str.lower() == asset_type.lower()].iloc[0]
-   co2_emission = row['CO2 emissions_kg/m']  # kg/m
-   energy_use = row['Energy use_MJ_m']       # MJ/m
 
-   # get co2e valuation for year 
-   year = int(year)  # Ensure year is an integer
-   # if year is equal or above 2019, use it. Otherwise, replace with year = year + 2019
-   if year < 100: # if number of years new, convert to a year 
-      year = year + 2019
-   co2_price = co2e[co2e['Year'] == year]['CO2_Valuation (kr/kg Co2e)'].values[0]
+@lru_cache(maxsize=None)
+def _build_LCA_model(data_dir, source):
+   if source == 'base_data':
+      return LCAModel.from_base_data(data_dir)
+   if source == 'indata_EF':
+      return LCAModel.from_indata_EF(data_dir)
+   raise ValueError(f"Unknown LCA data source '{source}', expected 'base_data' or 'indata_EF'")
 
-   #convert energy use to co2e - emissions 
-   emission_factor = share_electricity * EF_ELECTRICITY + (1 - share_electricity) * EF_DIESEL
-   energy_co2 = energy_use * emission_factor
 
-   total_co2_per_m = co2_emission + energy_co2  # kg/m
+def get_LCA_model(data_dir=None, source='base_data'):
+   """
+   Return the (memoised) LCAModel for the LCA data folder.
 
-   #total cost 
-   total_cost = total_co2_per_m * co2_price * track_length  # SEK
+   Parameters:
+      data_dir (str, optional): Folder with the LCA csv files. Defaults to get_LCA_data_dir().
+      source (str): 'base_data' (lca_base_data.csv) or 'indata_EF' (LCA_indata_EF.csv).
 
-   return total_cost*(1-circularity_coef)  # SEK
\ No newline at end of file
+   Returns:
+      LCAModel: the model
+   """
+   return _build_LCA_model(os.path.abspath(data_dir or get_LCA_data_dir()), source)
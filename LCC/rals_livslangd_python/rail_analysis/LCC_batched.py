@@ -0,0 +1,1057 @@
+# rail_analysis/LCC_batched.py
+"""
+Batched LCC engine: evaluates many maintenance strategies in one vectorised pass.
+
+The engine follows the rules of get_annuity_track_refactored (two rails) and
+get_annuity_refactored (single rail), in two stages:
+
+1. simulate: the physics (H-index, RCF, gauge) of every rail is advanced month by month
+   for all strategies at once, using PreparedTables (rail_analysis.prepared_tables).
+   Identical rail simulations (same table, grinding and tamping interval, gauge widening)
+   are run only once. The result is an EventLedger holding the grinding, milling,
+   tamping and renewal months of every strategy.
+2. price: the ledger is priced with the cost constants and a discount-factor vector,
+   again for all strategies at once, including the choice of the renewal option with the
+   lowest annuity. The physics does not depend on prices, so a ledger can be re-priced
+   with other costs or discount curves without simulating again.
+
+Rail profile, radius and load are table dimensions: every strategy selects its own table
+for the high and the low rail, so all (profile_low, profile_high, grinding, tamping)
+combinations run in one call, see sweep_track and best_profiles. Traffic growth scenarios
+pass monthly traffic factors (rail_analysis.traffic), with which the tables are looked up at
+the accumulated tonnage since grinding instead of the calendar months.
+
+Usage:
+    tables = prepare_tables(interpolate_rail_data(read_input_data(file_path)))
+    results = sweep_track(tables, grinding_freqs=range(1, 13), gauge_freqs=[24, 48])
+    best = best_profiles(results)
+"""
+
+import numpy as np  # type: ignore
+import pandas as pd  # type: ignore
+
+from rail_analysis.prepared_tables import DEFAULT_LOAD, H_INDEX, WEAR, RCF_RESIDUAL, RCF_DEPTH
+from rail_analysis.discounting import check_discount_factors
+from rail_analysis.traffic import accumulated_mgt
+from rail_analysis.constants import (
+    H_MAX,
+    RCF_MAX,
+    INIT_GAUGE_LEVEL,
+    GRINDING_COST_PER_M,
+    TAMPING_COST_PER_M,
+    RAIL_RENEWAL_COST,
+    POSS_GRINDING,
+    POSS_GRINDING_TWICE,
+    POSS_TAMPING,
+    POSS_NEW_RAIL,
+    CAP_POSS_PER_HOUR,
+    TRACK_LENGTH_M,
+    SIMULATION_START_YEAR,
+    SELECTED_PROFILE,
+    SELECTED_GAUGE_WIDENING,
+    SELECTED_RADIUS,
+    TECH_LIFE_YEARS,
+)
+
+# renewal options of the two-rail model, in the order they are considered each month
+RENEWAL_OPTIONS = ('Renew both @H', 'Renew separately', 'Renew both @L', 'Renew separately', 'Renew - EoL track')
+OPTION_BOTH_H, OPTION_SEPARATE_H, OPTION_BOTH_L, OPTION_SEPARATE_L, OPTION_EOL = range(len(RENEWAL_OPTIONS))
+
+RAILS = ('H', 'L')
+
+
+def default_costs():
+    """
+    Return the cost constants used to price a ledger (see rail_analysis.constants).
+    Copies may be modified to price the same ledger with other costs.
+    """
+    return {
+        'GRINDING_COST_PER_M': GRINDING_COST_PER_M,
+        'TAMPING_COST_PER_M': TAMPING_COST_PER_M,
+        'RAIL_RENEWAL_COST': RAIL_RENEWAL_COST,
+        'POSS_GRINDING': POSS_GRINDING,
+        'POSS_GRINDING_TWICE': POSS_GRINDING_TWICE,
+        'POSS_TAMPING': POSS_TAMPING,
+        'POSS_NEW_RAIL': POSS_NEW_RAIL,
+        'CAP_POSS_PER_HOUR': CAP_POSS_PER_HOUR,
+        'TRACK_LENGTH_M': TRACK_LENGTH_M,
+    }
+
+
+# === SIMULATION ===
+
+class RailEvents:
+    """
+    Monthly events of a batch of rail simulations (one rail each).
+
+    Attributes (n = number of rails, M = number of months):
+    - grind, mill, renew, tamp: bool arrays of shape (n, M), column m - 1 is month m.
+    - first_renewal: Month of the first renewal of each rail, M + 1 if the rail is not renewed.
+    - history: dict with 'H', 'RCF' and 'Gauge' arrays of shape (n, M) if recorded, else None.
+    """
+
+    def __init__(self, grind, mill, renew, tamp, first_renewal, history=None):
+        self.grind = grind
+        self.mill = mill
+        self.renew = renew
+        self.tamp = tamp
+        self.first_renewal = first_renewal
+        self.history = history
+
+    def take(self, index):
+        """Return the events of the rails at index."""
+        history = None
+        if self.history is not None:
+            history = {name: values[index] for name, values in self.history.items()}
+        return RailEvents(self.grind[index], self.mill[index], self.renew[index], self.tamp[index],
+                          self.first_renewal[index], history)
+
+
+def simulate_rails(
+    tables,
+    table,
+    grinding_freq,
+    gauge_freq,
+    gauge_widening_per_year=SELECTED_GAUGE_WIDENING,
+    initial_gauge=None,
+    n_months=12 * TECH_LIFE_YEARS,
+    record_history=False,
+    traffic_factors=None,
+):
+    """
+    Simulate the degradation of a batch of rails month by month.
+
+    Each month follows the scalar simulators: gauge widening, grinding (or natural wear),
+    tamping, milling when the RCF reaches RCF_MAX, and renewal when the H-index exceeds H_MAX.
+    A renewed rail starts again from H = RCF = 0 and keeps being simulated, as the low/high
+    rail in the two-rail model. The loop stops early once every rail has been renewed.
+
+    Parameters:
+    - tables: PreparedTables.
+    - table: Table index of each rail.
+    - grinding_freq: Grinding interval (months) of each rail, at most tables.n_months.
+    - gauge_freq: Tamping interval (months) of each rail.
+    - gauge_widening_per_year: Gauge widening (mm/year) of each rail.
+    - initial_gauge: Gauge level in month 0, defaults to the lowest gauge level of the table.
+    - n_months: Number of simulated months.
+    - record_history: Also return the H-index, RCF and gauge of every month.
+    - traffic_factors: Traffic of every month relative to the reference traffic of the tables
+                       (rail_analysis.traffic.traffic_factors), one vector for all rails or one
+                       row per rail. The tables are then looked up at the accumulated traffic
+                       since grinding and the wear increments are scaled by the monthly traffic.
+                       None (reference traffic) looks the tables up by calendar months.
+
+    Returns:
+    - RailEvents
+    """
+    table = np.asarray(table, dtype=int)
+    table, grinding_freq, gauge_freq, gauge_widening_per_year = np.broadcast_arrays(
+        table, np.asarray(grinding_freq, dtype=int), np.asarray(gauge_freq, dtype=int),
+        np.asarray(gauge_widening_per_year, dtype=float)
+    )
+    n = table.size
+    table, grinding_freq, gauge_freq = table.ravel(), grinding_freq.ravel(), gauge_freq.ravel()
+    widening = gauge_widening_per_year.ravel() / 12
+    if np.any((grinding_freq < 1) | (grinding_freq > tables.n_months)):
+        raise ValueError(f"Grinding intervals must be between 1 and {tables.n_months} months")
+
+    if traffic_factors is not None:
+        traffic_factors = np.asarray(traffic_factors, dtype=float)
+        traffic_factors = np.broadcast_to(traffic_factors, (n, traffic_factors.shape[-1]))
+        if traffic_factors.shape[1] < n_months + 1:
+            raise ValueError(f"traffic_factors must cover months 0 ... {n_months}")
+        # accumulated traffic since the last grinding, in months at the reference traffic
+        traffic_since = np.zeros(n)
+
+    if initial_gauge is None:
+        gauge = tables.gauges[table, 0].copy()
+    else:
+        gauge = np.broadcast_to(np.asarray(initial_gauge, dtype=float), (n,)).copy()
+
+    H = np.zeros(n)
+    RCF = np.zeros(n)
+    RCF_res = np.zeros(n)
+    since_grind = np.ones(n, dtype=int)
+    since_tamp = np.ones(n, dtype=int)
+
+    grind = np.zeros((n, n_months), dtype=bool)
+    mill = np.zeros((n, n_months), dtype=bool)
+    renew = np.zeros((n, n_months), dtype=bool)
+    tamp = np.zeros((n, n_months), dtype=bool)
+    first_renewal = np.full(n, n_months + 1)
+    history = None
+    if record_history:
+        history = {name: np.full((n, n_months), np.nan) for name in ('H', 'RCF', 'Gauge')}
+
+    for m in range(1, n_months + 1):
+        col = m - 1
+        gauge += widening
+
+        # Grinding (or natural wear), all conditions at the months since the last grinding
+        ground = since_grind == grinding_freq
+        if traffic_factors is None:
+            values = tables.evaluate(table, since_grind, gauge)
+            wear = values[:, WEAR]
+        else:
+            traffic = traffic_factors[:, m]
+            traffic_since += traffic
+            values = tables.evaluate_fractional(table, traffic_since, gauge)
+            wear = traffic * values[:, WEAR]
+            traffic_since[ground] = 0
+        H += np.where(ground, values[:, H_INDEX] - wear, wear)
+        RCF_res = np.where(ground, RCF_res + values[:, RCF_RESIDUAL], RCF_res)
+        RCF = np.where(ground, RCF_res, RCF_res + values[:, RCF_DEPTH])
+        since_grind = np.where(ground, 1, since_grind + 1)
+        grind[:, col] = ground
+
+        # Tamping (gauge correction)
+        tamped = since_tamp == gauge_freq
+        gauge[tamped] = INIT_GAUGE_LEVEL
+        since_tamp = np.where(tamped, 1, since_tamp + 1)
+        tamp[:, col] = tamped
+
+        # Milling (double grinding) when the RCF exceeds the maximum
+        milled = RCF >= RCF_MAX
+        if milled.any():
+            idx = np.flatnonzero(milled)
+            if traffic_factors is None:
+                # the tables end at n_months; later months are clamped to the last tabulated month
+                next_month = np.minimum(since_grind[idx] + 1, tables.n_months)
+                H[idx] += (tables.evaluate(table[idx], next_month, gauge[idx], H_INDEX)
+                           + tables.evaluate(table[idx], np.ones(len(idx), dtype=int), gauge[idx], H_INDEX))
+            else:
+                # same months as above, counted in traffic: two months ahead and one month
+                traffic = traffic_factors[idx, m]
+                H[idx] += (tables.evaluate_fractional(table[idx], traffic_since[idx] + 2 * traffic, gauge[idx], H_INDEX)
+                           + tables.evaluate_fractional(table[idx], traffic, gauge[idx], H_INDEX))
+                traffic_since[idx] = 0
+            RCF[idx] = 0
+            RCF_res[idx] = 0
+            since_grind[idx] = 1
+            mill[:, col] = milled
+
+        # Renewal when the H-index exceeds the maximum
+        renewed = H > H_MAX
+        if renewed.any():
+            renew[:, col] = renewed
+            first_renewal = np.where(renewed & (first_renewal > n_months), m, first_renewal)
+            H[renewed] = 0
+            RCF[renewed] = 0
+            RCF_res[renewed] = 0
+
+        if record_history:
+            history['H'][:, col] = H
+            history['RCF'][:, col] = RCF
+            history['Gauge'][:, col] = gauge
+
+        if not record_history and np.all(first_renewal <= n_months):
+            break
+
+    return RailEvents(grind, mill, renew, tamp, first_renewal, history)
+
+
+class EventLedger:
+    """
+    Maintenance events of a batch of two-rail strategies.
+
+    Attributes (S = number of strategies, M = number of months):
+    - strategies: DataFrame with the parameters of each strategy.
+    - grind, mill, renew: bool arrays of shape (S, 2, M), rail axis in the order ('H', 'L').
+    - tamp: bool array of shape (S, M).
+    - first_renewal: Month of the first renewal of each rail, shape (S, 2), M + 1 if none.
+    - n_months: Number of simulated months M.
+    - history: dict with 'H', 'RCF' arrays of shape (S, 2, M) and 'Gauge' of shape (S, M), or None.
+    """
+
+    def __init__(self, strategies, grind, mill, renew, tamp, first_renewal, n_months, history=None):
+        self.strategies = strategies
+        self.grind = grind
+        self.mill = mill
+        self.renew = renew
+        self.tamp = tamp
+        self.first_renewal = first_renewal
+        self.n_months = n_months
+        self.history = history
+
+    def __len__(self):
+        return len(self.first_renewal)
+
+    def take(self, index):
+        """Return the events of the strategies at index."""
+        strategies = None if self.strategies is None else self.strategies.iloc[index].reset_index(drop=True)
+        history = None
+        if self.history is not None:
+            history = {name: values[index] for name, values in self.history.items()}
+        return EventLedger(strategies, self.grind[index], self.mill[index], self.renew[index], self.tamp[index],
+                           self.first_renewal[index], self.n_months, history)
+
+    @property
+    def stop_month(self):
+        """Month in which the simulation stops: both rails renewed, M + 1 if not within the horizon."""
+        return self.first_renewal.max(axis=1)
+
+
+def simulate_track_batch(
+    tables,
+    table_high,
+    table_low,
+    grinding_freq_high,
+    grinding_freq_low,
+    gauge_freq,
+    gauge_widening_per_year=SELECTED_GAUGE_WIDENING,
+    track_life=TECH_LIFE_YEARS,
+    strategies=None,
+    record_history=False,
+    traffic_factors=None,
+):
+    """
+    Simulate a batch of two-rail strategies and return their EventLedger.
+
+    The arguments are broadcast against each other. Rails with the same table, grinding
+    interval, tamping interval, gauge widening, initial gauge and traffic are simulated once.
+
+    Parameters:
+    - tables: PreparedTables.
+    - table_high, table_low: Table index of the high and the low (inner) rail.
+    - grinding_freq_high, grinding_freq_low: Grinding intervals (months).
+    - gauge_freq: Tamping interval (months).
+    - gauge_widening_per_year: Gauge widening (mm/year).
+    - track_life: Technical life of the track (years), i.e. the simulation horizon.
+    - strategies: Optional DataFrame describing the strategies, stored in the ledger.
+    - record_history: Also record the H-index, RCF and gauge of every month.
+    - traffic_factors: Monthly traffic factors (rail_analysis.traffic.traffic_factors), one
+                       vector for all strategies or one row per strategy; None for the
+                       reference traffic of the tables.
+
+    Returns:
+    - EventLedger
+    """
+    table_high, table_low, freq_high, freq_low, gauge_freq, widening, _ = (
+        np.ravel(a) for a in np.broadcast_arrays(
+            np.asarray(table_high, dtype=int), np.asarray(table_low, dtype=int),
+            np.asarray(grinding_freq_high, dtype=int), np.asarray(grinding_freq_low, dtype=int),
+            np.asarray(gauge_freq, dtype=int), np.asarray(gauge_widening_per_year, dtype=float),
+            _traffic_rows(traffic_factors)
+        )
+    )
+    n_strategies = len(table_high)
+    n_months = 12 * track_life
+
+    # both rails start from the lowest gauge level of the high rail table, as in the scalar model
+    initial_gauge = tables.gauges[table_high, 0]
+
+    # traffic scenario of each strategy
+    traffic_scenario = np.zeros(n_strategies, dtype=int)
+    if traffic_factors is not None:
+        traffic_factors = np.atleast_2d(np.asarray(traffic_factors, dtype=float))
+        traffic_factors, traffic_scenario = np.unique(
+            np.broadcast_to(traffic_factors, (n_strategies, traffic_factors.shape[1])),
+            axis=0, return_inverse=True
+        )
+        traffic_scenario = traffic_scenario.ravel()
+
+    # unique rail simulations
+    rails = np.column_stack([
+        np.concatenate([table_high, table_low]),
+        np.concatenate([freq_high, freq_low]),
+        np.tile(gauge_freq, 2),
+        np.tile(widening, 2),
+        np.tile(initial_gauge, 2),
+        np.tile(traffic_scenario, 2),
+    ])
+    unique_rails, inverse = np.unique(rails, axis=0, return_inverse=True)
+    inverse = inverse.ravel()
+    if traffic_factors is not None:
+        traffic_factors = traffic_factors[unique_rails[:, 5].astype(int)]
+    events = simulate_rails(
+        tables,
+        unique_rails[:, 0].astype(int),
+        unique_rails[:, 1].astype(int),
+        unique_rails[:, 2].astype(int),
+        unique_rails[:, 3],
+        initial_gauge=unique_rails[:, 4],
+        n_months=n_months,
+        record_history=record_history,
+        traffic_factors=traffic_factors,
+    )
+
+    rail_index = inverse.reshape(2, n_strategies).T  # (S, 2) in the order ('H', 'L')
+    history = None
+    if record_history:
+        history = {
+            'H': events.history['H'][rail_index],
+            'RCF': events.history['RCF'][rail_index],
+            'Gauge': events.history['Gauge'][rail_index[:, 0]],
+        }
+    if strategies is None:
+        strategies = pd.DataFrame({
+            'Table_High': table_high, 'Table_Low': table_low,
+            'GrindingFreq_High': freq_high, 'GrindingFreq_Low': freq_low,
+            'GaugeFreq': gauge_freq, 'GaugeWidening': widening,
+        })
+    return EventLedger(
+        strategies,
+        events.grind[rail_index],
+        events.mill[rail_index],
+        events.renew[rail_index],
+        events.tamp[rail_index[:, 0]],
+        events.first_renewal[rail_index],
+        n_months,
+        history,
+    )
+
+
+# === PRICING ===
+
+class _BestOption:
+    """Running minimum of the option annuities, keeping the first option on ties."""
+
+    FIELDS = ('Annuity', 'Lifetime', 'Lifetime_H', 'Lifetime_L',
+              'Renewal_Direct', 'Renewal_Capacity', 'Grinding_Direct', 'Grinding_Capacity',
+              'Tamping_Direct', 'Tamping_Capacity', 'CO2e_kg', 'CO2_cost')
+
+    def __init__(self, n):
+        self.values = {name: np.full(n, np.nan) for name in self.FIELDS}
+        self.values['Annuity'][:] = np.inf
+        self.option = np.full(n, -1)
+        self.month = np.zeros(n, dtype=int)
+
+    def consider(self, mask, option, month, fields):
+        better = mask & (fields['Annuity'] < self.values['Annuity'])
+        if not better.any():
+            return
+        self.option[better] = option
+        self.month[better] = month
+        for name, value in fields.items():
+            self.values[name][better] = np.broadcast_to(value, better.shape)[better]
+
+
+def price_track_ledger(
+    ledger,
+    discount_factors=None,
+    costs=None,
+    track_emissions=False,
+    lca_model=None,
+    co2_prices=None,
+    start_year=SIMULATION_START_YEAR,
+):
+    """
+    Price the events of a two-rail EventLedger and choose the renewal option with the
+    lowest annuity for every strategy, as get_annuity_track_refactored does.
+
+    Parameters:
+    - ledger: EventLedger from simulate_track_batch.
+    - discount_factors: Discount factor per month (index 0 = month 0), defaults to DISCOUNT_RATE.
+    - costs: Cost constants, defaults to default_costs().
+    - track_emissions: Also value the CO2e emissions of the chosen option.
+    - lca_model: LCAModel for the event factors and CO2e prices, defaults to get_LCA_model().
+    - co2_prices: Optional CO2e price (SEK/kg) per simulation year.
+    - start_year: Calendar year of the first simulated month.
+
+    Returns:
+    - DataFrame with one row per strategy: 'Annuity' (SEK/m/year), 'Lifetime' (years),
+      'Option', 'Lifetime_H', 'Lifetime_L', the accumulated costs per category
+      ('Renewal_Direct', ..., 'Tamping_Capacity', SEK) and, with track_emissions,
+      'CO2e_kg' and 'CO2_cost'.
+    """
+    c = dict(default_costs(), **(costs or {}))
+    n_months = ledger.n_months
+    discount_factors = check_discount_factors(discount_factors, n_months)
+    length = c['TRACK_LENGTH_M']
+    cap = c['CAP_POSS_PER_HOUR']
+    grinding_cost = c['GRINDING_COST_PER_M'] * length
+    milling_cost = 5 / 3 * c['GRINDING_COST_PER_M'] * length
+    tamping_cost = c['TAMPING_COST_PER_M'] * length
+
+    if track_emissions:
+        co2, co2_value = _co2_factors(lca_model, co2_prices, start_year, discount_factors, n_months, length)
+        co2_renewal = co2['rail_renewal']
+
+    n = len(ledger)
+    first_H, first_L = ledger.first_renewal[:, 0], ledger.first_renewal[:, 1]
+    stop = ledger.stop_month
+
+    maint = np.zeros((n, 2))
+    cap_costs = np.zeros((n, 2))
+    renewal = np.zeros((n, 2))
+    tamping = np.zeros(n)
+    cap_tamping = np.zeros(n)
+    last_renewal = np.zeros((n, 2), dtype=int)
+    co2_kg = np.zeros(n)
+    co2_cost = np.zeros(n)
+    best = _BestOption(n)
+
+    def option_fields(total, horizon, renewal_capacity, lifetime_H, lifetime_L, renewal_direct, closing_renewals):
+        fields = {
+            'Annuity': total / horizon / length,
+            'Lifetime': horizon,
+            'Lifetime_H': lifetime_H,
+            'Lifetime_L': lifetime_L,
+            'Renewal_Direct': renewal_direct,
+            'Renewal_Capacity': renewal_capacity,
+            'Grinding_Direct': maint[:, 0] + maint[:, 1],
+            'Grinding_Capacity': cap_costs[:, 0] + cap_costs[:, 1],
+            'Tamping_Direct': tamping,
+            'Tamping_Capacity': cap_tamping,
+        }
+        if track_emissions:
+            fields['CO2e_kg'] = co2_kg + closing_renewals * co2_renewal
+            fields['CO2_cost'] = co2_cost + closing_renewals * co2_renewal * co2_value[m]
+        return fields
+
+    last_month = n_months if np.any(stop > n_months) else int(stop.max())
+    for m in range(1, last_month + 1):
+        col = m - 1
+        d = discount_factors[m]
+        t = m / 12
+        grind = ledger.grind[:, :, col]
+        mill = ledger.mill[:, :, col]
+
+        # grinding and milling, the possession is shared when both rails are ground
+        shared = np.where(grind[:, 0] & grind[:, 1], 0.5, 1.0)
+        maint += (grind * grinding_cost + mill * milling_cost) * d
+        cap_costs += (grind * (c['POSS_GRINDING'] * cap * shared)[:, None] + mill * c['POSS_GRINDING_TWICE'] * cap) * d
+
+        tamp = ledger.tamp[:, col]
+        tamping += tamp * tamping_cost * d
+        cap_tamping += tamp * c['POSS_TAMPING'] * cap * d
+
+        if track_emissions:
+            event_kg = (grind.sum(axis=1) * co2['grinding'] + mill.sum(axis=1) * co2['milling']
+                        + tamp * co2['tamping'])
+            co2_kg += event_kg
+            co2_cost += event_kg * co2_value[m]
+
+        material = c['RAIL_RENEWAL_COST'] * d
+        cap_renewal = cap * c['POSS_NEW_RAIL'] * d
+        shared_total = tamping + cap_tamping + cap_renewal
+
+        # --- high rail reaches the limit (evaluated first) ---
+        renew_H = ledger.renew[:, 0, col] & (m <= stop)
+        if renew_H.any():
+            lcc = (renewal[:, 0] + maint[:, 0] + cap_costs[:, 0] + material
+                   + renewal[:, 1] + maint[:, 1] + cap_costs[:, 1] + material + shared_total)
+            renewal_direct = renewal[:, 0] + renewal[:, 1] + 2 * material
+            best.consider(renew_H, OPTION_BOTH_H, m,
+                          option_fields(lcc, t, cap_renewal, t, t, renewal_direct, 2))
+            last_renewal[renew_H, 0] = m
+            separate = renew_H & (first_L < m)
+            best.consider(separate, OPTION_SEPARATE_H, m,
+                          option_fields(lcc + cap_renewal, t, 2 * cap_renewal,
+                                        last_renewal[:, 0] / 12, last_renewal[:, 1] / 12, renewal_direct, 1))
+            # renew the high rail only, unless the simulation stops here
+            applied = renew_H & ~separate
+            renewal[:, 0] += applied * material
+            cap_costs[:, 0] += applied * cap_renewal
+            if track_emissions:
+                co2_kg += applied * co2_renewal
+                co2_cost += applied * co2_renewal * co2_value[m]
+
+        # --- low rail reaches the limit ---
+        renew_L = ledger.renew[:, 1, col] & ((m < stop) | ((m == stop) & (first_L == m)))
+        if renew_L.any():
+            lcc = (renewal[:, 0] + maint[:, 0] + cap_costs[:, 0] + material
+                   + renewal[:, 1] + maint[:, 1] + cap_costs[:, 1] + material + shared_total)
+            renewal_direct = renewal[:, 0] + renewal[:, 1] + 2 * material
+            best.consider(renew_L, OPTION_BOTH_L, m,
+                          option_fields(lcc, t, cap_renewal, t, t, renewal_direct, 2))
+            last_renewal[renew_L, 1] = m
+            separate = renew_L & (first_H <= m)
+            best.consider(separate, OPTION_SEPARATE_L, m,
+                          option_fields(lcc + cap_renewal, t, 2 * cap_renewal,
+                                        last_renewal[:, 0] / 12, last_renewal[:, 1] / 12, renewal_direct, 1))
+            applied = renew_L & ~separate
+            renewal[:, 1] += applied * material
+            cap_costs[:, 1] += applied * cap_renewal
+            if track_emissions:
+                co2_kg += applied * co2_renewal
+                co2_cost += applied * co2_renewal * co2_value[m]
+
+        # --- end of the technical lifetime of the track ---
+        if m == n_months:
+            eol = stop > n_months
+            # as in the scalar model, the LCC of this option leaves out earlier rail renewals
+            lcc = maint[:, 0] + cap_costs[:, 0] + maint[:, 1] + cap_costs[:, 1] + 2 * material + shared_total
+            renewal_direct = renewal[:, 0] + renewal[:, 1] + 2 * material
+            best.consider(eol, OPTION_EOL, m,
+                          option_fields(lcc, t, cap_renewal, t, t, renewal_direct, 2))
+
+    result = pd.DataFrame(best.values)
+    result.insert(2, 'Option', np.asarray(RENEWAL_OPTIONS, dtype=object)[best.option])
+    if not track_emissions:
+        result = result.drop(columns=['CO2e_kg', 'CO2_cost'])
+    return result
+
+
+def price_rail_events(
+    events,
+    discount_factors=None,
+    costs=None,
+    track_life=TECH_LIFE_YEARS,
+    track_emissions=False,
+    lca_model=None,
+    co2_prices=None,
+    start_year=SIMULATION_START_YEAR,
+):
+    """
+    Price a batch of single-rail simulations up to their first renewal, as get_annuity_refactored does.
+
+    Parameters:
+    - events: RailEvents from simulate_rails.
+    - discount_factors, costs, track_emissions, lca_model, co2_prices, start_year: see price_track_ledger.
+    - track_life: Lifetime (years) used for rails that are not renewed within the horizon.
+
+    Returns:
+    - DataFrame with one row per rail: 'Annuity' (SEK/m/year), 'Lifetime' (years), the
+      accumulated 'Maintenance', 'Capacity' and 'Renewal' costs (SEK) and, with
+      track_emissions, 'CO2e_kg' and 'CO2_cost'.
+    """
+    c = dict(default_costs(), **(costs or {}))
+    n, n_months = events.grind.shape
+    discount_factors = check_discount_factors(discount_factors, n_months)
+    length = c['TRACK_LENGTH_M']
+    cap = c['CAP_POSS_PER_HOUR']
+    if track_emissions:
+        co2, co2_value = _co2_factors(lca_model, co2_prices, start_year, discount_factors, n_months, length)
+
+    first = events.first_renewal
+    maintenance = np.zeros(n)
+    capacity = np.zeros(n)
+    renewal = np.zeros(n)
+    co2_kg = np.zeros(n)
+    co2_cost = np.zeros(n)
+    for m in range(1, min(n_months, int(first.max())) + 1):
+        col = m - 1
+        d = discount_factors[m]
+        alive = m <= first
+        grind = events.grind[:, col] & alive
+        mill = events.mill[:, col] & alive
+        tamp = events.tamp[:, col] & alive
+        maintenance += (grind * c['GRINDING_COST_PER_M'] + mill * 5 / 3 * c['GRINDING_COST_PER_M']
+                        + tamp * c['TAMPING_COST_PER_M']) * length * d
+        capacity += (grind * c['POSS_GRINDING'] + mill * c['POSS_GRINDING_TWICE'] + tamp * c['POSS_TAMPING']) * cap * d
+        renewed = first == m
+        renewal += renewed * (c['RAIL_RENEWAL_COST'] + c['POSS_NEW_RAIL'] * cap) * d
+        if track_emissions:
+            event_kg = (grind * co2['grinding'] + mill * co2['milling'] + tamp * co2['tamping']
+                        + renewed * co2['rail_renewal'])
+            co2_kg += event_kg
+            co2_cost += event_kg * co2_value[m]
+
+    lifetime = np.where(first <= n_months, first / 12, track_life)
+    result = pd.DataFrame({
+        'Annuity': (maintenance + capacity + renewal) / length / lifetime,
+        'Lifetime': lifetime,
+        'Maintenance': maintenance,
+        'Capacity': capacity,
+        'Renewal': renewal,
+    })
+    if track_emissions:
+        result['CO2e_kg'] = co2_kg
+        result['CO2_cost'] = co2_cost
+    return result
+
+
+# === CALENDAR ===
+
+# activities of the maintenance calendar, in the order of its activity axis
+ACTIVITIES = ('grinding', 'milling', 'tamping', 'renewal')
+
+# strategies per block of track_ledger_calendar, to bound the memory of the monthly arrays
+CALENDAR_CHUNK = 2048
+
+
+def track_ledger_calendar(ledger, results, costs=None, n_years=None, monthly=False):
+    """
+    Yearly maintenance calendar of the strategies of a priced two-rail EventLedger.
+
+    The events of a strategy up to the renewal of its chosen option (the 'Lifetime' and
+    'Option' of price_track_ledger) form one life cycle, which is repeated over the calendar
+    as the annuity assumes. Both rails are renewed at the end of a cycle, in one possession
+    ('Renew both', end of life) or two ('Renew separately'); a rail renewed alone earlier in the
+    cycle is one more renewal. Grinding both rails in the same month is one possession, as in
+    the pricing.
+
+    Parameters:
+    - ledger: EventLedger from simulate_track_batch.
+    - results: price_track_ledger results of the ledger.
+    - costs: Cost constants, defaults to default_costs().
+    - n_years: Years of the calendar, defaults to the simulated horizon.
+    - monthly: Months (12 x n_years) instead of years on the second axis.
+
+    Returns:
+    - dict with 'cost' (direct cost, SEK, undiscounted) and 'hours' (possession hours), arrays
+      of shape (strategies, n_years, len(ACTIVITIES)), and 'renewed_m' (metres of rail renewed)
+      of shape (strategies, n_years), all for TRACK_LENGTH_M of track
+    """
+    c = dict(default_costs(), **(costs or {}))
+    n_years = n_years or ledger.n_months // 12
+    n = len(ledger)
+    n_periods = 12 * n_years if monthly else n_years
+    calendar = {
+        'cost': np.zeros((n, n_periods, len(ACTIVITIES))),
+        'hours': np.zeros((n, n_periods, len(ACTIVITIES))),
+        'renewed_m': np.zeros((n, n_periods)),
+    }
+    lifetime = results['Lifetime'].to_numpy()
+    separate = results['Option'].to_numpy() == RENEWAL_OPTIONS[OPTION_SEPARATE_H]
+    eol = results['Option'].to_numpy() == RENEWAL_OPTIONS[OPTION_EOL]
+    for start in range(0, n, CALENDAR_CHUNK):
+        block = slice(start, min(start + CALENDAR_CHUNK, n))
+        cost, hours, renewed, cycle = _monthly_calendar(
+            ledger.grind[block], ledger.mill[block], ledger.renew[block], ledger.tamp[block],
+            ledger.first_renewal[block], lifetime[block], separate[block], eol[block], c
+        )
+        # month m of the calendar is month (m - 1) % cycle + 1 of the cycle
+        months = np.arange(12 * n_years)[None, :] % cycle[:, None]
+        for name, values in (('cost', cost), ('hours', hours), ('renewed_m', renewed)):
+            index = months if values.ndim == 2 else months[:, :, None]
+            repeated = np.take_along_axis(values, index, axis=1)
+            if not monthly:
+                repeated = repeated.reshape(repeated.shape[0], n_years, 12, *repeated.shape[2:]).sum(axis=2)
+            calendar[name][block] = repeated
+    return calendar
+
+
+def _monthly_calendar(grind, mill, renew, tamp, first_renewal, lifetime, separate, eol, c):
+    """
+    Monthly direct cost and possession hours (strategies, months, ACTIVITIES), metres of rail
+    renewed (strategies, months) and cycle length (months) of a block of strategies.
+    """
+    n_months = tamp.shape[1]
+    months = np.arange(1, n_months + 1)[None, :]
+    cycle = np.clip(np.rint(lifetime * 12).astype(int), 1, n_months)
+    in_cycle = months <= cycle[:, None]
+    end = months == cycle[:, None]
+    first_H, first_L = first_renewal[:, :1], first_renewal[:, 1:]
+    stop = np.maximum(first_H, first_L)
+
+    # rails renewed alone within the cycle, as applied in price_track_ledger: before the end of
+    # the cycle, or also in its last month when the track reaches the end of its life
+    applied_H = renew[:, 0] & (months <= stop) & ~(first_L < months)
+    applied_L = renew[:, 1] & ((months < stop) | ((months == stop) & (first_L == months))) & ~(first_H <= months)
+    single = (applied_H.astype(int) + applied_L) * (in_cycle & ~(end & ~eol[:, None]))
+
+    length = c['TRACK_LENGTH_M']
+    grinding_cost = c['GRINDING_COST_PER_M'] * length
+    cost = np.zeros(tamp.shape + (len(ACTIVITIES),))
+    hours = np.zeros(tamp.shape + (len(ACTIVITIES),))
+    cost[..., 0] = grind.sum(axis=1) * grinding_cost
+    cost[..., 1] = mill.sum(axis=1) * 5 / 3 * grinding_cost
+    cost[..., 2] = tamp * c['TAMPING_COST_PER_M'] * length
+    cost[..., 3] = (single + 2 * end) * c['RAIL_RENEWAL_COST']
+    hours[..., 0] = grind.any(axis=1) * c['POSS_GRINDING']
+    hours[..., 1] = mill.sum(axis=1) * c['POSS_GRINDING_TWICE']
+    hours[..., 2] = tamp * c['POSS_TAMPING']
+    hours[..., 3] = (single + end * np.where(separate, 2, 1)[:, None]) * c['POSS_NEW_RAIL']
+    cost *= in_cycle[..., None]
+    hours *= in_cycle[..., None]
+    renewed = (single + 2 * end) * length
+    return cost, hours, renewed, cycle
+
+
+# === MAIN BATCHED FUNCTIONS ===
+
+def get_annuity_track_batch(
+    tables,
+    grinding_freq_low,
+    grinding_freq_high,
+    gauge_freq,
+    profile_low_rail=SELECTED_PROFILE,
+    profile_high_rail=SELECTED_PROFILE,
+    gauge_widening_per_year=SELECTED_GAUGE_WIDENING,
+    radius=SELECTED_RADIUS,
+    load=DEFAULT_LOAD,
+    track_life=TECH_LIFE_YEARS,
+    discount_factors=None,
+    costs=None,
+    track_emissions=False,
+    lca_model=None,
+    co2_prices=None,
+    traffic_factors=None,
+):
+    """
+    Batched version of get_annuity_track_refactored.
+
+    All strategy arguments (grinding and tamping intervals, profiles, gauge widening,
+    radius and load) may be scalars or arrays and are broadcast against each other;
+    every element is one strategy. traffic_factors (rail_analysis.traffic) gives the monthly
+    traffic, one vector for all strategies or one row per strategy.
+
+    Returns:
+    - DataFrame with the strategy parameters ('Profile_Low', 'Profile_High', 'Radius', 'Load',
+      'GrindingFreq_Low', 'GrindingFreq_High', 'GaugeFreq', 'GaugeWidening') and the results
+      of price_track_ledger ('Annuity', 'Lifetime', 'Option', ...), with the lifetime in
+      accumulated traffic ('Lifetime_MGT') when traffic_factors is given.
+    """
+    ledger = simulate_track_strategies(
+        tables, grinding_freq_low, grinding_freq_high, gauge_freq, profile_low_rail, profile_high_rail,
+        gauge_widening_per_year, radius, load, track_life, traffic_factors=traffic_factors
+    )
+    results = price_track_ledger(
+        ledger, discount_factors=discount_factors, costs=costs,
+        track_emissions=track_emissions, lca_model=lca_model, co2_prices=co2_prices
+    )
+    if traffic_factors is not None:
+        results['Lifetime_MGT'] = _lifetime_mgt(traffic_factors, results['Lifetime'].to_numpy())
+    return pd.concat([ledger.strategies, results], axis=1)
+
+
+def simulate_track_strategies(
+    tables,
+    grinding_freq_low,
+    grinding_freq_high,
+    gauge_freq,
+    profile_low_rail=SELECTED_PROFILE,
+    profile_high_rail=SELECTED_PROFILE,
+    gauge_widening_per_year=SELECTED_GAUGE_WIDENING,
+    radius=SELECTED_RADIUS,
+    load=DEFAULT_LOAD,
+    track_life=TECH_LIFE_YEARS,
+    record_history=False,
+    traffic_factors=None,
+):
+    """
+    Simulate two-rail strategies given by profile, radius and load (see get_annuity_track_batch)
+    and return their EventLedger, with the strategy parameters in ledger.strategies.
+    """
+    (grinding_freq_low, grinding_freq_high, gauge_freq, profile_low_rail, profile_high_rail,
+     gauge_widening_per_year, radius, load, _) = (np.ravel(a) for a in np.broadcast_arrays(
+        np.asarray(grinding_freq_low), np.asarray(grinding_freq_high), np.asarray(gauge_freq),
+        np.asarray(profile_low_rail, dtype=object), np.asarray(profile_high_rail, dtype=object),
+        np.asarray(gauge_widening_per_year), np.asarray(radius, dtype=object), np.asarray(load, dtype=object),
+        _traffic_rows(traffic_factors)
+    ))
+    table_high = tables.table_indices(profile_high_rail, 'High', radius, load)
+    table_low = tables.table_indices(profile_low_rail, 'Inner', radius, load)
+    strategies = pd.DataFrame({
+        'Profile_Low': profile_low_rail,
+        'Profile_High': profile_high_rail,
+        'Radius': radius.astype(str),
+        'Load': load.astype(float),
+        'GrindingFreq_Low': grinding_freq_low.astype(int),
+        'GrindingFreq_High': grinding_freq_high.astype(int),
+        'GaugeFreq': gauge_freq.astype(int),
+        'GaugeWidening': gauge_widening_per_year.astype(float),
+    })
+    return simulate_track_batch(
+        tables, table_high, table_low, grinding_freq_high, grinding_freq_low, gauge_freq,
+        gauge_widening_per_year=gauge_widening_per_year, track_life=track_life,
+        strategies=strategies, record_history=record_history, traffic_factors=traffic_factors
+    )
+
+
+def get_annuity_batch(
+    tables,
+    grinding_freq,
+    gauge_freq,
+    high_or_low_rail='High',
+    profile=SELECTED_PROFILE,
+    gauge_widening_per_year=SELECTED_GAUGE_WIDENING,
+    radius=SELECTED_RADIUS,
+    load=DEFAULT_LOAD,
+    track_life=TECH_LIFE_YEARS,
+    discount_factors=None,
+    costs=None,
+    track_emissions=False,
+    lca_model=None,
+    co2_prices=None,
+    traffic_factors=None,
+):
+    """
+    Batched version of get_annuity_refactored (single rail), broadcasting the strategy arguments.
+    traffic_factors is one vector for all strategies or one row per strategy (see simulate_rails).
+
+    Returns:
+    - DataFrame with the strategy parameters ('Rail', 'Profile', 'Radius', 'Load', 'GrindingFreq',
+      'GaugeFreq', 'GaugeWidening') and the results of price_rail_events, with 'Lifetime_MGT'
+      when traffic_factors is given.
+    """
+    (grinding_freq, gauge_freq, high_or_low_rail, profile, gauge_widening_per_year, radius, load, _) = (
+        np.ravel(a) for a in np.broadcast_arrays(
+            np.asarray(grinding_freq), np.asarray(gauge_freq), np.asarray(high_or_low_rail, dtype=object),
+            np.asarray(profile, dtype=object), np.asarray(gauge_widening_per_year),
+            np.asarray(radius, dtype=object), np.asarray(load, dtype=object), _traffic_rows(traffic_factors)
+        )
+    )
+    table = tables.table_indices(profile, high_or_low_rail, radius, load)
+    events = simulate_rails(
+        tables, table, grinding_freq, gauge_freq, gauge_widening_per_year, n_months=12 * track_life,
+        traffic_factors=traffic_factors
+    )
+    results = price_rail_events(
+        events, discount_factors=discount_factors, costs=costs, track_life=track_life,
+        track_emissions=track_emissions, lca_model=lca_model, co2_prices=co2_prices
+    )
+    if traffic_factors is not None:
+        results['Lifetime_MGT'] = _lifetime_mgt(traffic_factors, results['Lifetime'].to_numpy())
+    strategies = pd.DataFrame({
+        'Rail': high_or_low_rail,
+        'Profile': profile,
+        'Radius': radius.astype(str),
+        'Load': load.astype(float),
+        'GrindingFreq': grinding_freq.astype(int),
+        'GaugeFreq': gauge_freq.astype(int),
+        'GaugeWidening': gauge_widening_per_year.astype(float),
+    })
+    return pd.concat([strategies, results], axis=1)
+
+
+def sweep_track(
+    tables,
+    grinding_freqs=range(1, 13),
+    gauge_freqs=(48,),
+    profiles=None,
+    radii=None,
+    loads=None,
+    gauge_widenings=(SELECTED_GAUGE_WIDENING,),
+    same_grinding=False,
+    same_profile=False,
+    **kwargs
+):
+    """
+    Evaluate the full grid of two-rail strategies in one batched run.
+
+    The grid covers every (profile_low, profile_high, grinding_low, grinding_high, tamping)
+    combination for each radius, load and gauge widening. Combinations without a table in
+    `tables` are left out.
+
+    Parameters:
+    - tables: PreparedTables.
+    - grinding_freqs: Grinding intervals (months) for each rail.
+    - gauge_freqs: Tamping intervals (months).
+    - profiles, radii, loads: Rail profiles, radii and loads, default to all in the tables.
+                              Loads are continuous: loads that are not tabulated are
+                              interpolated along the load axis (PreparedTables.add_loads),
+                              e.g. loads=[30, 32.5, 35] for load-increase scenarios.
+    - gauge_widenings: Gauge widening rates (mm/year).
+    - same_grinding: Use the same grinding interval on both rails.
+    - same_profile: Use the same profile on both rails.
+    - kwargs: Passed on to get_annuity_track_batch (track_life, discount_factors, costs,
+              traffic_factors for traffic growth scenarios, ...).
+
+    Returns:
+    - DataFrame with one row per strategy, see get_annuity_track_batch.
+    """
+    grid = track_grid(tables, grinding_freqs, gauge_freqs, profiles, radii, loads, gauge_widenings,
+                      same_grinding, same_profile)
+    return get_annuity_track_batch(tables, **{name: grid[name].to_numpy() for name in grid}, **kwargs)
+
+
+def track_grid(
+    tables,
+    grinding_freqs=range(1, 13),
+    gauge_freqs=(48,),
+    profiles=None,
+    radii=None,
+    loads=None,
+    gauge_widenings=(SELECTED_GAUGE_WIDENING,),
+    same_grinding=False,
+    same_profile=False,
+):
+    """
+    Strategy grid of sweep_track, without evaluating it.
+
+    Returns:
+    - DataFrame with one row per strategy and the get_annuity_track_batch arguments as columns
+      ('grinding_freq_low', 'grinding_freq_high', 'gauge_freq', 'profile_low_rail',
+      'profile_high_rail', 'gauge_widening_per_year', 'radius', 'load').
+    """
+    profiles = tables.profiles if profiles is None else list(profiles)
+    radii = (tables.radii or [SELECTED_RADIUS]) if radii is None else list(radii)
+    loads = tables.loads if loads is None else list(loads)
+    grinding_freqs = list(grinding_freqs)
+
+    # (profile_low, profile_high, radius, load) combinations with tables for both rails
+    cases = []
+    for radius in radii:
+        for load in loads:
+            available = [p for p in profiles if _has_tables(tables, p, radius, load)]
+            pairs = [(p, p) for p in available] if same_profile else [(pl, ph) for pl in available for ph in available]
+            cases += [(pl, ph, radius, load) for pl, ph in pairs]
+    if not cases:
+        raise ValueError("No tables for the requested profiles, radii and loads")
+
+    freqs = [(g, g) for g in grinding_freqs] if same_grinding else [(gl, gh) for gl in grinding_freqs for gh in grinding_freqs]
+    grid = pd.MultiIndex.from_product(
+        [range(len(cases)), range(len(freqs)), list(gauge_freqs), list(gauge_widenings)],
+        names=['case', 'freq', 'GaugeFreq', 'GaugeWidening']
+    ).to_frame(index=False)
+    case = np.asarray(cases, dtype=object)[grid['case'].to_numpy()]
+    freq = np.asarray(freqs)[grid['freq'].to_numpy()]
+
+    return pd.DataFrame({
+        'grinding_freq_low': freq[:, 0],
+        'grinding_freq_high': freq[:, 1],
+        'gauge_freq': grid['GaugeFreq'].to_numpy(),
+        'profile_low_rail': case[:, 0],
+        'profile_high_rail': case[:, 1],
+        'gauge_widening_per_year': grid['GaugeWidening'].to_numpy(),
+        'radius': case[:, 2],
+        'load': case[:, 3],
+    })
+
+
+def best_profiles(results, by=('Radius',), column='Annuity'):
+    """
+    Return the strategy with the lowest annuity (or other column) for each group of a sweep,
+    e.g. the best (profile_low, profile_high, grinding, tamping) per radius class.
+
+    Parameters:
+    - results: DataFrame from sweep_track or get_annuity_track_batch.
+    - by: Columns to group by, e.g. ('Radius',) or ('Radius', 'Load').
+    - column: Column to minimise.
+
+    Returns:
+    - DataFrame with one row per group.
+    """
+    by = list(by)
+    best = results.loc[results.groupby(by, sort=True)[column].idxmin()]
+    return best.reset_index(drop=True)
+
+
+# === HELPER FUNCTIONS ===
+
+def _co2_factors(lca_model, co2_prices, start_year, discount_factors, n_months, track_length):
+    """
+    Return the CO2e emissions (kg) per maintenance event on the track section and the
+    discounted CO2e price (SEK/kg) of every month (index 0 = month 0).
+    """
+    if lca_model is None:
+        from rail_analysis.LCA import get_LCA_model
+        lca_model = get_LCA_model()
+    co2 = {event: lca_model.event_factor(event) * track_length
+           for event in ('grinding', 'milling', 'tamping', 'rail_renewal')}
+
+    years = (np.arange(1, n_months + 1) - 1) // 12
+    if co2_prices is not None:
+        prices = np.asarray(co2_prices, dtype=float)[years]
+    else:
+        prices = lca_model.co2_price(start_year + years)
+    co2_value = np.zeros(n_months + 1)
+    co2_value[1:] = prices * discount_factors[1:n_months + 1]
+    return co2, co2_value
+
+
+def _traffic_rows(traffic_factors):
+    """Placeholder broadcasting the strategy arguments against one row of traffic factors per strategy."""
+    if traffic_factors is None or np.ndim(traffic_factors) < 2:
+        return np.zeros(())
+    return np.zeros(len(traffic_factors))
+
+
+def _lifetime_mgt(traffic_factors, lifetime):
+    """Accumulated traffic (MGT) at the end of the given lifetimes (years)."""
+    mgt = np.atleast_2d(accumulated_mgt(traffic_factors))
+    months = np.minimum(np.rint(np.asarray(lifetime) * 12).astype(int), mgt.shape[1] - 1)
+    rows = np.arange(len(months)) % mgt.shape[0]
+    return mgt[rows, months]
+
+
+def _has_tables(tables, profile, radius, load):
+    try:
+        tables.table_index(profile, 'High', radius, load)
+        tables.table_index(profile, 'Inner', radius, load)
+    except ValueError:
+        return False
+    return True
@@ -2,12 +2,13 @@ from rail_analysis.LCC_two_rails import get_annuity_track_refactored, plot_histo
 from rail_analysis.LCC_single_rail import get_annuity_refactored, plot_historical_data_both_rails
 from rail_analysis.constants import (
     TECH_LIFE_YEARS, 
-    TRACK_RENEWAL_COST, 
     TRACK_LENGTH_M,
-    ANNUAL_MGT
+    ANNUAL_MGT,
+    get_track_renewal_cost
 )
-
-import pandas as pd
+from rail_analysis.emissions import summarise_emissions
+from rail_analysis.discounting import check_discount_factors
+from rail_analysis.sweep import run_sweep, scenario_grid
 
 def run_joint_optimisation(
     data_df,
@@ -19,9 +20,13 @@ def run_joint_optimisation(
     track_results=False,
     gauge_widening_per_year=1,
     radius='1465',
-    track_life=TECH_LIFE_YEARS
+    track_life=TECH_LIFE_YEARS,
+    track_emissions=False,
+    lca_model=None,
+    discount_factors=None,
+    co2_prices=None
 ):
-    ann_joint, life_joint, hist_joint = get_annuity_track_refactored(
+    return get_annuity_track_refactored(
         data_df,
         grinding_freq_low,
         grinding_freq_high,
@@ -31,9 +36,12 @@ def run_joint_optimisation(
         track_results=track_results,
         gauge_widening_per_year=gauge_widening_per_year,
         radius=radius,
-        track_life=track_life
+        track_life=track_life,
+        track_emissions=track_emissions,
+        lca_model=lca_model,
+        discount_factors=discount_factors,
+        co2_prices=co2_prices
     )
-    return ann_joint, life_joint, hist_joint
 
 def run_separate_optimisation(
     data_df,
@@ -42,26 +50,113 @@ def run_separate_optimisation(
     profile_rail='MB4',
     track_results=False,
     gauge_widening_per_year=1,
-    radius='1465'
+    radius='1465',
+    track_emissions=False,
+    lca_model=None,
+    discount_factors=None,
+    co2_prices=None
 ):
+    """
+    Runs the single-rail LCC for the high and the low rail.
+    With track_emissions=True, the emission events of both rails are appended to the
+    returned tuple: (..., emissions_H, emissions_L).
+    """
     maint_strategy = (grinding_freq, gauge_freq)
-    ann_H, life_H, hist_H = get_annuity_refactored(
+    result_H = get_annuity_refactored(
         data_df,
         maint_strategy,
         high_or_low_rail='High',
         track_results=track_results,
         gauge_widening_per_year=gauge_widening_per_year,
-        radius=radius
+        radius=radius,
+        track_emissions=track_emissions,
+        lca_model=lca_model,
+        discount_factors=discount_factors,
+        co2_prices=co2_prices
     )
-    ann_L, life_L, hist_L = get_annuity_refactored(
+    result_L = get_annuity_refactored(
         data_df,
         maint_strategy,
         high_or_low_rail='Inner',
         track_results=track_results,
         gauge_widening_per_year=gauge_widening_per_year,
-        radius=radius
+        radius=radius,
+        track_emissions=track_emissions,
+        lca_model=lca_model,
+        discount_factors=discount_factors,
+        co2_prices=co2_prices
     )
-    return ann_H, life_H, hist_H, ann_L, life_L, hist_L
+    if track_emissions:
+        return result_H[:3] + result_L[:3] + (result_H[3], result_L[3])
+    return result_H + result_L
+
+def compare_strategy(
+    data_df,
+    grinding_freq,
+    gauge_freq=48,
+    profile_low_rail='MB4',
+    profile_high_rail='MB4',
+    track_results=False,
+    gauge_widening_per_year=1,
+    radius='1465',
+    track_life=TECH_LIFE_YEARS,
+    track_emissions=False,
+    lca_model=None,
+    discount_factors=None,
+    co2_prices=None
+):
+    """
+    Joint (two-rail) and separate (single-rail) LCC of one grinding frequency, and with
+    track_emissions=True their emissions, as one row of compare_joint_vs_separate.
+    """
+    track_renewal_cost = get_track_renewal_cost()
+    # Joint
+    joint = run_joint_optimisation(
+        data_df, grinding_freq, grinding_freq, gauge_freq,
+        profile_low_rail, profile_high_rail,
+        track_results, gauge_widening_per_year, radius, track_life,
+        track_emissions=track_emissions, lca_model=lca_model,
+        discount_factors=discount_factors, co2_prices=co2_prices
+    )
+    ann_joint, life_joint = joint[:2]
+    # Separate
+    separate = run_separate_optimisation(
+        data_df, grinding_freq, gauge_freq, profile_low_rail, track_results, gauge_widening_per_year, radius,
+        track_emissions=track_emissions, lca_model=lca_model,
+        discount_factors=discount_factors, co2_prices=co2_prices
+    )
+    ann_H, life_H, _, ann_L, life_L = separate[:5]
+    # LCC over technical lifetime
+    total_LCC_joint = ann_joint * TECH_LIFE_YEARS + track_renewal_cost / TRACK_LENGTH_M
+    total_LCC_H = ann_H * TECH_LIFE_YEARS
+    total_LCC_L = ann_L * TECH_LIFE_YEARS
+    total_LCC_sum = total_LCC_H + total_LCC_L + track_renewal_cost / TRACK_LENGTH_M
+    row = {
+        'GrindingFreq': grinding_freq,
+        'Annuity_Joint': ann_joint,
+        'Lifetime_Joint': life_joint,
+        'TotalLCC_Joint': total_LCC_joint,
+        'Annuity_High': ann_H,
+        'Lifetime_High': life_H,
+        'TotalLCC_High': total_LCC_H,
+        'Annuity_Low': ann_L,
+        'Lifetime_Low': life_L,
+        'TotalLCC_Low': total_LCC_L,
+        'TotalLCC_Sum': total_LCC_sum
+    }
+    if track_emissions:
+        co2_joint = summarise_emissions(joint[3], life_joint)
+        co2_H = summarise_emissions(separate[6], life_H)
+        co2_L = summarise_emissions(separate[7], life_L)
+        row.update({
+            'CO2e_Joint_kg': co2_joint['CO2e_kg'],
+            'CO2Annuity_Joint': co2_joint['CO2_annuity'],
+            'CO2e_High_kg': co2_H['CO2e_kg'],
+            'CO2Annuity_High': co2_H['CO2_annuity'],
+            'CO2e_Low_kg': co2_L['CO2e_kg'],
+            'CO2Annuity_Low': co2_L['CO2_annuity']
+        })
+    return row
 
 def compare_joint_vs_separate(
     data_df,
@@ -73,39 +168,48 @@ def compare_joint_vs_separate(
     gauge_widening_per_year=1,
     radius='1465',
     track_life=TECH_LIFE_YEARS,
-    bar_chart=False
+    bar_chart=False,
+    track_emissions=False,
+    lca_model=None,
+    discount_factors=None,
+    co2_prices=None,
+    workers=1,
+    chunk_size=None,
+    cache=None,
+    progress=None,
+    metrics_file=None
 ):
-    results = []
-    for freq in grinding_freqs:
-        # Joint
-        ann_joint, life_joint, _ = run_joint_optimisation(
-            data_df, freq, freq, gauge_freq,
-            profile_low_rail, profile_high_rail,
-            track_results, gauge_widening_per_year, radius, track_life
-        )
-        # Separate
-        ann_H, life_H, _, ann_L, life_L, _ = run_separate_optimisation(
-            data_df, freq, gauge_freq, profile_low_rail, track_results, gauge_widening_per_year, radius
-        )
-        # LCC over technical lifetime
-        total_LCC_joint = ann_joint * TECH_LIFE_YEARS + TRACK_RENEWAL_COST / TRACK_LENGTH_M
-        total_LCC_H = ann_H * TECH_LIFE_YEARS
-        total_LCC_L = ann_L * TECH_LIFE_YEARS
-        total_LCC_sum = total_LCC_H + total_LCC_L + TRACK_RENEWAL_COST / TRACK_LENGTH_M
-        results.append({
-            'GrindingFreq': freq,
-            'Annuity_Joint': ann_joint,
-            'Lifetime_Joint': life_joint,
-            'TotalLCC_Joint': total_LCC_joint,
-            'Annuity_High': ann_H,
-            'Lifetime_High': life_H,
-            'TotalLCC_High': total_LCC_H,
-            'Annuity_Low': ann_L,
-            'Lifetime_Low': life_L,
-            'TotalLCC_Low': total_LCC_L,
-            'TotalLCC_Sum': total_LCC_sum
-        })
-    df = pd.DataFrame(results)
+    """
+    Compares the joint (two-rail) and the separate (single-rail) LCC for each grinding frequency.
+    With track_emissions=True the emissions of each strategy are accounted in the same
+    simulation pass and reported next to the annuities (CO2e in kg and CO2e annuity in SEK/m/year).
+    discount_factors and co2_prices (see rail_analysis.discounting) are shared by all strategies.
+    With workers > 1 the grinding frequencies are run in parallel (rail_analysis.sweep.run_sweep),
+    with the rows in the order of grinding_freqs. With a cache (rail_analysis.result_cache.ResultCache
+    or the path of its database) strategies evaluated before are read from the cache.
+    progress and metrics_file receive the sweep telemetry (see rail_analysis.telemetry).
+    """
+    # discount curve computed once for all strategies
+    discount_factors = check_discount_factors(discount_factors, 12 * max(track_life, TECH_LIFE_YEARS))
+    common = {
+        'data_df': data_df,
+        'gauge_freq': gauge_freq,
+        'profile_low_rail': profile_low_rail,
+        'profile_high_rail': profile_high_rail,
+        'track_results': track_results,
+        'gauge_widening_per_year': gauge_widening_per_year,
+        'radius': radius,
+        'track_life': track_life,
+        'track_emissions': track_emissions,
+        'lca_model': lca_model,
+        'discount_factors': discount_factors,
+        'co2_prices': co2_prices
+    }
+    df = run_sweep(
+        compare_strategy, scenario_grid(grinding_freq=grinding_freqs), common=common,
+        workers=workers, chunk_size=chunk_size, include_scenarios=False, cache=cache,
+        progress=progress, metrics_file=metrics_file, label='compare_joint_vs_separate'
+    )
     print(df)
     if bar_chart:
         plot_comparison_grid(df)
@@ -59,12 +59,14 @@ import seaborn as sns # type: ignore
 from scipy.interpolate import PchipInterpolator # type: ignore
 
 from rail_analysis.rail_measures import get_table
+from rail_analysis.emissions import EmissionsLedger
+from rail_analysis.discounting import check_discount_factors
+from rail_analysis.profiling import NULL_STATS, simulation_stats
 from collections import OrderedDict
 
 from rail_analysis.constants import (
     GRINDING_COST_PER_M,
     TRACK_LENGTH_M,
-    DISCOUNT_RATE,
     POSS_GRINDING,
     CAP_POSS_PER_HOUR,
     TAMPING_COST_PER_M,
@@ -86,49 +88,55 @@ from rail_analysis.constants import (
 
 # === HELPER FUNCTIONS ===
 
-def calculate_grinding_costs_rail(grinding_freq, since, gauge, H_curr, RCF_res_grinding, H_table, NW_table, RCF_residual_table, RCF_depth_table, y, gauge_levels):
+def calculate_grinding_costs_rail(grinding_freq, since, gauge, H_curr, RCF_res_grinding, H_table, NW_table, RCF_residual_table, RCF_depth_table, discount, gauge_levels, stats=NULL_STATS):
     delta_H = PchipInterpolator(gauge_levels, NW_table[NW_table['Month'] == since]['Value'])(gauge)
     grinding_cost = 0
     cap_cost = 0
     if since == grinding_freq:
-        grinding_cost = GRINDING_COST_PER_M * TRACK_LENGTH_M / (1 + DISCOUNT_RATE) ** y
-        cap_cost = POSS_GRINDING * CAP_POSS_PER_HOUR / (1 + DISCOUNT_RATE) ** y
+        grinding_cost = GRINDING_COST_PER_M * TRACK_LENGTH_M * discount
+        cap_cost = POSS_GRINDING * CAP_POSS_PER_HOUR * discount
         H_curr += PchipInterpolator(gauge_levels, H_table[H_table['Month'] == grinding_freq]['Value'])(gauge) - delta_H
         RCF_res_grinding += PchipInterpolator(gauge_levels, RCF_residual_table[RCF_residual_table['Month'] == grinding_freq]['Value'])(gauge)
         RCF_curr = RCF_res_grinding
         since = 0
+        stats.count('table_lookups', 3)
+        stats.count('interpolator_builds', 3)
     else:
         RCF_curr = RCF_res_grinding + PchipInterpolator(gauge_levels, RCF_depth_table[RCF_depth_table['Month'] == since]['Value'])(gauge)
         H_curr += delta_H
+        stats.count('table_lookups', 2)
+        stats.count('interpolator_builds', 2)
     return grinding_cost, cap_cost, H_curr, RCF_res_grinding, RCF_curr, since + 1
 
-def calculate_tamping_costs_rail(tamping_freq, since, gauge, y):
+def calculate_tamping_costs_rail(tamping_freq, since, gauge, discount):
     tamping_cost = 0
     cap_cost = 0
     if since == tamping_freq:
-        tamping_cost = TAMPING_COST_PER_M * TRACK_LENGTH_M / (1 + DISCOUNT_RATE) ** y
-        cap_cost = POSS_TAMPING * CAP_POSS_PER_HOUR / (1 + DISCOUNT_RATE) ** y
+        tamping_cost = TAMPING_COST_PER_M * TRACK_LENGTH_M * discount
+        cap_cost = POSS_TAMPING * CAP_POSS_PER_HOUR * discount
         gauge = INIT_GAUGE_LEVEL
         since = 0
     return tamping_cost, cap_cost, gauge, since + 1
 
-def handle_double_grinding_rail(RCF_residual_curr, since, gauge, H_table, y, RCF_res_grinding, gauge_levels):
+def handle_double_grinding_rail(RCF_residual_curr, since, gauge, H_table, discount, RCF_res_grinding, gauge_levels, stats=NULL_STATS):
     if RCF_residual_curr >= RCF_MAX:
         RCF_residual_curr = 0
         RCF_res_grinding = 0
         grinding_cost_per_meter_twice = GRINDING_COST_PER_M * 5 / 3
-        grinding_cost = grinding_cost_per_meter_twice * TRACK_LENGTH_M / (1 + DISCOUNT_RATE) ** y
-        cap_cost = POSS_GRINDING_TWICE * CAP_POSS_PER_HOUR / (1 + DISCOUNT_RATE) ** y
+        grinding_cost = grinding_cost_per_meter_twice * TRACK_LENGTH_M * discount
+        cap_cost = POSS_GRINDING_TWICE * CAP_POSS_PER_HOUR * discount
         delta_H_1 = PchipInterpolator(gauge_levels, H_table[H_table['Month'] == since + 1]['Value'])(gauge)
         delta_H_2 = PchipInterpolator(gauge_levels, H_table[H_table['Month'] == 1]['Value'])(gauge)
         delta_H_total = delta_H_1 + delta_H_2
+        stats.count('table_lookups', 2)
+        stats.count('interpolator_builds', 2)
         since = 0
         return grinding_cost, cap_cost, delta_H_total, RCF_res_grinding, RCF_residual_curr, since + 1
     return 0, 0, 0, RCF_res_grinding, RCF_residual_curr, since
 
-def handle_rail_renewal_rail(H_curr, y):
+def handle_rail_renewal_rail(H_curr, discount):
     if H_curr > H_MAX:
-        renewal_costs = (RAIL_RENEWAL_COST + POSS_NEW_RAIL*CAP_POSS_PER_HOUR) / (1 + DISCOUNT_RATE) ** y
+        renewal_costs = (RAIL_RENEWAL_COST + POSS_NEW_RAIL*CAP_POSS_PER_HOUR) * discount
         return True, renewal_costs
     return False, 0
 
@@ -141,17 +149,38 @@ def get_annuity_refactored(
     track_results=False,
     gauge_widening_per_year=SELECTED_GAUGE_WIDENING,
     radius=SELECTED_RADIUS,
+    track_emissions=False,
+    lca_model=None,
+    discount_factors=None,
+    co2_prices=None,
+    collect_stats=False,
 ):
     """
     Calculate the annuity (LCC per year) and track lifetime for a single rail.
+
+    With track_emissions=True, the maintenance events are also recorded in an emissions
+    ledger during the same pass (see rail_analysis.emissions) and returned as a fourth
+    element: a list of dicts with keys 'Month', 'Year', 'Event', 'Rail', 'CO2e_kg' and 'CO2_cost'.
+    lca_model optionally overrides the LCA model providing the event factors and CO2e prices.
+
+    discount_factors (per simulation month, index 0 = month 0) and co2_prices (per
+    simulation year) optionally replace the constant DISCOUNT_RATE and the CO2e valuation
+    curve, see rail_analysis.discounting.
+
+    With collect_stats=True (or a SimulationStats to accumulate into), the counts of table
+    lookups and interpolator builds and the time of each phase are collected and returned as
+    the last element, see rail_analysis.profiling.
     """
-    data_df_radius = data_df[data_df['Radius'] == radius]
+    stats = simulation_stats(collect_stats)
 
     # --- LOAD TABLES ---
-    H_table = get_table(data_df_radius, 'h-index', profile=SELECTED_PROFILE, rail=high_or_low_rail, radius=radius)
-    NW_table = get_table(data_df_radius, 'wear', profile=SELECTED_PROFILE, rail=high_or_low_rail, radius=radius)
-    RCF_residual_table = get_table(data_df_radius, 'rcf-residual', profile=SELECTED_PROFILE, rail=high_or_low_rail, radius=radius)
-    RCF_depth_table = get_table(data_df_radius, 'rcf-depth', profile=SELECTED_PROFILE, rail=high_or_low_rail, radius=radius)
+    with stats.phase('tables'):
+        data_df_radius = data_df[data_df['Radius'] == radius]
+        H_table = get_table(data_df_radius, 'h-index', profile=SELECTED_PROFILE, rail=high_or_low_rail, radius=radius)
+        NW_table = get_table(data_df_radius, 'wear', profile=SELECTED_PROFILE, rail=high_or_low_rail, radius=radius)
+        RCF_residual_table = get_table(data_df_radius, 'rcf-residual', profile=SELECTED_PROFILE, rail=high_or_low_rail, radius=radius)
+        RCF_depth_table = get_table(data_df_radius, 'rcf-depth', profile=SELECTED_PROFILE, rail=high_or_low_rail, radius=radius)
+        stats.count('table_loads', 4)
 
     gauge_levels = H_table['Gauge'].unique()
     gauge_levels.sort()
@@ -173,90 +202,116 @@ def get_annuity_refactored(
     rail_lifetime = TECH_LIFE_YEARS
 
     historical_data = [] if track_results else None
+    discount_factors = check_discount_factors(discount_factors, MAX_MONTHS)
+    ledger = EmissionsLedger(lca_model, co2_prices=co2_prices, discount_factors=discount_factors) if track_emissions else None
 
     for m in range(1, MAX_MONTHS + 1):
         y = m / 12
+        discount = discount_factors[m]
         gauge_curr += gauge_widening_per_year / 12
+        stats.count('months')
 
         # Grinding
-        grinding_cost, cap_cost, H_curr, RCF_res_grinding, RCF_residual_curr, latest_grinding_since = calculate_grinding_costs_rail(
-            grinding_freq, latest_grinding_since, gauge_curr, H_curr, RCF_res_grinding,
-            H_table, NW_table, RCF_residual_table, RCF_depth_table, y, gauge_levels
-        )
-        accumulated_maintenance_costs += grinding_cost
-        accumulated_cap_costs += cap_cost
+        with stats.phase('grinding'):
+            grinding_cost, cap_cost, H_curr, RCF_res_grinding, RCF_residual_curr, latest_grinding_since = calculate_grinding_costs_rail(
+                grinding_freq, latest_grinding_since, gauge_curr, H_curr, RCF_res_grinding,
+                H_table, NW_table, RCF_residual_table, RCF_depth_table, discount, gauge_levels, stats
+            )
+            accumulated_maintenance_costs += grinding_cost
+            accumulated_cap_costs += cap_cost
+            if ledger is not None and grinding_cost > 0:
+                ledger.record(m, 'grinding', high_or_low_rail)
 
         # Tamping
-        tamping_cost, cap_cost, gauge_curr, latest_tamping_since = calculate_tamping_costs_rail(
-            tamping_freq, latest_tamping_since, gauge_curr, y
-        )
-        accumulated_maintenance_costs += tamping_cost
-        accumulated_cap_costs += cap_cost
+        with stats.phase('tamping'):
+            tamping_cost, cap_cost, gauge_curr, latest_tamping_since = calculate_tamping_costs_rail(
+                tamping_freq, latest_tamping_since, gauge_curr, discount
+            )
+            accumulated_maintenance_costs += tamping_cost
+            accumulated_cap_costs += cap_cost
+            if ledger is not None and tamping_cost > 0:
+                ledger.record(m, 'tamping', 'Track')
 
         # Double grinding if RCF exceeds max
-        grinding_cost, cap_cost, delta_H, RCF_res_grinding, RCF_residual_curr, latest_grinding_since = handle_double_grinding_rail(
-            RCF_residual_curr, latest_grinding_since, gauge_curr, H_table, y, RCF_res_grinding, gauge_levels
-        )
-        accumulated_maintenance_costs += grinding_cost
-        accumulated_cap_costs += cap_cost
-        H_curr += delta_H
+        with stats.phase('milling'):
+            grinding_cost, cap_cost, delta_H, RCF_res_grinding, RCF_residual_curr, latest_grinding_since = handle_double_grinding_rail(
+                RCF_residual_curr, latest_grinding_since, gauge_curr, H_table, discount, RCF_res_grinding, gauge_levels, stats
+            )
+            accumulated_maintenance_costs += grinding_cost
+            accumulated_cap_costs += cap_cost
+            H_curr += delta_H
+            if ledger is not None and grinding_cost > 0:
+                ledger.record(m, 'milling', high_or_low_rail)
 
         # Rail renewal if H-index exceeds max
-        renewal_needed, renewal_costs = handle_rail_renewal_rail(H_curr, y)
+        with stats.phase('renewal'):
+            renewal_needed, renewal_costs = handle_rail_renewal_rail(H_curr, discount)
+            if renewal_needed:
+                rail_lifetime = y
+                accumulated_renewal_costs += renewal_costs 
+                if ledger is not None:
+                    ledger.record(m, 'rail_renewal', high_or_low_rail)
         if renewal_needed:
-            rail_lifetime = y
-            accumulated_renewal_costs += renewal_costs 
             break
 
         if track_results:
-            historical_data.append({
-                'Month': m,
-                'H_curr': H_curr,
-                'RCF_residual_curr': RCF_residual_curr,
-                'Gauge_curr': gauge_curr
-            })
+            with stats.phase('history'):
+                historical_data.append({
+                    'Month': m,
+                    'H_curr': H_curr,
+                    'RCF_residual_curr': RCF_residual_curr,
+                    'Gauge_curr': gauge_curr
+                })
 
     annuity = (accumulated_cap_costs + accumulated_maintenance_costs + accumulated_renewal_costs) / TRACK_LENGTH_M / rail_lifetime
 
-    if track_results:
-        return annuity, rail_lifetime, historical_data
-    return annuity, rail_lifetime, None
+    if track_emissions:
+        result = (annuity, rail_lifetime, historical_data, ledger.events)
+    elif track_results:
+        result = (annuity, rail_lifetime, historical_data)
+    else:
+        result = (annuity, rail_lifetime, None)
+    if stats.enabled:
+        return result + (stats,)
+    return result
 
 
 # === PLOTTING FUNCTIONS ===
 
-def plot_annuity_and_lifetime_with_tamping(tamping_frequency, data_df, high_or_low_rail='High'):
+def plot_annuity_and_lifetime_with_tamping(tamping_frequency, data_df, high_or_low_rail='High', workers=1, cache=None):
     """
     Plots the variation of annuity and track lifetime with grinding frequency for a given tamping frequency.
 
     Parameters:
     - tamping_frequency: Tamping frequency (in months).
     - data_df: DataFrame containing the input data.
+    - workers: Number of worker processes for the grinding frequencies (rail_analysis.sweep.run_sweep).
+    - cache: Optional ResultCache (rail_analysis.result_cache) for the evaluated strategies.
     """
+    from rail_analysis.sweep import run_sweep, scenario_grid, single_rail_task
 
 
     # Define grinding frequencies
     grinding_frequencies = list(range(1, 13))
 
-    # Initialize lists to store results
-    annuity_values = []
-    lifetime_values = []
-    lcc_values = []
-
     # Calculate annuity and lifetime for each grinding frequency
-    for grinding_freq in grinding_frequencies:
-        maint_strategy = (grinding_freq, tamping_frequency)
-        annuity, rail_lifetime, _ = get_annuity_refactored(
-            data_df,
-            maint_strategy,
-            high_or_low_rail=high_or_low_rail,
-            track_results=False,
-            gauge_widening_per_year=SELECTED_GAUGE_WIDENING,
-            radius=SELECTED_RADIUS,
-        )
-        annuity_values.append(annuity)
-        lifetime_values.append(rail_lifetime)
-        lcc_values.append(annuity * TECH_LIFE_YEARS)  # Total LCC in SEK/m
+    results = run_sweep(
+        single_rail_task,
+        scenario_grid(grinding_freq=grinding_frequencies),
+        common={
+            'data_df': data_df,
+            'gauge_freq': tamping_frequency,
+            'high_or_low_rail': high_or_low_rail,
+            'track_results': False,
+            'gauge_widening_per_year': SELECTED_GAUGE_WIDENING,
+            'radius': SELECTED_RADIUS,
+        },
+        workers=workers,
+        cache=cache,
+    )
+    annuity_values = results['Annuity'].tolist()
+    lifetime_values = results['Lifetime'].tolist()
+    lcc_values = [annuity * TECH_LIFE_YEARS for annuity in annuity_values]  # Total LCC in SEK/m
 
     # set the size of the figure
     fig_size = (12, 6)
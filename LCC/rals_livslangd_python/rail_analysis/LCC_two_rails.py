@@ -1,5 +1,8 @@
 from scipy.interpolate import PchipInterpolator  # type: ignore
 from rail_analysis.rail_measures import get_table
+from rail_analysis.emissions import EmissionsLedger
+from rail_analysis.discounting import check_discount_factors
+from rail_analysis.profiling import NULL_STATS, simulation_stats
 
 from rail_analysis.constants import (
     H_MAX,
@@ -10,9 +13,7 @@ from rail_analysis.constants import (
     POSS_TAMPING,
     POSS_GRINDING,
     POSS_GRINDING_TWICE,
-    TRACK_RENEWAL_COST,
     CAP_POSS_PER_HOUR,
-    DISCOUNT_RATE,
     TRACK_LENGTH_M,
     SELECTED_PROFILE,
     SELECTED_GAUGE_WIDENING,
@@ -24,7 +25,7 @@ import matplotlib.pyplot as plt
 
 # === HELPER FUNCTIONS ===
 
-def calculate_grinding_costs(freq, since, gauge, H_curr, rcf_r, Ht, NW, RRes, RDep, gauge_levels, t):
+def calculate_grinding_costs(freq, since, gauge, H_curr, rcf_r, Ht, NW, RRes, RDep, gauge_levels, discount, stats=NULL_STATS):
     """
     Calculate grinding costs and update H-index and RCF values for a rail.
     """
@@ -32,8 +33,8 @@ def calculate_grinding_costs(freq, since, gauge, H_curr, rcf_r, Ht, NW, RRes, RD
 
     if since == freq: # when grinding is scheduled
         # Add grinding cost including capacity cost
-        grinding_cost = (GRINDING_COST_PER_M * TRACK_LENGTH_M) / (1 + DISCOUNT_RATE) ** t
-        capacity_cost = (POSS_GRINDING * CAP_POSS_PER_HOUR) / (1 + DISCOUNT_RATE) ** t
+        grinding_cost = (GRINDING_COST_PER_M * TRACK_LENGTH_M) * discount
+        capacity_cost = (POSS_GRINDING * CAP_POSS_PER_HOUR) * discount
 
         # Update H-index using H-index table (minus natural wear)
         ΔH_g = PchipInterpolator(gauge_levels, Ht[Ht['Month'] == freq]['Value'])(gauge)
@@ -43,6 +44,8 @@ def calculate_grinding_costs(freq, since, gauge, H_curr, rcf_r, Ht, NW, RRes, RD
         rcf_r += PchipInterpolator(gauge_levels, RRes[RRes['Month'] == freq]['Value'])(gauge)
         RCF_curr = rcf_r
         since = 0
+        stats.count('table_lookups', 3)
+        stats.count('interpolator_builds', 3)
     else:
         # Update H-index using natural wear
         H_curr += ΔN
@@ -50,19 +53,21 @@ def calculate_grinding_costs(freq, since, gauge, H_curr, rcf_r, Ht, NW, RRes, RD
         # Update RCF using RCF-depth
         ΔR = PchipInterpolator(gauge_levels, RDep[RDep['Month'] == since]['Value'])(gauge)
         RCF_curr = rcf_r + ΔR
+        stats.count('table_lookups', 2)
+        stats.count('interpolator_builds', 2)
 
         grinding_cost = capacity_cost = 0
 
     return grinding_cost, capacity_cost, H_curr, rcf_r, RCF_curr, since + 1
 
 
-def calculate_tamping_costs(since_tamp, gauge_freq, gauge, t):
+def calculate_tamping_costs(since_tamp, gauge_freq, gauge, discount):
     """
     Calculate tamping costs and reset gauge if needed.
     """
     if since_tamp == gauge_freq:
-        tamping_cost = (TAMPING_COST_PER_M * TRACK_LENGTH_M) / (1 + DISCOUNT_RATE) ** t
-        capacity_cost = (POSS_TAMPING * CAP_POSS_PER_HOUR) / (1 + DISCOUNT_RATE) ** t
+        tamping_cost = (TAMPING_COST_PER_M * TRACK_LENGTH_M) * discount
+        capacity_cost = (POSS_TAMPING * CAP_POSS_PER_HOUR) * discount
         gauge = 1440
         since_tamp = 0
     else:
@@ -71,19 +76,21 @@ def calculate_tamping_costs(since_tamp, gauge_freq, gauge, t):
     return tamping_cost, capacity_cost, gauge, since_tamp + 1
 
 
-def handle_double_grinding(since_attr, gauge, H_curr, RCF_curr, rcf_r, gauge_levels, t, Ht_H):
+def handle_double_grinding(since_attr, gauge, H_curr, RCF_curr, rcf_r, gauge_levels, discount, Ht_H, stats=NULL_STATS):
     """
     Handle double grinding if RCF exceeds the maximum threshold.
     """
     if RCF_curr >= RCF_MAX:
         # Add milling costs (less than double grinding costs)
-        milling_cost = (5 / 3 * GRINDING_COST_PER_M * TRACK_LENGTH_M) / (1 + DISCOUNT_RATE) ** t
-        capacity_cost = (POSS_GRINDING_TWICE * CAP_POSS_PER_HOUR) / (1 + DISCOUNT_RATE) ** t
+        milling_cost = (5 / 3 * GRINDING_COST_PER_M * TRACK_LENGTH_M) * discount
+        capacity_cost = (POSS_GRINDING_TWICE * CAP_POSS_PER_HOUR) * discount
 
         # Update H-index using H-index table (twice)
         ΔH1 = PchipInterpolator(gauge_levels, Ht_H[Ht_H['Month'] == since_attr + 1]['Value'])(gauge)
         ΔH2 = PchipInterpolator(gauge_levels, Ht_H[Ht_H['Month'] == 1]['Value'])(gauge)
         H_curr += ΔH1 + ΔH2
+        stats.count('table_lookups', 2)
+        stats.count('interpolator_builds', 2)
 
         # Reset RCF to zero and months since grinding
         RCF_curr = 0
@@ -95,12 +102,12 @@ def handle_double_grinding(since_attr, gauge, H_curr, RCF_curr, rcf_r, gauge_lev
     return milling_cost, capacity_cost, H_curr, RCF_curr, rcf_r, since_attr
 
 
-def handle_rail_renewal(H_curr, RCF_curr, t):
+def handle_rail_renewal(H_curr, RCF_curr, discount):
     """
     Handle rail renewal if the H-index exceeds the maximum threshold.
     """
     if H_curr > H_MAX:
-        renewal_cost = RAIL_RENEWAL_COST / (1 + DISCOUNT_RATE) ** t
+        renewal_cost = RAIL_RENEWAL_COST * discount
         H_curr, RCF_curr = 0, 0
     else:
         renewal_cost = 0
@@ -122,22 +129,46 @@ def get_annuity_track_refactored(
     radius=SELECTED_RADIUS, 
     track_life=TECH_LIFE_YEARS, 
     plot_timeline=False,
-    verbose=False
+    verbose=False,
+    track_emissions=False,
+    lca_model=None,
+    discount_factors=None,
+    co2_prices=None,
+    collect_stats=False
 ):
     """
     Refactored version of get_annuity_track using helper functions.
+
+    With track_emissions=True, the maintenance events of the optimal renewal option are
+    also recorded in an emissions ledger during the same pass (see rail_analysis.emissions)
+    and returned as a fourth element: a list of dicts with keys 'Month', 'Year', 'Event',
+    'Rail', 'CO2e_kg' and 'CO2_cost'. lca_model optionally overrides the LCA model
+    providing the event factors and CO2e prices.
+
+    discount_factors optionally gives the discount factor of each simulation month
+    (index 0 = month 0, e.g. from rail_analysis.discounting.declining_discount_factors),
+    replacing the constant DISCOUNT_RATE; co2_prices optionally gives the CO2e price
+    (SEK/kg) of each simulation year for the emissions ledger. Both are best computed
+    once per scenario and reused across strategies.
+
+    With collect_stats=True (or a SimulationStats to accumulate into), the counts of table
+    lookups, interpolator builds and renewal options and the time of each phase are collected
+    and returned as the last element, see rail_analysis.profiling.
     """
-    data_df_radius = data_df[data_df['Radius'] == radius]
+    stats = simulation_stats(collect_stats)
 
     # --- LOAD TABLES ---
-    Ht_H = get_table(data_df_radius, 'h-index', profile=profile_high_rail, rail='High', radius=radius)
-    Ht_L = get_table(data_df_radius, 'h-index', profile=profile_low_rail, rail='Inner', radius=radius)
-    NW_H = get_table(data_df_radius, 'wear', profile=profile_high_rail, rail='High', radius=radius)
-    NW_L = get_table(data_df_radius, 'wear', profile=profile_low_rail, rail='Inner', radius=radius)
-    RCF_RES_H = get_table(data_df_radius, 'rcf-residual', profile=profile_high_rail, rail='High', radius=radius)
-    RCF_RES_L = get_table(data_df_radius, 'rcf-residual', profile=profile_low_rail, rail='Inner', radius=radius)
-    RCF_DEP_H = get_table(data_df_radius, 'rcf-depth', profile=profile_high_rail, rail='High', radius=radius)
-    RCF_DEP_L = get_table(data_df_radius, 'rcf-depth', profile=profile_low_rail, rail='Inner', radius=radius)
+    with stats.phase('tables'):
+        data_df_radius = data_df[data_df['Radius'] == radius]
+        Ht_H = get_table(data_df_radius, 'h-index', profile=profile_high_rail, rail='High', radius=radius)
+        Ht_L = get_table(data_df_radius, 'h-index', profile=profile_low_rail, rail='Inner', radius=radius)
+        NW_H = get_table(data_df_radius, 'wear', profile=profile_high_rail, rail='High', radius=radius)
+        NW_L = get_table(data_df_radius, 'wear', profile=profile_low_rail, rail='Inner', radius=radius)
+        RCF_RES_H = get_table(data_df_radius, 'rcf-residual', profile=profile_high_rail, rail='High', radius=radius)
+        RCF_RES_L = get_table(data_df_radius, 'rcf-residual', profile=profile_low_rail, rail='Inner', radius=radius)
+        RCF_DEP_H = get_table(data_df_radius, 'rcf-depth', profile=profile_high_rail, rail='High', radius=radius)
+        RCF_DEP_L = get_table(data_df_radius, 'rcf-depth', profile=profile_low_rail, rail='Inner', radius=radius)
+        stats.count('table_loads', 8)
 
     gauge_levels = Ht_H['Gauge'].unique()
     gauge_levels.sort()
@@ -164,170 +195,190 @@ def get_annuity_track_refactored(
     since_tamp = 1
 
     history = [] if track_results else None
+    MAX_MONTHS = 12 * track_life
+    discount_factors = check_discount_factors(discount_factors, MAX_MONTHS)
+
+    ledger = EmissionsLedger(lca_model, co2_prices=co2_prices, discount_factors=discount_factors) if track_emissions else None
     renewal_options = []
 
-    MAX_MONTHS = 12 * track_life
     for m in range(1, MAX_MONTHS + 1):
         t = m / 12
+        discount = discount_factors[m]
         gauge += gauge_widening_per_year / 12
+        stats.count('months')
+
+        with stats.phase('grinding'):
+            # Track if both rails are ground in the same month to share capacity cost
+            grinding_month_H = grinding_month_L = False
+            grinding_costs = {'H': 0, 'L': 0}
+            capacity_costs = {'H': 0, 'L': 0}
+            states = {}
+
+
+            # Grinding for each rail (costs separated)
+            for rail in ('H', 'L'):
+                freq = grinding_freq_high if rail == 'H' else grinding_freq_low
+                since = since_grind_H if rail == 'H' else since_grind_L
+                H_curr = H_H if rail == 'H' else H_L
+                RCF_curr = R_H if rail == 'H' else R_L
+                rcf_r = R_r_H if rail == 'H' else R_r_L
+                Ht = Ht_H if rail == 'H' else Ht_L
+                NW = NW_H if rail == 'H' else NW_L
+                RRes = RCF_RES_H if rail == 'H' else RCF_RES_L
+                RDep = RCF_DEP_H if rail == 'H' else RCF_DEP_L
+
+                grinding_cost, capacity_cost, H_curr, rcf_r, RCF_curr, since = calculate_grinding_costs(
+                freq, since, gauge, H_curr, rcf_r, Ht, NW, RRes, RDep, gauge_levels, discount, stats
+                )
+
+                grinding_costs[rail] = grinding_cost
+                capacity_costs[rail] = capacity_cost
+                states[rail] = (H_curr, RCF_curr, rcf_r, since)
+                if ledger is not None and grinding_cost > 0:
+                    ledger.record(m, 'grinding', rail)
+
+                if grinding_cost > 0:
+                    if rail == 'H':
+                        grinding_month_H = True
+                    else:
+                        grinding_month_L = True
+
+            # If both rails are ground in the same month, share the capacity cost
+            if grinding_month_H and grinding_month_L:
+                shared_capacity_cost = capacity_costs['H']  # Both are equal
+                capacity_costs['H'] = shared_capacity_cost / 2
+                capacity_costs['L'] = shared_capacity_cost / 2
+
+            # Assign costs and states back
+            PV_maint_H += grinding_costs['H']
+            PV_cap_H += capacity_costs['H']
+            since_grind_H = states['H'][3]
+            H_H, R_H, R_r_H = states['H'][0], states['H'][1], states['H'][2]
+
+            PV_maint_L += grinding_costs['L']
+            PV_cap_L += capacity_costs['L']
+            since_grind_L = states['L'][3]
+            H_L, R_L, R_r_L = states['L'][0], states['L'][1], states['L'][2]
+
+        # Tamping (shared)
+        with stats.phase('tamping'):
+            tamping_cost, capacity_cost, gauge, since_tamp = calculate_tamping_costs(since_tamp, gauge_freq, gauge, discount)
+            PV_tamping += tamping_cost
+            PV_cap_tamping += capacity_cost
+            if ledger is not None and tamping_cost > 0:
+                ledger.record(m, 'tamping', 'Track')
+
+        # Double grinding (costs separated)
+        with stats.phase('milling'):
+            for rail, since_attr in (('H', 'since_grind_H'), ('L', 'since_grind_L')):
+                RCF_curr = R_H if rail == 'H' else R_L
+                H_curr = H_H if rail == 'H' else H_L
+                rcf_r = R_r_H if rail == 'H' else R_r_L
+            
+                since = locals()[since_attr]
+
+                milling_cost, capacity_cost, H_curr, RCF_curr, rcf_r, since = handle_double_grinding(
+                    since, gauge, H_curr, RCF_curr, rcf_r, gauge_levels, discount, Ht_H if rail == 'H' else Ht_L, stats
+                )
+                if ledger is not None and milling_cost > 0:
+                    ledger.record(m, 'milling', rail)
 
-        # Track if both rails are ground in the same month to share capacity cost
-        grinding_month_H = grinding_month_L = False
-        grinding_costs = {'H': 0, 'L': 0}
-        capacity_costs = {'H': 0, 'L': 0}
-        states = {}
-
-
-        # Grinding for each rail (costs separated)
-        for rail in ('H', 'L'):
-            freq = grinding_freq_high if rail == 'H' else grinding_freq_low
-            since = since_grind_H if rail == 'H' else since_grind_L
-            H_curr = H_H if rail == 'H' else H_L
-            RCF_curr = R_H if rail == 'H' else R_L
-            rcf_r = R_r_H if rail == 'H' else R_r_L
-            Ht = Ht_H if rail == 'H' else Ht_L
-            NW = NW_H if rail == 'H' else NW_L
-            RRes = RCF_RES_H if rail == 'H' else RCF_RES_L
-            RDep = RCF_DEP_H if rail == 'H' else RCF_DEP_L
-
-            grinding_cost, capacity_cost, H_curr, rcf_r, RCF_curr, since = calculate_grinding_costs(
-            freq, since, gauge, H_curr, rcf_r, Ht, NW, RRes, RDep, gauge_levels, t
-            )
-
-            grinding_costs[rail] = grinding_cost
-            capacity_costs[rail] = capacity_cost
-            states[rail] = (H_curr, RCF_curr, rcf_r, since)
-
-            if grinding_cost > 0:
                 if rail == 'H':
-                    grinding_month_H = True
+                    PV_maint_H += milling_cost
+                    PV_cap_H += capacity_cost
+                    H_H, R_H, R_r_H = H_curr, RCF_curr, rcf_r
+                    since_grind_H = since
                 else:
-                    grinding_month_L = True
+                    PV_maint_L += milling_cost
+                    PV_cap_L += capacity_cost
+                    H_L, R_L, R_r_L = H_curr, RCF_curr, rcf_r
+                    since_grind_L = since
 
-        # If both rails are ground in the same month, share the capacity cost
-        if grinding_month_H and grinding_month_L:
-            shared_capacity_cost = capacity_costs['H']  # Both are equal
-            capacity_costs['H'] = shared_capacity_cost / 2
-            capacity_costs['L'] = shared_capacity_cost / 2
+        # Rail renewal (costs separated)
+        with stats.phase('renewal'):
+            for H_curr, RCF_curr, name in ((H_H, R_H, 'H'), (H_L, R_L, 'L')):
+                if H_curr > H_MAX:
+                    material_cost = RAIL_RENEWAL_COST * discount
+                    cap_renewal_cost = (CAP_POSS_PER_HOUR * POSS_NEW_RAIL) * discount
 
-        # Assign costs and states back
-        PV_maint_H += grinding_costs['H']
-        PV_cap_H += capacity_costs['H']
-        since_grind_H = states['H'][3]
-        H_H, R_H, R_r_H = states['H'][0], states['H'][1], states['H'][2]
+                    lcc_H = PV_renew_H + PV_maint_H + PV_cap_H + material_cost
+                    lcc_L = PV_renew_L + PV_maint_L + PV_cap_L + material_cost 
+                    lcc_shared = PV_tamping + PV_cap_tamping + cap_renewal_cost
 
-        PV_maint_L += grinding_costs['L']
-        PV_cap_L += capacity_costs['L']
-        since_grind_L = states['L'][3]
-        H_L, R_L, R_r_L = states['L'][0], states['L'][1], states['L'][2]
+                    lifetime_H = t if name == 'H' else lifetime_H
+                    lifetime_L = t if name == 'L' else lifetime_L
 
-        # Tamping (shared)
-        tamping_cost, capacity_cost, gauge, since_tamp = calculate_tamping_costs(since_tamp, gauge_freq, gauge, t)
-        PV_tamping += tamping_cost
-        PV_cap_tamping += capacity_cost
+                    # Breakdown by category:
+                    renewal_direct   = PV_renew_H + PV_renew_L + 2*material_cost
+                    renewal_capacity = cap_renewal_cost
 
-        # Double grinding (costs separated)
-        for rail, since_attr in (('H', 'since_grind_H'), ('L', 'since_grind_L')):
-            RCF_curr = R_H if rail == 'H' else R_L
-            H_curr = H_H if rail == 'H' else H_L
-            rcf_r = R_r_H if rail == 'H' else R_r_L
-            
-            since = locals()[since_attr]
-
-            milling_cost, capacity_cost, H_curr, RCF_curr, rcf_r, since = handle_double_grinding(
-                since, gauge, H_curr, RCF_curr, rcf_r, gauge_levels, t, Ht_H if rail == 'H' else Ht_L
-            )
-
-            if rail == 'H':
-                PV_maint_H += milling_cost
-                PV_cap_H += capacity_cost
-                H_H, R_H, R_r_H = H_curr, RCF_curr, rcf_r
-                since_grind_H = since
-            else:
-                PV_maint_L += milling_cost
-                PV_cap_L += capacity_cost
-                H_L, R_L, R_r_L = H_curr, RCF_curr, rcf_r
-                since_grind_L = since
+                    grinding_direct   = PV_maint_H + PV_maint_L
+                    grinding_capacity = PV_cap_H + PV_cap_L
 
-        # Rail renewal (costs separated)
-        for H_curr, RCF_curr, name in ((H_H, R_H, 'H'), (H_L, R_L, 'L')):
-            if H_curr > H_MAX:
-                material_cost = RAIL_RENEWAL_COST / (1 + DISCOUNT_RATE) ** t
-                cap_renewal_cost = (CAP_POSS_PER_HOUR * POSS_NEW_RAIL) / (1 + DISCOUNT_RATE) ** t
-
-                lcc_H = PV_renew_H + PV_maint_H + PV_cap_H + material_cost
-                lcc_L = PV_renew_L + PV_maint_L + PV_cap_L + material_cost 
-                lcc_shared = PV_tamping + PV_cap_tamping + cap_renewal_cost
-
-                lifetime_H = t if name == 'H' else lifetime_H
-                lifetime_L = t if name == 'L' else lifetime_L
-
-                # Breakdown by category:
-                renewal_direct   = PV_renew_H + PV_renew_L + 2*material_cost
-                renewal_capacity = cap_renewal_cost
-
-                grinding_direct   = PV_maint_H + PV_maint_L
-                grinding_capacity = PV_cap_H + PV_cap_L
-
-                tamping_direct    = PV_tamping
-                tamping_capacity  = PV_cap_tamping
-
-                # Build a nested breakdown dictionary
-                breakdown = {
-                    "Renewal": {"Direct": renewal_direct, "Capacity": renewal_capacity},
-                    "Grinding": {"Direct": grinding_direct, "Capacity": grinding_capacity},
-                    "Tamping":  {"Direct": tamping_direct,  "Capacity": tamping_capacity}
-                }
-
-                # Append the option including the nested breakdown
-                renewal_options.append({
-                    "Option": "Renew both @" + name,
-                    "Rail": name,
-                    "Lifetime_H": lifetime_H if name == 'H' else t,
-                    "Lifetime_L": lifetime_L if name == 'L' else t,
-                    "Horizon": t,
-                    "LCC_H": lcc_H,
-                    "LCC_L": lcc_L,
-                    "LCC_shared": lcc_shared,
-                    "Breakdown": breakdown
-                })
+                    tamping_direct    = PV_tamping
+                    tamping_capacity  = PV_cap_tamping
 
-                # Also append a separate option for separate renewals if both rails have been renewed
-                if lifetime_L > 0 and lifetime_H > 0:
+                    # Build a nested breakdown dictionary
                     breakdown = {
-                        "Renewal": {"Direct": renewal_direct, "Capacity": 2*renewal_capacity},
+                        "Renewal": {"Direct": renewal_direct, "Capacity": renewal_capacity},
                         "Grinding": {"Direct": grinding_direct, "Capacity": grinding_capacity},
                         "Tamping":  {"Direct": tamping_direct,  "Capacity": tamping_capacity}
                     }
-                    # Append the option for renewing separately    
+
+                    # Append the option including the nested breakdown
                     renewal_options.append({
-                        "Option": "Renew separately",
+                        "Option": "Renew both @" + name,
                         "Rail": name,
-                        "Lifetime_H": lifetime_H,
-                        "Lifetime_L": lifetime_L,
+                        "Lifetime_H": lifetime_H if name == 'H' else t,
+                        "Lifetime_L": lifetime_L if name == 'L' else t,
                         "Horizon": t,
-                        "LCC_H": lcc_H + cap_renewal_cost,
-                        "LCC_L": lcc_L + cap_renewal_cost,
-                        "LCC_shared": lcc_shared - cap_renewal_cost,
-                        "Breakdown": breakdown
+                        "LCC_H": lcc_H,
+                        "LCC_L": lcc_L,
+                        "LCC_shared": lcc_shared,
+                        "Breakdown": breakdown,
+                        "Ledger": (len(ledger) if ledger is not None else 0, m, ('H', 'L'))
                     })
-                    break
 
-                # Option 2: Renew only the rail that reached the limit
-                if name == 'H':
-                    PV_renew_H += material_cost 
-                    PV_cap_H += cap_renewal_cost
-                    H_H, R_H, R_r_H = 0, 0, 0
-                else:
-                    PV_renew_L += material_cost
-                    PV_cap_L += cap_renewal_cost
-                    H_L, R_L, R_r_L = 0, 0, 0
+                    # Also append a separate option for separate renewals if both rails have been renewed
+                    if lifetime_L > 0 and lifetime_H > 0:
+                        breakdown = {
+                            "Renewal": {"Direct": renewal_direct, "Capacity": 2*renewal_capacity},
+                            "Grinding": {"Direct": grinding_direct, "Capacity": grinding_capacity},
+                            "Tamping":  {"Direct": tamping_direct,  "Capacity": tamping_capacity}
+                        }
+                        # Append the option for renewing separately    
+                        renewal_options.append({
+                            "Option": "Renew separately",
+                            "Rail": name,
+                            "Lifetime_H": lifetime_H,
+                            "Lifetime_L": lifetime_L,
+                            "Horizon": t,
+                            "LCC_H": lcc_H + cap_renewal_cost,
+                            "LCC_L": lcc_L + cap_renewal_cost,
+                            "LCC_shared": lcc_shared - cap_renewal_cost,
+                            "Breakdown": breakdown,
+                            "Ledger": (len(ledger) if ledger is not None else 0, m, (name,))
+                        })
+                        break
+
+                    # Option 2: Renew only the rail that reached the limit
+                    if name == 'H':
+                        PV_renew_H += material_cost 
+                        PV_cap_H += cap_renewal_cost
+                        H_H, R_H, R_r_H = 0, 0, 0
+                    else:
+                        PV_renew_L += material_cost
+                        PV_cap_L += cap_renewal_cost
+                        H_L, R_L, R_r_L = 0, 0, 0
+                    if ledger is not None:
+                        ledger.record(m, 'rail_renewal', name)
 
         if track_results:
-            history.append({
-                'Month': m, 'H_H': H_H, 'RCF_H': R_H,
-                'H_L': H_L, 'RCF_L': R_L, 'Gauge': gauge
-            })
+            with stats.phase('history'):
+                history.append({
+                    'Month': m, 'H_H': H_H, 'RCF_H': R_H,
+                    'H_L': H_L, 'RCF_L': R_L, 'Gauge': gauge
+                })
 
         # if both rails are renewed, we can stop the simulation
         if lifetime_H > 0 and lifetime_L > 0:
@@ -335,8 +386,8 @@ def get_annuity_track_refactored(
 
         # end of simulation with the end of the technical lifetime of the track
         if m == MAX_MONTHS:
-            material_cost = RAIL_RENEWAL_COST / (1 + DISCOUNT_RATE) ** t
-            cap_renewal_cost = (CAP_POSS_PER_HOUR * POSS_NEW_RAIL) / (1 + DISCOUNT_RATE) ** t
+            material_cost = RAIL_RENEWAL_COST * discount
+            cap_renewal_cost = (CAP_POSS_PER_HOUR * POSS_NEW_RAIL) * discount
 
             # Breakdown by category:
             renewal_direct   = PV_renew_H + PV_renew_L + 2*material_cost
@@ -363,7 +414,8 @@ def get_annuity_track_refactored(
                 "LCC_H": PV_maint_H + PV_cap_H + material_cost,
                 "LCC_L": PV_maint_L + PV_cap_L + material_cost,
                 "LCC_shared": PV_tamping + PV_cap_tamping + cap_renewal_cost,
-                "Breakdown": breakdown
+                "Breakdown": breakdown,
+                "Ledger": (len(ledger) if ledger is not None else 0, m, ('H', 'L'))
             })
             break
 
@@ -372,14 +424,16 @@ def get_annuity_track_refactored(
     # --- END OF SIMULATION ---
 
     # to renewal options, add one column for annuity
-    for option in renewal_options:
-        LCC_track_lifetime_H = (option["LCC_H"]/option["Horizon"])
-        LCC_track_lifetime_L = (option["LCC_L"]/option["Horizon"])
-        LCC_track_lifetime_shared =  option["LCC_shared"]/option["Horizon"]
-        option["Annuity"] = (LCC_track_lifetime_H + LCC_track_lifetime_L + LCC_track_lifetime_shared)/TRACK_LENGTH_M
-        option["LCC_track"] = option["Annuity"] * TECH_LIFE_YEARS
+    with stats.phase('renewal_options'):
+        for option in renewal_options:
+            LCC_track_lifetime_H = (option["LCC_H"]/option["Horizon"])
+            LCC_track_lifetime_L = (option["LCC_L"]/option["Horizon"])
+            LCC_track_lifetime_shared =  option["LCC_shared"]/option["Horizon"]
+            option["Annuity"] = (LCC_track_lifetime_H + LCC_track_lifetime_L + LCC_track_lifetime_shared)/TRACK_LENGTH_M
+            option["LCC_track"] = option["Annuity"] * TECH_LIFE_YEARS
 
 
+    stats.count('renewal_options', len(renewal_options))
     optimal_option = min(renewal_options, key=lambda x: x["Annuity"])
     annuity = optimal_option["Annuity"]
     lifetime = optimal_option["Horizon"]
@@ -390,10 +444,20 @@ def get_annuity_track_refactored(
     if plot_timeline:
         plot_renewal_options(renewal_options)
 
-    if track_results:
-        return annuity, lifetime, history
+    if track_emissions:
+        # keep the events up to the optimal option and close it with its rail renewals
+        n_events, month, renewed_rails = optimal_option["Ledger"]
+        ledger.truncate(n_events)
+        for rail in renewed_rails:
+            ledger.record(month, 'rail_renewal', rail)
+        result = (annuity, lifetime, history, ledger.events)
+    elif track_results:
+        result = (annuity, lifetime, history)
     else:
-        return annuity, lifetime, None
+        result = (annuity, lifetime, None)
+    if stats.enabled:
+        return result + (stats,)
+    return result
 
 
 # === PLOTTING FUNCTIONS ===
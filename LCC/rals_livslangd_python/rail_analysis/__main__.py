@@ -0,0 +1,133 @@
+# rail_analysis/__main__.py
+"""
+Command-line entry point, run from the rals_livslangd_python folder:
+
+    python -m rail_analysis run scenarios.yaml [--workers N] [--output DIR] [--format parquet|feather|csv]
+    python -m rail_analysis bench [--only NAME ...] [--datasets NAME ...] [--scale N] [--threshold 0.2]
+    python -m rail_analysis diff [--strategies N] [--seed S] [--families NAME ...] [--rtol 1e-6]
+    python -m rail_analysis synth --output DIR [--curves N] [--profiles N] [--radii R ...] [--seed S]
+    python -m rail_analysis network [--curves CSV] [--tables CSV[:RADIUS] ...] [--by COLUMN ...] [--output CSV]
+    python -m rail_analysis calendar [--years N] [--by COLUMN ...] [--output FILE] [--format parquet|feather|csv]
+    python -m rail_analysis atlas [--radius-step 25] [--widenings MM ...] [--rates RATE ...] [--output NPZ]
+
+See rail_analysis.scenario_runner for the scenario file format, rail_analysis.benchmarks for
+the benchmark suite, rail_analysis.differential for the engine comparison,
+rail_analysis.synthetic for the synthetic inputs, rail_analysis.network for the network evaluation,
+rail_analysis.calendars for the yearly network calendar and rail_analysis.atlas for the policy atlas.
+"""
+
+import argparse
+import sys
+
+from rail_analysis.scenario_runner import OUTPUT_FORMATS, run_scenario_file
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m rail_analysis', description='Rail LCC analysis')
+    commands = parser.add_subparsers(dest='command', required=True)
+    run = commands.add_parser('run', help='Run the studies of a scenario file')
+    run.add_argument('scenario_file', help='Scenario file (YAML)')
+    run.add_argument('--workers', type=int, default=None, help='Number of worker processes (default: from the file, else all cores)')
+    run.add_argument('--output', default=None, help='Output folder (default: from the file)')
+    run.add_argument('--format', choices=OUTPUT_FORMATS, default=None, help='Output format (default: from the file)')
+    bench = commands.add_parser('bench', help='Run the benchmark suite and compare it with the previous runs')
+    bench.add_argument('--only', nargs='+', default=None, help='Benchmarks to run (default: all)')
+    bench.add_argument('--datasets', nargs='+', default=None, help='Datasets: R1465, R495, synthetic (default: all)')
+    bench.add_argument('--scale', type=int, default=20, help='Copies of the R1465 tables in the synthetic dataset')
+    bench.add_argument('--repeat', type=int, default=None, help='Timed runs per benchmark (default: per benchmark)')
+    bench.add_argument('--threshold', type=float, default=0.2, help='Relative slowdown flagged as a regression')
+    bench.add_argument('--history', default=None, help='Benchmark history file (default: data/processed/benchmarks.jsonl)')
+    bench.add_argument('--no-save', action='store_true', help='Do not add this run to the history')
+    diff = commands.add_parser('diff', help='Compare the archived, current and batched engines on random strategies')
+    diff.add_argument('--strategies', type=int, default=10, help='Strategies per family and dataset')
+    diff.add_argument('--datasets', nargs='+', default=None, help='Datasets: R1465, R495, synthetic (default: all)')
+    diff.add_argument('--families', nargs='+', default=None, help='Engine families: rail, track, track_v0 (default: all)')
+    diff.add_argument('--seed', type=int, default=0, help='Seed of the random strategies')
+    diff.add_argument('--rtol', type=float, default=1e-6, help='Relative tolerance on the annuity')
+    diff.add_argument('--details', default=None, help='CSV file for the per-strategy comparison')
+    synth = commands.add_parser('synth', help='Write synthetic degradation tables and a curve inventory')
+    synth.add_argument('--output', required=True, help='Output folder')
+    synth.add_argument('--curves', type=int, default=100000, help='Number of curves of the inventory')
+    synth.add_argument('--profiles', type=int, default=4, help='Number of profiles of the tables')
+    synth.add_argument('--radii', nargs='+', default=None, help="Radii of the tables (m, or 'Tangent')")
+    synth.add_argument('--loads', nargs='+', type=float, default=None, help='Axle loads of the tables (t)')
+    synth.add_argument('--seed', type=int, default=0, help='Seed of the generator')
+    network = commands.add_parser('network', help='Evaluate the LCC of every curve of the curve inventory')
+    network.add_argument('--curves', default=None, help='Curve inventory CSV (default: matched_curves_within_tracks.csv)')
+    network.add_argument('--tables', nargs='+', default=None,
+                         help='Degradation table files, file:radius to override the radius (default: CM2025 R1465 and R495)')
+    network.add_argument('--profile', default='MB4', help='Rail profile of both rails')
+    network.add_argument('--load', type=float, default=32.5, help='Axle load (t)')
+    network.add_argument('--grinding-freqs', nargs='+', type=int, default=list(range(1, 13)), help='Grinding intervals (months)')
+    network.add_argument('--gauge-freqs', nargs='+', type=int, default=[48], help='Tamping intervals (months)')
+    network.add_argument('--by', nargs='+', default=None, help='Inventory columns to total by, e.g. Track_Bdl')
+    network.add_argument('--workers', type=int, default=1, help='Number of worker processes')
+    network.add_argument('--output', default=None, help='CSV file for the per-curve results')
+    calendar = commands.add_parser('calendar', help='Write the yearly cost, hours and renewals per line and activity')
+    calendar.add_argument('--curves', default=None, help='Curve inventory CSV (default: matched_curves_within_tracks.csv)')
+    calendar.add_argument('--tables', nargs='+', default=None,
+                          help='Degradation table files, file:radius to override the radius (default: CM2025 R1465 and R495)')
+    calendar.add_argument('--profile', default='MB4', help='Rail profile of both rails')
+    calendar.add_argument('--load', type=float, default=32.5, help='Axle load (t)')
+    calendar.add_argument('--grinding-freqs', nargs='+', type=int, default=list(range(1, 13)), help='Grinding intervals (months)')
+    calendar.add_argument('--gauge-freqs', nargs='+', type=int, default=[48], help='Tamping intervals (months)')
+    calendar.add_argument('--years', type=int, default=30, help='Years of the calendar')
+    calendar.add_argument('--start-year', type=int, default=2019, help='Calendar year of the first year')
+    calendar.add_argument('--by', nargs='+', default=['Track_Bdl'], help='Inventory columns to total by')
+    calendar.add_argument('--output', default=None, help='Output file (default: data/processed/network_calendar)')
+    calendar.add_argument('--format', choices=OUTPUT_FORMATS, default=None,
+                          help='Output format (default: from the file extension, else parquet if installed, else csv)')
+    atlas = commands.add_parser('atlas', help='Precompute the cheapest strategies on a grid of cases')
+    atlas.add_argument('--tables', nargs='+', default=None,
+                       help='Degradation table files, file:radius to override the radius (default: CM2025 R1465 and R495)')
+    atlas.add_argument('--radii', nargs='+', type=float, default=None, help='Radii (m) (default: tabulated range in --radius-step)')
+    atlas.add_argument('--radius-step', type=float, default=25, help='Spacing (m) of the default radii')
+    atlas.add_argument('--profiles', nargs='+', default=None, help='Profiles (default: all profiles of the tables)')
+    atlas.add_argument('--loads', nargs='+', type=float, default=None, help='Axle loads (t) (default: tabulated loads)')
+    atlas.add_argument('--widenings', nargs='+', type=float, default=[0.5, 1.0, 1.5, 2.0], help='Gauge widenings (mm/year)')
+    atlas.add_argument('--rates', nargs='+', type=float, default=[0.03, 0.04, 0.05], help='Discount rates')
+    atlas.add_argument('--grinding-freqs', nargs='+', type=int, default=list(range(1, 13)), help='Grinding intervals (months)')
+    atlas.add_argument('--gauge-freqs', nargs='+', type=int, default=[48], help='Tamping intervals (months)')
+    atlas.add_argument('--output', default=None, help='Atlas file (default: data/processed/policy_atlas.npz)')
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        written = run_scenario_file(args.scenario_file, workers=args.workers, output=args.output,
+                                    output_format=args.format)
+        for name, path in written.items():
+            print(f"{name}: {path}")
+    elif args.command == 'bench':
+        from rail_analysis import benchmarks
+        args.history = args.history or benchmarks.BENCHMARK_HISTORY_PATH
+        return benchmarks.main(args)
+    elif args.command == 'diff':
+        from rail_analysis import differential
+        return differential.main(args)
+    elif args.command == 'synth':
+        from rail_analysis import synthetic
+        options = {'radii': args.radii, 'loads': args.loads}
+        written = synthetic.write_synthetic_inputs(
+            args.output, n_curves=args.curves, profiles=args.profiles, seed=args.seed,
+            **{name: value for name, value in options.items() if value is not None}
+        )
+        for name, path in written.items():
+            print(f"{name}: {path}")
+    elif args.command == 'network':
+        from rail_analysis import network
+        args.curves = args.curves or network.NETWORK_CURVES_PATH
+        args.tables = args.tables or network.DEFAULT_TABLES
+        return network.main(args)
+    elif args.command == 'calendar':
+        from rail_analysis import calendars, network
+        args.curves = args.curves or network.NETWORK_CURVES_PATH
+        args.tables = args.tables or network.DEFAULT_TABLES
+        return calendars.main(args)
+    elif args.command == 'atlas':
+        from rail_analysis import atlas, network
+        args.tables = args.tables or network.DEFAULT_TABLES
+        args.output = args.output or atlas.ATLAS_PATH
+        return atlas.main(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,380 @@
+# rail_analysis/atlas.py
+"""
+Precomputed optimal strategies: the policy atlas.
+
+"Which grinding interval for radius R, profile P, axle load L and gauge widening W?" otherwise
+needs a sweep such as plot_variation_annuity_lifetime. build_atlas answers it in advance for a
+dense grid of radius, profile, load, gauge widening and discount rate: every grid point is
+simulated for all strategies of the strategy grid with the batched engine (once for all
+discount rates, which only change the pricing of the ledger), and the cheapest strategy (low
+and high rail grinding intervals, tamping interval) is kept with its annuity, lifetime and
+renewal option. The atlas is stored as a compressed .npz file of some kilobytes
+(data/processed/policy_atlas.npz) and PolicyAtlas answers queries from it:
+
+- 'nearest': the strategy and results of the nearest grid point (radius by curvature 1/R, as
+  the tables are interpolated), some microseconds per query.
+- 'linear': annuity and lifetime interpolated multilinearly between the surrounding grid
+  points (radius linear in curvature); the strategy and option are those of the grid point
+  with the largest weight (some tens of microseconds per query).
+Queries outside the grid are clamped to it; the profile must be one of the atlas.
+
+Build it with
+
+    python -m rail_analysis atlas [--tables CSV[:RADIUS] ...] [--radius-step 25] [--widenings 0.5 1 1.5 2] [--rates 0.03 0.04 0.05]
+
+from the rals_livslangd_python folder.
+
+Example:
+    atlas = build_atlas(prepare_tables(data_df_interpolated), gauge_widenings=[0.5, 1, 1.5, 2])
+    atlas.save()
+    atlas = PolicyAtlas.load()
+    atlas.query(radius=800, profile='MB4', load=32.5, gauge_widening=1.2, discount_rate=0.04)
+    atlas.lookup({'radius': read_curve_inventory()['Curve_Radie_m'], 'profile': 'MB4'}, method='linear')
+"""
+
+import bisect
+import itertools
+import json
+import os
+import time
+
+import numpy as np  # type: ignore
+import pandas as pd  # type: ignore
+
+from rail_analysis.constants import DISCOUNT_RATE, SELECTED_GAUGE_WIDENING, TECH_LIFE_YEARS
+from rail_analysis.discounting import constant_discount_factors
+from rail_analysis.LCC_batched import RENEWAL_OPTIONS, default_costs, price_track_ledger, simulate_track_strategies
+from rail_analysis.network import STRATEGY_COLUMNS, strategy_grid
+from rail_analysis.prepared_tables import DEFAULT_LOAD, TANGENT
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ATLAS_PATH = os.path.join(_ROOT, 'data', 'processed', 'policy_atlas.npz')
+
+# axes of the atlas, in the order of the dimensions of its arrays
+AXES = ('radius', 'profile', 'load', 'gauge_widening', 'discount_rate')
+
+# spacing (m) of the default radius axis between the smallest and the largest tabulated radius
+ATLAS_RADIUS_STEP = 25
+
+METHODS = ('nearest', 'linear')
+
+
+class PolicyAtlas:
+    """
+    Cheapest strategy and its results on a grid of radius, profile, load, gauge widening and
+    discount rate.
+
+    Attributes (shape = lengths of the AXES):
+    - axes: dict of the axis values by name (radius in m, ascending).
+    - strategies: DataFrame with the STRATEGY_COLUMNS of the strategy grid.
+    - strategy: int array (shape), position of the cheapest strategy in strategies.
+    - annuity, lifetime: float32 arrays (shape), SEK/m/year and years.
+    - option: int8 array (shape), position of the renewal option in RENEWAL_OPTIONS.
+    - metadata: dict with the track life, the cost constants and the build time.
+    """
+
+    def __init__(self, axes, strategies, strategy, annuity, lifetime, option, metadata=None):
+        self.axes = {name: list(axes[name]) for name in AXES}
+        self.strategies = strategies.reset_index(drop=True)
+        self.strategy = strategy
+        self.annuity = annuity
+        self.lifetime = lifetime
+        self.option = option
+        self.metadata = metadata or {}
+        # numeric axes as ascending coordinates (curvature for the radius), with the axis position of each
+        radius_order = sorted(range(len(self.axes['radius'])), key=lambda k: 1 / self.axes['radius'][k])
+        self._coordinates = {'radius': ([1 / self.axes['radius'][k] for k in radius_order], radius_order)}
+        for name in ('load', 'gauge_widening', 'discount_rate'):
+            self._coordinates[name] = (self.axes[name], list(range(len(self.axes[name]))))
+        self._profiles = {profile: k for k, profile in enumerate(self.axes['profile'])}
+        self._strategy_rows = [tuple(int(v) for v in row) for row in self.strategies[STRATEGY_COLUMNS].to_numpy()]
+
+    @property
+    def shape(self):
+        return self.annuity.shape
+
+    def save(self, path=ATLAS_PATH):
+        """Write the atlas as a compressed .npz file and return its path."""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        np.savez_compressed(
+            path,
+            strategies=self.strategies[STRATEGY_COLUMNS].to_numpy(dtype=np.int16),
+            strategy=self.strategy, annuity=self.annuity, lifetime=self.lifetime, option=self.option,
+            axes=json.dumps(self.axes), metadata=json.dumps(self.metadata),
+        )
+        return path
+
+    @classmethod
+    def load(cls, path=ATLAS_PATH):
+        """Read an atlas written by save."""
+        with np.load(path) as data:
+            return cls(
+                json.loads(str(data['axes'])), pd.DataFrame(data['strategies'], columns=STRATEGY_COLUMNS),
+                data['strategy'], data['annuity'], data['lifetime'], data['option'], json.loads(str(data['metadata'])),
+            )
+
+    def query(self, radius, profile, load=DEFAULT_LOAD, gauge_widening=SELECTED_GAUGE_WIDENING,
+              discount_rate=DISCOUNT_RATE, method='nearest'):
+        """
+        Cheapest strategy for one case.
+
+        Parameters:
+        - radius: Curve radius (m, signed radii are taken as their absolute value, 0 for straight track).
+        - profile: Rail profile of both rails.
+        - load: Axle load (t).
+        - gauge_widening: Gauge widening per year (mm/year).
+        - discount_rate: Annual discount rate.
+        - method: 'nearest' or 'linear'.
+
+        Returns:
+        - dict with the STRATEGY_COLUMNS, 'Annuity' (SEK/m/year), 'Lifetime' (years) and 'Option'
+        """
+        if method not in METHODS:
+            raise ValueError(f"Unknown method {method}, choose from {METHODS}")
+        p = self._profile(profile)
+        brackets = [
+            _bracket(*self._coordinates['radius'], 1 / abs(radius) if radius else 0.0),
+            _bracket(*self._coordinates['load'], load),
+            _bracket(*self._coordinates['gauge_widening'], gauge_widening),
+            _bracket(*self._coordinates['discount_rate'], discount_rate),
+        ]
+        if method == 'nearest':
+            r, l, w, d = (upper if weight >= 0.5 else lower for lower, upper, weight in brackets)
+            annuity, lifetime = float(self.annuity[r, p, l, w, d]), float(self.lifetime[r, p, l, w, d])
+        else:
+            annuity = lifetime = 0.0
+            best, best_weight = None, -1.0
+            for corner in itertools.product((0, 1), repeat=4):
+                weight = 1.0
+                for side, (_, _, upper_weight) in zip(corner, brackets):
+                    weight *= upper_weight if side else 1 - upper_weight
+                if weight == 0 and best is not None:
+                    continue
+                r, l, w, d = (bracket[side] for side, bracket in zip(corner, brackets))
+                annuity += weight * float(self.annuity[r, p, l, w, d])
+                lifetime += weight * float(self.lifetime[r, p, l, w, d])
+                if weight > best_weight:
+                    best, best_weight = (r, l, w, d), weight
+            r, l, w, d = best
+        strategy = self._strategy_rows[self.strategy[r, p, l, w, d]]
+        return {
+            **dict(zip(STRATEGY_COLUMNS, strategy)),
+            'Annuity': annuity,
+            'Lifetime': lifetime,
+            'Option': RENEWAL_OPTIONS[self.option[r, p, l, w, d]],
+        }
+
+    def lookup(self, cases, method='nearest'):
+        """
+        Cheapest strategies for many cases at once.
+
+        Parameters:
+        - cases: DataFrame (or dict of arrays) with 'radius' and 'profile', and optionally
+                 'load', 'gauge_widening' and 'discount_rate' (defaults as in query).
+        - method: 'nearest' or 'linear'.
+
+        Returns:
+        - DataFrame with the index of cases, the STRATEGY_COLUMNS, 'Annuity', 'Lifetime' and 'Option'
+        """
+        if method not in METHODS:
+            raise ValueError(f"Unknown method {method}, choose from {METHODS}")
+        cases = pd.DataFrame(cases)
+        n = len(cases)
+        defaults = {'load': DEFAULT_LOAD, 'gauge_widening': SELECTED_GAUGE_WIDENING, 'discount_rate': DISCOUNT_RATE}
+        values = {name: cases[name].to_numpy(dtype=float) if name in cases else np.full(n, default)
+                  for name, default in defaults.items()}
+        radius = np.abs(cases['radius'].to_numpy(dtype=float))
+        values['radius'] = np.where(radius > 0, 1 / np.where(radius > 0, radius, 1), 0.0)
+        profiles = cases['profile'].astype(str).str.strip().str.upper()
+        p = profiles.map(self._profiles)
+        if p.isna().any():
+            raise ValueError(f"Profiles {sorted(set(profiles[p.isna()]))} are not in the atlas {self.axes['profile']}")
+        p = p.to_numpy(dtype=int)
+        brackets = [_brackets(*self._coordinates[name], values[name])
+                    for name in ('radius', 'load', 'gauge_widening', 'discount_rate')]
+
+        if method == 'nearest':
+            r, l, w, d = (np.where(weight >= 0.5, upper, lower) for lower, upper, weight in brackets)
+            annuity, lifetime = self.annuity[r, p, l, w, d].astype(float), self.lifetime[r, p, l, w, d].astype(float)
+        else:
+            annuity, lifetime = np.zeros(n), np.zeros(n)
+            best_weight = np.full(n, -1.0)
+            r, l, w, d = (np.zeros(n, dtype=int) for _ in range(4))
+            for corner in itertools.product((0, 1), repeat=4):
+                weight = np.ones(n)
+                for side, (_, _, upper_weight) in zip(corner, brackets):
+                    weight *= upper_weight if side else 1 - upper_weight
+                index = [bracket[side] for side, bracket in zip(corner, brackets)]
+                annuity += weight * self.annuity[index[0], p, index[1], index[2], index[3]]
+                lifetime += weight * self.lifetime[index[0], p, index[1], index[2], index[3]]
+                better = weight > best_weight
+                best_weight = np.where(better, weight, best_weight)
+                r, l, w, d = (np.where(better, new, old) for new, old in zip(index, (r, l, w, d)))
+        strategy = self.strategy[r, p, l, w, d]
+        found = pd.DataFrame(self.strategies[STRATEGY_COLUMNS].to_numpy()[strategy], columns=STRATEGY_COLUMNS,
+                             index=cases.index)
+        found['Annuity'] = annuity
+        found['Lifetime'] = lifetime
+        found['Option'] = np.asarray(RENEWAL_OPTIONS, dtype=object)[self.option[r, p, l, w, d]]
+        return found
+
+    def to_frame(self):
+        """The atlas as a long DataFrame, one row per grid point."""
+        index = pd.MultiIndex.from_product([self.axes[name] for name in AXES], names=list(AXES))
+        frame = pd.DataFrame(self.strategies[STRATEGY_COLUMNS].to_numpy()[self.strategy.ravel()],
+                             columns=STRATEGY_COLUMNS, index=index)
+        frame['Annuity'] = self.annuity.ravel()
+        frame['Lifetime'] = self.lifetime.ravel()
+        frame['Option'] = np.asarray(RENEWAL_OPTIONS, dtype=object)[self.option.ravel()]
+        return frame.reset_index()
+
+    def _profile(self, profile):
+        p = self._profiles.get(str(profile).strip().upper())
+        if p is None:
+            raise ValueError(f"Profile {profile} is not in the atlas {self.axes['profile']}")
+        return p
+
+
+def build_atlas(
+    tables,
+    radii=None,
+    profiles=None,
+    loads=None,
+    gauge_widenings=(SELECTED_GAUGE_WIDENING,),
+    discount_rates=(DISCOUNT_RATE,),
+    grinding_freqs=range(1, 13),
+    gauge_freqs=(48,),
+    same_grinding=False,
+    track_life=TECH_LIFE_YEARS,
+    costs=None,
+    radius_step=ATLAS_RADIUS_STEP,
+    chunk_size=64,
+    progress=None,
+):
+    """
+    Simulate a grid of cases for all strategies and keep the cheapest strategy of each.
+
+    Parameters:
+    - tables: PreparedTables; radius- and load-interpolated tables are added for the grid.
+    - radii: Radii (m) of the grid, defaults to the tabulated radii and the multiples of
+             radius_step between the smallest and the largest of them. Radii are rounded to
+             the radius grid of the tables.
+    - profiles: Profiles (of both rails), defaults to all profiles of the tables.
+    - loads: Axle loads (t), defaults to the tabulated loads.
+    - gauge_widenings: Gauge widenings per year (mm/year).
+    - discount_rates: Annual discount rates (constant_discount_factors).
+    - grinding_freqs, gauge_freqs, same_grinding: Strategy grid, as in strategy_grid.
+    - track_life, costs: As in get_annuity_track_batch.
+    - radius_step: Spacing (m) of the default radius axis.
+    - chunk_size: Cases simulated at once (times the number of strategies).
+    - progress: Function called with progress messages, None for no messages.
+
+    Returns:
+    - PolicyAtlas
+    """
+    start = time.perf_counter()
+    progress = progress or (lambda message: None)
+    costs = {**default_costs(), **(costs or {})}
+    profiles = [str(p).strip().upper() for p in (profiles or tables.profiles)]
+    loads = sorted(float(load) for load in (loads or tables.loads))
+    radii = sorted(_atlas_radii(tables, profiles, radii, radius_step))
+    gauge_widenings = sorted(float(w) for w in gauge_widenings)
+    discount_rates = sorted(float(rate) for rate in discount_rates)
+    strategies = strategy_grid(grinding_freqs, gauge_freqs, same_grinding)
+    n_strategies = len(strategies)
+
+    if set(loads) - set(tables.loads):
+        tables.add_loads(loads, profiles=profiles)
+    keys = {radius: tables.grid_radius(radius) for radius in radii}
+    tables.add_radii(radii, profiles=profiles, loads=loads)
+
+    cases = list(itertools.product(range(len(radii)), range(len(profiles)), range(len(loads)), range(len(gauge_widenings))))
+    shape = (len(radii), len(profiles), len(loads), len(gauge_widenings), len(discount_rates))
+    strategy = np.zeros(shape, dtype=np.int16)
+    annuity = np.zeros(shape, dtype=np.float32)
+    lifetime = np.zeros(shape, dtype=np.float32)
+    option = np.zeros(shape, dtype=np.int8)
+    # position of every option in RENEWAL_OPTIONS ('Renew separately' is listed twice)
+    option_codes = {name: RENEWAL_OPTIONS.index(name) for name in RENEWAL_OPTIONS}
+    factors = None
+    for first in range(0, len(cases), chunk_size):
+        chunk = np.array(cases[first:first + chunk_size])
+        r, p, l, w = (np.repeat(chunk[:, k], n_strategies) for k in range(4))
+        ledger = simulate_track_strategies(
+            tables,
+            np.tile(strategies['grinding_freq_low'].to_numpy(), len(chunk)),
+            np.tile(strategies['grinding_freq_high'].to_numpy(), len(chunk)),
+            np.tile(strategies['gauge_freq'].to_numpy(), len(chunk)),
+            np.asarray(profiles, dtype=object)[p], np.asarray(profiles, dtype=object)[p],
+            np.asarray(gauge_widenings)[w], np.asarray([keys[radius] for radius in radii], dtype=object)[r],
+            np.asarray(loads)[l], track_life,
+        )
+        factors = factors or [constant_discount_factors(rate, ledger.n_months) for rate in discount_rates]
+        for d, discount_factors in enumerate(factors):
+            results = price_track_ledger(ledger, discount_factors=discount_factors, costs=costs)
+            values = results['Annuity'].to_numpy().reshape(len(chunk), n_strategies)
+            best = np.argmin(values, axis=1)
+            rows = np.arange(len(chunk)) * n_strategies + best
+            at = (chunk[:, 0], chunk[:, 1], chunk[:, 2], chunk[:, 3], d)
+            strategy[at] = best
+            annuity[at] = values[np.arange(len(chunk)), best]
+            lifetime[at] = results['Lifetime'].to_numpy()[rows]
+            option[at] = [option_codes[name] for name in results['Option'].to_numpy()[rows]]
+        progress(f"atlas: {min(first + chunk_size, len(cases))} of {len(cases)} cases")
+
+    axes = {'radius': radii, 'profile': profiles, 'load': loads, 'gauge_widening': gauge_widenings,
+            'discount_rate': discount_rates}
+    metadata = {'track_life': track_life, 'costs': costs, 'simulated': len(cases) * n_strategies,
+                'seconds': time.perf_counter() - start}
+    return PolicyAtlas(axes, strategies, strategy, annuity, lifetime, option, metadata)
+
+
+def main(args):
+    """Build and save the atlas for the `atlas` command."""
+    from rail_analysis.network import load_network_tables
+
+    tables = load_network_tables(args.tables)
+    atlas = build_atlas(
+        tables, radii=args.radii, profiles=args.profiles, loads=args.loads, gauge_widenings=args.widenings,
+        discount_rates=args.rates, grinding_freqs=args.grinding_freqs, gauge_freqs=args.gauge_freqs,
+        radius_step=args.radius_step, progress=print,
+    )
+    path = atlas.save(args.output)
+    print(f"atlas {dict(zip(AXES, atlas.shape))}: {atlas.metadata['simulated']} strategies simulated in "
+          f"{atlas.metadata['seconds']:.1f} s, written to {path} ({os.path.getsize(path) / 1024:.1f} kB)")
+
+
+# === HELPER FUNCTIONS ===
+
+def _atlas_radii(tables, profiles, radii, radius_step):
+    """Radii (m) of the grid rounded to the radius grid of the tables, without duplicates."""
+    if radii is None:
+        tabulated = {float(radius) for profile in profiles for rail in ('High', 'Inner')
+                     for radius in tables.tabulated_radii(profile, rail)[0] if radius != TANGENT}
+        if not tabulated:
+            raise ValueError(f"No tabulated radii for the profiles {profiles}")
+        low, high = min(tabulated), max(tabulated)
+        radii = tabulated | set(np.arange(np.ceil(low / radius_step), np.floor(high / radius_step) + 1) * radius_step)
+    return {float(tables.grid_radius(radius)) for radius in radii if radius and radius != TANGENT}
+
+
+def _bracket(coordinates, positions, x):
+    """(lower, upper, weight of upper) axis positions of x in ascending coordinates, clamped."""
+    k = bisect.bisect_left(coordinates, x)
+    if k <= 0:
+        return positions[0], positions[0], 0.0
+    if k >= len(coordinates):
+        return positions[-1], positions[-1], 0.0
+    lower, upper = coordinates[k - 1], coordinates[k]
+    return positions[k - 1], positions[k], (x - lower) / (upper - lower)
+
+
+def _brackets(coordinates, positions, x):
+    """_bracket of an array of values."""
+    coordinates, positions = np.asarray(coordinates, dtype=float), np.asarray(positions)
+    k = np.searchsorted(coordinates, x, side='left')
+    lower = np.clip(k - 1, 0, len(coordinates) - 1)
+    upper = np.clip(k, 0, len(coordinates) - 1)
+    span = coordinates[upper] - coordinates[lower]
+    weight = np.where(span > 0, (x - coordinates[lower]) / np.where(span > 0, span, 1), 0.0)
+    return positions[lower], positions[upper], np.clip(weight, 0, 1)
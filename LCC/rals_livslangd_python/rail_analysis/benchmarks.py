@@ -0,0 +1,307 @@
+# rail_analysis/benchmarks.py
+"""
+Benchmark suite for the simulators, the interpolation and the table access.
+
+Every benchmark times a function on a dataset: the bundled CM2025 tables (R1465 and R495) and
+a synthetic dataset made of `scale` copies of the R1465 tables with perturbed values (one
+profile per copy), for the input size of larger studies. For each benchmark the median and
+minimum time over `repeat` runs and the peak memory of one run (tracemalloc) are reported.
+
+Every run is appended to a JSON-lines history file (data/processed/benchmarks.jsonl by
+default) with the commit, the host and the library versions. A benchmark whose median time
+exceeds the baseline (median of the last `window` runs on the same host) by more than the
+regression threshold is flagged. Run it with
+
+    python -m rail_analysis bench [--only get_table read_input_data] [--scale 20] [--threshold 0.2]
+
+from the rals_livslangd_python folder; the command exits with status 1 on a regression.
+"""
+
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np  # type: ignore
+import pandas as pd  # type: ignore
+
+from preprocessings.read_input_data import read_input_data
+from rail_analysis.interpolation import interpolate_rail_data
+from rail_analysis.rail_measures import get_table
+from rail_analysis.LCC_single_rail import get_annuity_refactored
+from rail_analysis.LCC_two_rails import get_annuity_track_refactored
+from rail_analysis.LCC_optimisation import compare_joint_vs_separate
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# default location of the benchmark history, next to the other processed data files
+BENCHMARK_HISTORY_PATH = os.path.join(_ROOT, 'data', 'processed', 'benchmarks.jsonl')
+
+# bundled datasets: name -> (file, radius written over the Radius column, or None)
+DATASETS = {
+    'R1465': (os.path.join(_ROOT, 'data', 'raw', 'CM2025', 'BDL_111_results_JL_R1465.csv'), None),
+    # the R495 file is labelled radius 1465
+    'R495': (os.path.join(_ROOT, 'data', 'raw', 'CM2025', 'BDL_111_results_JL_R495.csv'), '495'),
+}
+
+# strategy simulated by the simulator benchmarks
+GRINDING_FREQ = 6
+GAUGE_FREQ = 48
+COMPARE_GRINDING_FREQS = [3, 6, 9, 12]
+
+
+def synthetic_table(scale, source=DATASETS['R1465'][0], seed=0):
+    """
+    Wide input table (as in the CSV files) with `scale` copies of a source table: the first copy
+    is the source, copy k > 0 has the profile SYN<k> and all values multiplied by a random
+    factor between 0.9 and 1.2.
+    """
+    source = pd.read_csv(source, delimiter=';', encoding='utf-8-sig')
+    month_columns = [f'month {i}' for i in range(1, 13)]
+    values = source[month_columns].apply(lambda column: column.astype(str).str.replace(',', '.').astype(float))
+    rng = np.random.default_rng(seed)
+    copies = []
+    for k in range(scale):
+        copy = source.copy()
+        if k > 0:
+            copy['Profile'] = f'SYN{k}'
+            copy[month_columns] = (values * rng.uniform(0.9, 1.2)).round(4)
+        copies.append(copy)
+    return pd.concat(copies, ignore_index=True)
+
+
+class Benchmark:
+    """
+    A timed function.
+
+    Parameters:
+    - name: Name of the benchmark (the function it times).
+    - setup: Function (dataset) -> dict of arguments, not timed.
+    - run: Function called with the arguments of setup.
+    - repeat: Default number of timed runs.
+    """
+
+    def __init__(self, name, setup, run, repeat=3):
+        self.name = name
+        self.setup = setup
+        self.run = run
+        self.repeat = repeat
+
+
+def _profile(inputs):
+    return inputs['long']['Profile'].iloc[0]
+
+
+def _radius(inputs):
+    return inputs['long']['Radius'].iloc[0]
+
+
+def _get_tables(data_df, profile, radius):
+    for condition in ('h-index', 'wear', 'rcf-residual', 'rcf-depth'):
+        for rail in ('High', 'Inner'):
+            get_table(data_df, condition, profile=profile, rail=rail, radius=radius)
+
+
+def _compare(**kwargs):
+    # compare_joint_vs_separate prints its table
+    with contextlib.redirect_stdout(io.StringIO()):
+        compare_joint_vs_separate(**kwargs)
+
+
+BENCHMARKS = [
+    Benchmark('read_input_data', lambda inputs: {'file_path': inputs['path'], 'use_cache': False}, read_input_data),
+    Benchmark('interpolate_rail_data', lambda inputs: {'df': inputs['long']}, interpolate_rail_data),
+    Benchmark(
+        'get_table',
+        lambda inputs: {'data_df': inputs['interpolated'], 'profile': _profile(inputs), 'radius': _radius(inputs)},
+        _get_tables, repeat=5
+    ),
+    Benchmark(
+        'get_annuity_refactored',
+        lambda inputs: {
+            'data_df': inputs['interpolated'], 'maint_strategy': (GRINDING_FREQ, GAUGE_FREQ), 'radius': _radius(inputs)
+        },
+        get_annuity_refactored
+    ),
+    Benchmark(
+        'get_annuity_track_refactored',
+        lambda inputs: {
+            'data_df': inputs['interpolated'], 'grinding_freq_low': GRINDING_FREQ, 'grinding_freq_high': GRINDING_FREQ,
+            'gauge_freq': GAUGE_FREQ, 'profile_low_rail': _profile(inputs), 'profile_high_rail': _profile(inputs),
+            'radius': _radius(inputs)
+        },
+        get_annuity_track_refactored
+    ),
+    Benchmark(
+        'compare_joint_vs_separate',
+        lambda inputs: {
+            'data_df': inputs['interpolated'], 'grinding_freqs': COMPARE_GRINDING_FREQS, 'gauge_freq': GAUGE_FREQ,
+            'profile_low_rail': _profile(inputs), 'profile_high_rail': _profile(inputs), 'radius': _radius(inputs)
+        },
+        _compare, repeat=1
+    ),
+]
+
+
+def load_inputs(dataset, scale, directory):
+    """
+    Inputs of the benchmarks on a dataset: the path of its CSV file, the long table and the
+    interpolated table. The synthetic dataset is written to `directory`.
+    """
+    if dataset == 'synthetic':
+        path = os.path.join(directory, f'synthetic_x{scale}.csv')
+        synthetic_table(scale).to_csv(path, sep=';', index=False, encoding='utf-8')
+        radius = None
+    else:
+        path, radius = DATASETS[dataset]
+    long = read_input_data(path, use_cache=False)
+    if long is None:
+        raise ValueError(f"Could not read {path}")
+    if radius is not None:
+        long['Radius'] = radius
+    interpolated = interpolate_rail_data(long)
+    if radius is not None:
+        interpolated['Radius'] = radius
+    return {'path': path, 'long': long, 'interpolated': interpolated}
+
+
+def time_benchmark(benchmark, inputs, repeat=None):
+    """
+    Time a benchmark on prepared inputs.
+
+    Returns:
+    - dict with the median and minimum time (s) of `repeat` runs and the peak memory (MiB) of one run
+    """
+    kwargs = benchmark.setup(inputs)
+    times = []
+    for _ in range(repeat or benchmark.repeat):
+        start = time.perf_counter()
+        benchmark.run(**kwargs)
+        times.append(time.perf_counter() - start)
+
+    # memory in a separate run, tracemalloc slows the run down
+    tracemalloc.start()
+    try:
+        benchmark.run(**kwargs)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {'Median_s': statistics.median(times), 'Min_s': min(times), 'Runs': len(times), 'Peak_MiB': peak / 2**20}
+
+
+def run_benchmarks(only=None, datasets=None, scale=20, repeat=None, history=BENCHMARK_HISTORY_PATH,
+                   threshold=0.2, window=5, save=True, progress=print):
+    """
+    Run the benchmark suite and compare it with the history.
+
+    Parameters:
+    - only: Names of the benchmarks to run, defaults to all (see BENCHMARKS).
+    - datasets: Datasets to run them on, defaults to the bundled datasets and 'synthetic'.
+    - scale: Number of copies of the R1465 tables in the synthetic dataset.
+    - repeat: Number of timed runs, defaults to the number of the benchmark.
+    - history: JSON-lines file with the previous runs, None for no history.
+    - threshold: Relative slowdown of the median time over the baseline flagged as a regression.
+    - window: Number of previous runs on the same host the baseline is the median of.
+    - save: Append this run to the history.
+    - progress: Function called with progress messages, None for no messages.
+
+    Returns:
+    - DataFrame with one row per benchmark and dataset: Benchmark, Dataset, Median_s, Min_s,
+      Runs, Peak_MiB, Baseline_s, Ratio (median over baseline) and Regression
+    """
+    benchmarks = [b for b in BENCHMARKS if only is None or b.name in only]
+    unknown = set(only or []) - {b.name for b in BENCHMARKS}
+    if unknown:
+        raise ValueError(f"Unknown benchmarks {sorted(unknown)}, choose from {[b.name for b in BENCHMARKS]}")
+    datasets = list(datasets or [*DATASETS, 'synthetic'])
+    progress = progress or (lambda message: None)
+
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        for dataset in datasets:
+            inputs = load_inputs(dataset, scale, directory)
+            label = f'synthetic_x{scale}' if dataset == 'synthetic' else dataset
+            for benchmark in benchmarks:
+                row = {'Benchmark': benchmark.name, 'Dataset': label, **time_benchmark(benchmark, inputs, repeat)}
+                progress(f"{benchmark.name} [{label}]: {row['Median_s']:.4f} s, {row['Peak_MiB']:.1f} MiB")
+                rows.append(row)
+    results = pd.DataFrame(rows)
+
+    previous = load_history(history) if history else []
+    host = platform.node()
+    baselines = {}
+    for run in previous:
+        if run.get('host') != host:
+            continue
+        for row in run['results']:
+            baselines.setdefault((row['Benchmark'], row['Dataset']), []).append(row['Median_s'])
+    results['Baseline_s'] = [
+        statistics.median(baselines[key][-window:]) if key in baselines else np.nan
+        for key in zip(results['Benchmark'], results['Dataset'])
+    ]
+    results['Ratio'] = results['Median_s'] / results['Baseline_s']
+    results['Regression'] = results['Ratio'] > 1 + threshold
+
+    if history and save:
+        record = {
+            'time': time.time(),
+            'commit': _git_commit(),
+            'host': host,
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'scale': scale,
+            'results': results[['Benchmark', 'Dataset', 'Median_s', 'Min_s', 'Runs', 'Peak_MiB']].to_dict('records'),
+        }
+        os.makedirs(os.path.dirname(os.path.abspath(history)), exist_ok=True)
+        with open(history, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record) + '\n')
+    return results
+
+
+def load_history(path=BENCHMARK_HISTORY_PATH):
+    """Previous benchmark runs (list of dicts, oldest first)."""
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def history_frame(path=BENCHMARK_HISTORY_PATH):
+    """The benchmark history as a DataFrame, one row per run, benchmark and dataset."""
+    rows = [
+        {'Time': pd.to_datetime(run['time'], unit='s'), 'Commit': run['commit'], 'Host': run['host'], **row}
+        for run in load_history(path) for row in run['results']
+    ]
+    return pd.DataFrame(rows)
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(args):
+    """Run the suite for the `bench` command; returns the exit status."""
+    results = run_benchmarks(
+        only=args.only, datasets=args.datasets, scale=args.scale, repeat=args.repeat, history=args.history,
+        threshold=args.threshold, save=not args.no_save
+    )
+    with pd.option_context('display.width', 200, 'display.max_columns', None):
+        print(results.to_string(index=False, float_format=lambda x: f'{x:.4g}'))
+    regressions = results[results['Regression']]
+    if not regressions.empty:
+        print(f"{len(regressions)} regression(s) above {100 * args.threshold:.0f} %", file=sys.stderr)
+        return 1
+    return 0
@@ -0,0 +1,161 @@
+# rail_analysis/calendars.py
+"""
+Yearly budget calendars of the network: SEK, possession hours and metres of rail renewed per
+year, activity and line.
+
+The event ledger of every section (one row of a priced EventLedger per section, e.g. the chosen
+strategy of every curve of a NetworkStudy) is turned into its yearly calendar by
+track_ledger_calendar (LCC_batched), which repeats the life cycle of the chosen renewal option.
+The calendars are per TRACK_LENGTH_M of track, so the sections of a line with the same ledger
+row are first summed into one length and every (line, row) is computed once; the totals per
+line, year and activity are then group sums over these units. The calendar is a long table
+(one row per line, year and activity) and is written to data/processed as a parquet file when
+a parquet engine is installed, else as csv. For the Power BI reports in data matching and
+clustering (Spårkategorier_kurvlängd.pbix, rälslitage/Rälslitage_Malmbanan.pbix), give a file
+in that folder with --output. Run it with
+
+    python -m rail_analysis calendar [--years 30] [--by Track_Bdl] [--output FILE] [--format parquet|feather|csv]
+
+from the rals_livslangd_python folder.
+
+Example (the calendar of a portfolio plan):
+    study = NetworkStudy(read_curve_inventory(), tables)
+    plan = optimise_portfolio(portfolio_problem(study), budget=4e6)
+    calendar = network_calendar(study, strategy=plan['Strategy'], n_years=30, by='Track_Bdl')
+    write_calendar(calendar)
+"""
+
+import os
+import time
+
+import numpy as np  # type: ignore
+import pandas as pd  # type: ignore
+
+from rail_analysis.constants import SIMULATION_START_YEAR
+from rail_analysis.LCC_batched import ACTIVITIES, default_costs, track_ledger_calendar
+from rail_analysis.network import LENGTH_COLUMN
+from rail_analysis.scenario_runner import OUTPUT_FORMATS, _has_parquet_engine, write_results
+
+# calendar file of the network command (extension by format)
+CALENDAR_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'processed', 'network_calendar'
+)
+
+# measures of the calendar: direct cost (SEK, undiscounted), possession hours, metres of rail renewed
+MEASURES = ['Cost_SEK', 'Hours', 'Renewed_m']
+
+
+def section_calendar(ledger, results, sections, by='Track_Bdl', costs=None, n_years=10,
+                     start_year=SIMULATION_START_YEAR):
+    """
+    Yearly calendar of sections summed per group, year and activity.
+
+    Parameters:
+    - ledger: EventLedger of the strategies of the sections.
+    - results: price_track_ledger results of the ledger.
+    - sections: DataFrame with one row per section: 'Row' (row of the ledger), 'Length_m' and
+                the `by` columns.
+    - by: Column (or list of columns) of sections to total by, None for the whole network.
+    - costs: Cost constants, defaults to default_costs().
+    - n_years: Years of the calendar.
+    - start_year: Calendar year of the first year.
+
+    Returns:
+    - DataFrame with the `by` columns, 'Year', 'Activity' (ACTIVITIES) and the MEASURES, one
+      row per group, year and activity ('Renewed_m' is on the 'renewal' rows)
+    """
+    costs = dict(default_costs(), **(costs or {}))
+    by = [] if by is None else list(np.atleast_1d(by))
+    if by:
+        grouped = sections.groupby(by, sort=True, dropna=False)
+        group, labels = grouped.ngroup().to_numpy(dtype=int), grouped.size().index.to_frame(index=False)
+    else:
+        group, labels = np.zeros(len(sections), dtype=int), pd.DataFrame(index=range(1))
+
+    # units: the sections of a group with the same ledger row, and the rows they use
+    rows = sections['Row'].to_numpy(dtype=int)
+    units, unit_of_section = np.unique(np.column_stack([group, rows]), axis=0, return_inverse=True)
+    unit_length = np.bincount(unit_of_section.ravel(), weights=sections['Length_m'].to_numpy(dtype=float),
+                              minlength=len(units))
+    used, row_of_unit = np.unique(units[:, 1], return_inverse=True)
+    calendar = track_ledger_calendar(ledger.take(used), results.iloc[used].reset_index(drop=True), costs, n_years)
+    scale = unit_length / costs['TRACK_LENGTH_M']
+
+    totals = np.zeros((len(labels), n_years, len(ACTIVITIES), len(MEASURES)))
+    for k, name in enumerate(('cost', 'hours')):
+        np.add.at(totals[..., k], units[:, 0], calendar[name][row_of_unit] * scale[:, None, None])
+    np.add.at(totals[:, :, ACTIVITIES.index('renewal'), 2], units[:, 0], calendar['renewed_m'][row_of_unit] * scale[:, None])
+
+    frame = labels.loc[np.repeat(np.arange(len(labels)), n_years * len(ACTIVITIES))].reset_index(drop=True)
+    frame['Year'] = np.tile(np.repeat(np.arange(start_year, start_year + n_years), len(ACTIVITIES)), len(labels))
+    frame['Activity'] = np.tile(ACTIVITIES, len(labels) * n_years)
+    frame[MEASURES] = totals.reshape(-1, len(MEASURES))
+    return frame
+
+
+def network_calendar(study, strategy=None, by='Track_Bdl', n_years=10, start_year=SIMULATION_START_YEAR):
+    """
+    Yearly calendar of the curves of a NetworkStudy.
+
+    Parameters:
+    - study: NetworkStudy.
+    - strategy: Strategy of every curve (positions in study.strategies, e.g. plan['Strategy'] of
+                optimise_portfolio or schedule_possessions), defaults to the cheapest strategy of
+                every curve.
+    - by: Inventory column (or list of columns) to total by, None for the whole network.
+    - n_years, start_year: As in section_calendar.
+
+    Returns:
+    - DataFrame as section_calendar
+    """
+    live, tuples = np.unique(study.curve_tuples, return_inverse=True)
+    ledger, results = study.tuple_ledger(live)
+    n_strategies = len(study.strategies)
+    if strategy is None:
+        annuity = results['Annuity'].to_numpy().reshape(len(live), n_strategies)
+        strategy = np.argmin(annuity, axis=1)[tuples]
+    by = [] if by is None else list(np.atleast_1d(by))
+    sections = study.curves[by].copy()
+    sections['Row'] = tuples * n_strategies + np.asarray(strategy, dtype=int)
+    sections['Length_m'] = study.curves[LENGTH_COLUMN].to_numpy(dtype=float)
+    return section_calendar(ledger, results, sections, by=by or None, costs=study.costs, n_years=n_years,
+                            start_year=start_year)
+
+
+def write_calendar(calendar, path=None, output_format=None):
+    """
+    Write a calendar as a columnar file.
+
+    Parameters:
+    - calendar: section_calendar or network_calendar.
+    - path: Output file, defaults to CALENDAR_PATH with the extension of the format.
+    - output_format: 'parquet', 'feather' or 'csv', defaults to the extension of path, else to
+                     parquet when a parquet engine is installed, else csv.
+
+    Returns:
+    - Path of the written file
+    """
+    extension = os.path.splitext(path)[1].lstrip('.').lower() if path else ''
+    if output_format is None:
+        output_format = extension if extension in OUTPUT_FORMATS else ('parquet' if _has_parquet_engine() else 'csv')
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown format {output_format}, choose from {OUTPUT_FORMATS}")
+    path = path or f"{CALENDAR_PATH}.{output_format}"
+    write_results(calendar, path, output_format)
+    return path
+
+
+def main(args):
+    """Write the network calendar for the `calendar` command."""
+    from rail_analysis.network import NetworkStudy, load_network_tables, read_curve_inventory
+
+    start = time.perf_counter()
+    study = NetworkStudy(read_curve_inventory(args.curves), load_network_tables(args.tables),
+                         grinding_freqs=args.grinding_freqs, gauge_freqs=args.gauge_freqs,
+                         profile_low_rail=args.profile, load=args.load)
+    calendar = network_calendar(study, by=args.by, n_years=args.years, start_year=args.start_year)
+    path = write_calendar(calendar, args.output, args.format)
+    yearly = calendar.groupby('Year')[MEASURES].sum()
+    with pd.option_context('display.width', 200):
+        print(yearly.to_string(float_format=lambda x: f'{x:.4g}'))
+    print(f"{len(calendar)} rows written to {path} in {time.perf_counter() - start:.1f} s")
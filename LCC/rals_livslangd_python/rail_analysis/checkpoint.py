@@ -0,0 +1,88 @@
+# rail_analysis/checkpoint.py
+"""
+Checkpoints for long-running sweeps.
+
+rail_analysis.sweep.run_sweep(..., checkpoint=directory) appends the results of every completed
+chunk to directory/results.jsonl (one JSON line per chunk, with the index of each scenario in
+the grid) and writes directory/manifest.json with a hash of the sweep definition (task,
+scenarios and the content of the shared arguments). When the sweep is started again with the
+same directory, the completed scenarios are read back and only the remaining ones are run. A
+checkpoint of a different sweep is refused rather than mixed with the new results.
+"""
+
+import json
+import os
+import time
+
+from rail_analysis.result_cache import json_default, value_digest
+
+MANIFEST_FILE = 'manifest.json'
+RESULTS_FILE = 'results.jsonl'
+
+
+def sweep_digest(task_name, common_digest, records):
+    """Hash of a sweep definition: task, digest of the shared arguments and the scenarios."""
+    return value_digest({'task': task_name, 'common': common_digest, 'scenarios': records})
+
+
+class SweepCheckpoint:
+    """
+    Append-only results file and manifest of one sweep.
+
+    Parameters:
+    - directory: Checkpoint directory, created if needed.
+    - digest: sweep_digest of the sweep.
+    - n_scenarios: Number of scenarios in the sweep (stored in the manifest).
+    """
+
+    def __init__(self, directory, digest, n_scenarios):
+        self.directory = directory
+        self.digest = digest
+        self.manifest_path = os.path.join(directory, MANIFEST_FILE)
+        self.results_path = os.path.join(directory, RESULTS_FILE)
+        os.makedirs(directory, exist_ok=True)
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, encoding='utf-8') as f:
+                manifest = json.load(f)
+            if manifest.get('digest') != digest:
+                raise ValueError(
+                    f"The checkpoint in {directory} belongs to a different sweep "
+                    "(task, scenarios or shared arguments changed); use another directory or remove it"
+                )
+        else:
+            manifest = {'digest': digest, 'n_scenarios': n_scenarios, 'created': time.time()}
+            tmp_path = f"{self.manifest_path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, indent=2)
+            os.replace(tmp_path, self.manifest_path)
+
+    def load(self):
+        """Return the completed results as {scenario index: result row}."""
+        rows = {}
+        if not os.path.exists(self.results_path):
+            return rows
+        with open(self.results_path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    chunk = json.loads(line)
+                except json.JSONDecodeError:
+                    # a chunk that was being written when the sweep stopped
+                    continue
+                rows.update(zip(chunk['index'], chunk['rows']))
+        return rows
+
+    def append(self, indices, rows):
+        """Append the result rows of a completed chunk (indices are the scenario indices)."""
+        line = json.dumps({'index': list(indices), 'rows': list(rows)}, default=json_default)
+        with open(self.results_path, 'a', encoding='utf-8') as f:
+            # start on a new line if the previous write was cut off
+            if f.tell() > 0 and not self._ends_with_newline():
+                f.write('\n')
+            f.write(line + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _ends_with_newline(self):
+        with open(self.results_path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b'\n'
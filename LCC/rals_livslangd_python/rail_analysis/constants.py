@@ -1,5 +1,4 @@
-#from rail_analysis.LCA_simple import get_LCA_renewal_simple
-from rail_analysis.LCA import get_LCA_renewal
+from functools import lru_cache
 
 
 # === GLOBAL PARAMETERS ===
@@ -16,6 +15,9 @@ ANNUAL_MGT = 35
 # discount rate for the annuity calculation
 DISCOUNT_RATE = 0.04
 
+# calendar year of the first simulated month, used for the year-specific CO2e valuation
+SIMULATION_START_YEAR = 2019
+
 
 # lenth of the track in meters
 TRACK_LENGTH_M = 1000
@@ -36,8 +38,9 @@ POSS_GRINDING = 2 # TRACK_LENGTH_M/3000 # 3 km per h, ref. https://www.charmec.c
 POSS_TAMPING = 5
 POSS_GRINDING_TWICE = POSS_GRINDING * 5 / 3
 
-# cost of renewing the track, i.e., both rails and sleepers
-TRACK_RENEWAL_COST = 6500 * TRACK_LENGTH_M + TECH_LIFE_YEARS*get_LCA_renewal('Track', track_length=TRACK_LENGTH_M)
+# cost of renewing the track, i.e., both rails and sleepers (TRACK_RENEWAL_COST),
+# includes the LCA cost and is therefore resolved on first use, see get_track_renewal_cost()
+TRACK_RENEWAL_COST_PER_M = 6500
 
 # cost of renewing a single rail
 RAIL_RENEWAL_COST = 1500 * TRACK_LENGTH_M
@@ -51,4 +54,29 @@ INIT_GAUGE_LEVEL = 1440
 # maximum H value for the rail before renewal is triggered
 H_MAX = 14
 # maximum RCF value for the rail before double grinding (milling) is triggered
-RCF_MAX = 0.5
\ No newline at end of file
+RCF_MAX = 0.5
+
+
+# === LAZY CONSTANTS ===
+
+@lru_cache(maxsize=None)
+def get_track_renewal_cost():
+    """
+    Cost of renewing the track, i.e., both rails and sleepers, including the LCA cost.
+    The LCA data is read on the first call only.
+    """
+    #from rail_analysis.LCA_simple import get_LCA_renewal_simple
+    from rail_analysis.LCA import get_LCA_renewal
+    return TRACK_RENEWAL_COST_PER_M * TRACK_LENGTH_M + TECH_LIFE_YEARS*get_LCA_renewal('Track', track_length=TRACK_LENGTH_M)
+
+
+# constants that need file I/O, resolved on first attribute access
+_LAZY_CONSTANTS = {
+    'TRACK_RENEWAL_COST': get_track_renewal_cost,
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_CONSTANTS:
+        return _LAZY_CONSTANTS[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,370 @@
+# rail_analysis/differential.py
+"""
+Differential harness: runs the archived, current and batched LCC engines on random strategy
+grids and checks that they agree.
+
+Engines computing the same quantities are grouped in families, each with a reference engine:
+- 'rail' (single rail, up to the first renewal): get_annuity_refactored (reference),
+  get_annuity_batch and the archived LCC_rail_unfactored.get_annuity,
+- 'track' (two rails, optimal renewal option): get_annuity_track_refactored (reference) and
+  get_annuity_track_batch,
+- 'track_v0' (two rails, fixed 30-year horizon with rail and track renewals): the archived
+  LCC_track_v0.get_annuity_track (reference) and LCC_track_v1.get_annuity_track_refactored.
+The archived single-rail engine uses other settings (15-year horizon, grinding at 50 SEK/m,
+rail renewed at the end of the horizon); it is checked against the batched engine run with
+these settings (archive_rail_reference) instead of the family reference. LCC_track_v1 mills
+the low rail with its own H-index table where LCC_track_v0 uses the high-rail table, so they
+differ when the low rail is milled; such known differences are reported but do not fail the run.
+The archived engines mill with the H-index of the month after the last grinding, so they cannot
+run grinding interval 12 on the 12-month tables; the grids of their families are drawn from the
+intervals up to ARCHIVE_MAX_GRINDING_FREQ. An engine raising an error is reported with the
+error (as failed, or as known-divergent when it has a known difference) and the run goes on.
+
+For every family, dataset and engine the harness reports the largest relative annuity
+difference, the largest lifetime difference, the number of strategies outside the tolerance
+and the speedup over the reference engine (time of the whole grid; the batched engines get
+their PreparedTables once per dataset, outside the timing). New engines are added with
+register_engine and are then checked on every run:
+
+    register_engine(Engine('my_fast_engine', 'track', my_track_adapter))
+    summary, details = run_differential(n_strategies=20)
+
+Run it with `python -m rail_analysis diff [--strategies 20] [--seed 0]` from the
+rals_livslangd_python folder; the command exits with status 1 on a disagreement.
+"""
+
+import sys
+import tempfile
+import time
+
+import numpy as np  # type: ignore
+import pandas as pd  # type: ignore
+
+from rail_analysis.rail_measures import get_table
+from rail_analysis.prepared_tables import prepare_tables
+from rail_analysis.LCC_single_rail import get_annuity_refactored
+from rail_analysis.LCC_two_rails import get_annuity_track_refactored
+from rail_analysis.LCC_batched import default_costs, get_annuity_batch, get_annuity_track_batch
+from rail_analysis.discounting import constant_discount_factors
+from rail_analysis.benchmarks import DATASETS, load_inputs
+from rail_analysis.arkiv.LCC_rail_unfactored import get_annuity as get_annuity_archived
+from rail_analysis.arkiv.LCC_track_v0 import get_annuity_track as get_annuity_track_v0
+from rail_analysis.arkiv.LCC_track_v1 import get_annuity_track_refactored as get_annuity_track_v1
+from rail_analysis.constants import DISCOUNT_RATE, SELECTED_PROFILE
+
+# settings of the archived single-rail engine (hard-coded in LCC_rail_unfactored.get_annuity)
+ARCHIVE_RAIL_LIFE_YEARS = 15
+ARCHIVE_RAIL_COSTS = {'GRINDING_COST_PER_M': 50}
+
+# longest grinding interval of the archived engines: milling reads month interval + 1 of the tables
+ARCHIVE_MAX_GRINDING_FREQ = 11
+
+# values the random grids are drawn from
+GRINDING_FREQS = np.arange(1, 13)
+GAUGE_FREQS = np.array([12, 24, 36, 48, 60, 72])
+GAUGE_WIDENINGS = np.array([0.5, 1.0, 1.5, 2.0])
+RAILS = np.array(['High', 'Inner'])
+
+
+class Engine:
+    """
+    An LCC engine under test.
+
+    Parameters:
+    - name: Name of the engine.
+    - family: Family of engines it is compared with ('rail', 'track', 'track_v0').
+    - run: Function (inputs, grid) -> DataFrame with the columns 'Annuity' and 'Lifetime', one
+           row per strategy of the grid (see random_grid). inputs holds the interpolated
+           table ('interpolated'), its PreparedTables ('tables') and the radius ('radius').
+    - reference: Optional function with the signature of run giving the expected results,
+                 for engines with other settings than the reference engine of the family.
+    - known_difference: Description of an accepted difference from the reference; mismatches
+                        of the engine are then reported but do not fail the run.
+    - max_grinding_freq: Longest grinding interval (months) the engine can run, None for all
+                         GRINDING_FREQS; the grids of its family are drawn up to it.
+    """
+
+    def __init__(self, name, family, run, reference=None, known_difference=None, max_grinding_freq=None):
+        self.name = name
+        self.family = family
+        self.run = run
+        self.reference = reference
+        self.known_difference = known_difference
+        self.max_grinding_freq = max_grinding_freq
+
+
+def _results(rows):
+    return pd.DataFrame([(float(annuity), float(lifetime)) for annuity, lifetime in rows], columns=['Annuity', 'Lifetime'])
+
+
+def rail_current(inputs, grid):
+    return _results(
+        get_annuity_refactored(
+            inputs['interpolated'], (row.grinding_freq, row.gauge_freq), high_or_low_rail=row.rail,
+            gauge_widening_per_year=row.gauge_widening, radius=inputs['radius']
+        )[:2]
+        for row in grid.itertuples()
+    )
+
+
+def rail_batched(inputs, grid, **kwargs):
+    results = get_annuity_batch(
+        inputs['tables'], grid['grinding_freq'].to_numpy(), grid['gauge_freq'].to_numpy(), grid['rail'].to_numpy(),
+        gauge_widening_per_year=grid['gauge_widening'].to_numpy(), radius=inputs['radius'], **kwargs
+    )
+    return results[['Annuity', 'Lifetime', 'Renewal']]
+
+
+def rail_archived(inputs, grid):
+    data_df = inputs['interpolated']
+    rows = []
+    for row in grid.itertuples():
+        tables = [
+            get_table(data_df, condition, profile=SELECTED_PROFILE, rail=row.rail, radius=inputs['radius'])
+            for condition in ('h-index', 'wear', 'rcf-residual', 'rcf-depth')
+        ]
+        rows.append(get_annuity_archived(
+            tables[0], tables[1], (row.grinding_freq, row.gauge_freq), tables[2], tables[3],
+            gauge_widening_per_year=row.gauge_widening
+        ))
+    return _results(rows)
+
+
+def archive_rail_reference(inputs, grid):
+    """Batched single-rail results with the settings of the archived engine."""
+    n_months = 12 * ARCHIVE_RAIL_LIFE_YEARS
+    results = rail_batched(inputs, grid, track_life=ARCHIVE_RAIL_LIFE_YEARS, costs=ARCHIVE_RAIL_COSTS)
+    # the archived engine renews the rail at the end of the horizon when it is not worn out
+    c = default_costs()
+    end_renewal = (c['RAIL_RENEWAL_COST'] + c['POSS_NEW_RAIL'] * c['CAP_POSS_PER_HOUR']) \
+        * constant_discount_factors(DISCOUNT_RATE, n_months)[n_months] / c['TRACK_LENGTH_M'] / ARCHIVE_RAIL_LIFE_YEARS
+    results['Annuity'] += np.where(results['Renewal'] > 0, 0.0, end_renewal)
+    return results
+
+
+def track_current(inputs, grid):
+    return _results(
+        get_annuity_track_refactored(
+            inputs['interpolated'], row.grinding_freq_low, row.grinding_freq_high, row.gauge_freq,
+            profile_low_rail=row.profile_low_rail, profile_high_rail=row.profile_high_rail,
+            gauge_widening_per_year=row.gauge_widening, radius=inputs['radius']
+        )[:2]
+        for row in grid.itertuples()
+    )
+
+
+def track_batched(inputs, grid):
+    return get_annuity_track_batch(
+        inputs['tables'], grid['grinding_freq_low'].to_numpy(), grid['grinding_freq_high'].to_numpy(),
+        grid['gauge_freq'].to_numpy(), grid['profile_low_rail'].to_numpy(), grid['profile_high_rail'].to_numpy(),
+        gauge_widening_per_year=grid['gauge_widening'].to_numpy(), radius=inputs['radius']
+    )[['Annuity', 'Lifetime']]
+
+
+def _track_archived(engine):
+    def run(inputs, grid):
+        return _results(
+            engine(
+                inputs['interpolated'], row.grinding_freq_low, row.grinding_freq_high, row.gauge_freq,
+                profile_low_rail=row.profile_low_rail, profile_high_rail=row.profile_high_rail,
+                gauge_widening_per_year=row.gauge_widening, radius=inputs['radius']
+            )[:2]
+            for row in grid.itertuples()
+        )
+    return run
+
+
+# reference engine of every family
+REFERENCE_ENGINES = {
+    'rail': 'get_annuity_refactored',
+    'track': 'get_annuity_track_refactored',
+    'track_v0': 'arkiv.LCC_track_v0',
+}
+
+ENGINES = [
+    Engine('get_annuity_refactored', 'rail', rail_current),
+    Engine('get_annuity_batch', 'rail', rail_batched),
+    Engine('arkiv.LCC_rail_unfactored', 'rail', rail_archived, reference=archive_rail_reference,
+           max_grinding_freq=ARCHIVE_MAX_GRINDING_FREQ),
+    Engine('get_annuity_track_refactored', 'track', track_current),
+    Engine('get_annuity_track_batch', 'track', track_batched),
+    Engine('arkiv.LCC_track_v0', 'track_v0', _track_archived(get_annuity_track_v0),
+           max_grinding_freq=ARCHIVE_MAX_GRINDING_FREQ),
+    Engine('arkiv.LCC_track_v1', 'track_v0', _track_archived(get_annuity_track_v1),
+           known_difference='mills the low rail with the low-rail H-index table (v0: high-rail table)',
+           max_grinding_freq=ARCHIVE_MAX_GRINDING_FREQ),
+]
+
+
+def register_engine(engine):
+    """Add an engine to the harness (replacing an engine with the same name)."""
+    if engine.family not in REFERENCE_ENGINES:
+        raise ValueError(f"Unknown family {engine.family}, choose from {list(REFERENCE_ENGINES)}")
+    ENGINES[:] = [e for e in ENGINES if e.name != engine.name] + [engine]
+
+
+def random_grid(family, profiles, n, rng, max_grinding_freq=None):
+    """
+    Random strategy grid of a family.
+
+    Parameters:
+    - family: 'rail' or a two-rail family.
+    - profiles: Profiles the two-rail strategies are drawn from (single rails use SELECTED_PROFILE,
+                the only profile of get_annuity_refactored).
+    - n: Number of strategies.
+    - rng: numpy Generator.
+    - max_grinding_freq: Longest grinding interval drawn, None for all GRINDING_FREQS.
+
+    Returns:
+    - DataFrame with the columns grinding_freq, gauge_freq, gauge_widening, rail (single rail)
+      or grinding_freq_low, grinding_freq_high, gauge_freq, gauge_widening, profile_low_rail,
+      profile_high_rail (two rails)
+    """
+    grinding_freqs = GRINDING_FREQS if max_grinding_freq is None else GRINDING_FREQS[GRINDING_FREQS <= max_grinding_freq]
+    common = {'gauge_freq': rng.choice(GAUGE_FREQS, n), 'gauge_widening': rng.choice(GAUGE_WIDENINGS, n)}
+    if family == 'rail':
+        return pd.DataFrame({'grinding_freq': rng.choice(grinding_freqs, n), **common, 'rail': rng.choice(RAILS, n)})
+    profiles = np.asarray(sorted(profiles), dtype=object)
+    return pd.DataFrame({
+        'grinding_freq_low': rng.choice(grinding_freqs, n),
+        'grinding_freq_high': rng.choice(grinding_freqs, n),
+        **common,
+        'profile_low_rail': rng.choice(profiles, n),
+        'profile_high_rail': rng.choice(profiles, n),
+    })
+
+
+def compare_results(results, expected, rtol=1e-6, atol=1e-9):
+    """
+    Per-strategy differences of an engine's results from the expected results.
+
+    Returns:
+    - DataFrame with 'Annuity', 'Expected_Annuity', 'RelDiff_Annuity', 'Lifetime',
+      'Expected_Lifetime', 'AbsDiff_Lifetime' and 'Agree'
+    """
+    annuity = results['Annuity'].to_numpy(dtype=float)
+    expected_annuity = expected['Annuity'].to_numpy(dtype=float)
+    lifetime = results['Lifetime'].to_numpy(dtype=float)
+    expected_lifetime = expected['Lifetime'].to_numpy(dtype=float)
+    return pd.DataFrame({
+        'Annuity': annuity,
+        'Expected_Annuity': expected_annuity,
+        'RelDiff_Annuity': np.abs(annuity - expected_annuity) / np.maximum(np.abs(expected_annuity), atol),
+        'Lifetime': lifetime,
+        'Expected_Lifetime': expected_lifetime,
+        'AbsDiff_Lifetime': np.abs(lifetime - expected_lifetime),
+        'Agree': (np.isclose(annuity, expected_annuity, rtol=rtol, atol=atol)
+                  & np.isclose(lifetime, expected_lifetime, rtol=0, atol=1e-9)),
+    })
+
+
+def run_differential(n_strategies=10, datasets=None, families=None, seed=0, rtol=1e-6, atol=1e-9,
+                     synthetic_scale=3, progress=print):
+    """
+    Run all engines on random grids and compare them.
+
+    Parameters:
+    - n_strategies: Number of strategies per family and dataset.
+    - datasets: Datasets ('R1465', 'R495', 'synthetic'), defaults to all.
+    - families: Families to run, defaults to all.
+    - seed: Seed of the random grids.
+    - rtol, atol: Tolerance on the annuity (lifetimes must agree to 1e-9 years).
+    - synthetic_scale: Number of profiles of the synthetic dataset (see benchmarks.synthetic_table).
+    - progress: Function called with progress messages, None for no messages.
+
+    Returns:
+    - summary: DataFrame with one row per family, dataset and engine: 'Strategies', 'Seconds',
+      'Speedup' (over the reference engine), 'MaxRelDiff_Annuity', 'MaxAbsDiff_Lifetime',
+      'Mismatches', 'Agree', 'Known_Difference' and 'Error' (message of an engine that raised,
+      or whose reference raised; all its strategies then count as mismatches)
+    - details: DataFrame with the per-strategy comparison (see compare_results) and the grid
+    """
+    datasets = list(datasets or [*DATASETS, 'synthetic'])
+    families = list(families or REFERENCE_ENGINES)
+    progress = progress or (lambda message: None)
+    rng = np.random.default_rng(seed)
+
+    summary = []
+    details = []
+    with tempfile.TemporaryDirectory() as directory:
+        for dataset in datasets:
+            inputs = load_inputs(dataset, synthetic_scale, directory)
+            inputs['radius'] = str(inputs['interpolated']['Radius'].iloc[0])
+            inputs['tables'] = prepare_tables(inputs['interpolated'])
+            profiles = inputs['interpolated']['Profile'].unique()
+            for family in families:
+                engines = [e for e in ENGINES if e.family == family]
+                limits = [e.max_grinding_freq for e in engines if e.max_grinding_freq is not None]
+                grid = random_grid(family, profiles, n_strategies, rng, min(limits) if limits else None)
+                timings = {}
+                results = {}
+                errors = {}
+                for engine in engines:
+                    start = time.perf_counter()
+                    try:
+                        results[engine.name] = engine.run(inputs, grid).reset_index(drop=True)
+                    except Exception as error:
+                        errors[engine.name] = f"{type(error).__name__}: {error}"
+                    timings[engine.name] = time.perf_counter() - start
+                reference = REFERENCE_ENGINES[family]
+                for engine in engines:
+                    row = {
+                        'Family': family,
+                        'Dataset': dataset,
+                        'Engine': engine.name,
+                        'Strategies': len(grid),
+                        'Seconds': timings[engine.name],
+                        'Speedup': timings[reference] / timings[engine.name],
+                        'MaxRelDiff_Annuity': np.nan,
+                        'MaxAbsDiff_Lifetime': np.nan,
+                        'Mismatches': len(grid),
+                        'Known_Difference': engine.known_difference,
+                        'Error': errors.get(engine.name),
+                    }
+                    if row['Error'] is None:
+                        try:
+                            expected = engine.reference(inputs, grid) if engine.reference else results[reference]
+                        except KeyError:
+                            row['Error'] = f"reference {reference} failed"
+                        except Exception as error:
+                            row['Error'] = f"reference: {type(error).__name__}: {error}"
+                    if row['Error'] is None:
+                        comparison = compare_results(results[engine.name], expected, rtol, atol)
+                        details.append(pd.concat([
+                            pd.DataFrame({'Family': family, 'Dataset': dataset, 'Engine': engine.name}, index=grid.index),
+                            grid, comparison
+                        ], axis=1))
+                        row['MaxRelDiff_Annuity'] = comparison['RelDiff_Annuity'].max()
+                        row['MaxAbsDiff_Lifetime'] = comparison['AbsDiff_Lifetime'].max()
+                        row['Mismatches'] = int((~comparison['Agree']).sum())
+                        progress(
+                            f"{family} [{dataset}] {engine.name}: {row['Seconds']:.3f} s, "
+                            f"x{row['Speedup']:.1f}, {row['Mismatches']} mismatches"
+                        )
+                    else:
+                        progress(f"{family} [{dataset}] {engine.name}: failed ({row['Error']})")
+                    row['Agree'] = row['Mismatches'] == 0
+                    summary.append(row)
+    columns = ['Family', 'Dataset', 'Engine', 'Strategies', 'Seconds', 'Speedup', 'MaxRelDiff_Annuity',
+               'MaxAbsDiff_Lifetime', 'Mismatches', 'Agree', 'Known_Difference', 'Error']
+    details = pd.concat(details, ignore_index=True) if details else pd.DataFrame()
+    return pd.DataFrame(summary, columns=columns), details
+
+
+def main(args):
+    """Run the harness for the `diff` command; returns the exit status."""
+    summary, details = run_differential(
+        n_strategies=args.strategies, datasets=args.datasets, families=args.families, seed=args.seed,
+        rtol=args.rtol
+    )
+    with pd.option_context('display.width', 200, 'display.max_columns', None):
+        print(summary.to_string(index=False, float_format=lambda x: f'{x:.4g}'))
+    if args.details:
+        details.to_csv(args.details, index=False)
+    failed = summary[~summary['Agree'] & summary['Known_Difference'].isna()]
+    if not failed.empty:
+        print(f"{int(failed['Mismatches'].sum())} strategies outside the tolerance", file=sys.stderr)
+        for row in failed[failed['Error'].notna()].itertuples():
+            print(f"{row.Family} [{row.Dataset}] {row.Engine} failed: {row.Error}", file=sys.stderr)
+        return 1
+    return 0
@@ -0,0 +1,114 @@
+# rail_analysis/discounting.py
+"""
+Discount-factor and CO2e-price curves for the LCC simulations.
+
+The simulators take a per-month discount-factor vector (index m is the factor for
+simulation month m, index 0 is 1.0) and an optional per-year CO2e price path (index y is
+the price in SEK/kg CO2e for simulation year y, starting at 0). Both are computed once per
+scenario and applied by multiplication, so constant rates, declining-rate schedules and
+rising carbon prices all cost the same inside the simulation loop.
+
+Example (declining rate: 3.5 % for the first 30 years, then 2.5 %; CO2e price rising 3 % per year):
+
+    discount_factors = declining_discount_factors([(0, 0.035), (30, 0.025)])
+    co2_prices = rising_co2_price_path(growth_rate=0.03)
+    get_annuity_track_refactored(data_df, 6, 5, 48,
+                                 discount_factors=discount_factors, co2_prices=co2_prices)
+"""
+
+import numpy as np  # type: ignore
+
+from rail_analysis.constants import DISCOUNT_RATE, MAX_MONTHS, SIMULATION_START_YEAR, TECH_LIFE_YEARS
+
+
+def constant_discount_factors(rate=DISCOUNT_RATE, n_months=MAX_MONTHS):
+    """
+    Discount factors 1 / (1 + rate) ** (m / 12) for the months m = 0 ... n_months.
+
+    Parameters:
+    - rate: Annual discount rate.
+    - n_months: Number of simulated months.
+
+    Returns:
+    - np.ndarray of length n_months + 1
+    """
+    months = np.arange(n_months + 1)
+    return 1 / (1 + rate) ** (months / 12)
+
+
+def declining_discount_factors(schedule, n_months=MAX_MONTHS):
+    """
+    Discount factors for a piecewise-constant (e.g. declining) annual discount rate.
+
+    Parameters:
+    - schedule: List of (start_year, rate) pairs, sorted by start year and starting at year 0,
+                e.g. [(0, 0.035), (30, 0.025)]. The rate applies from start_year until the
+                start of the next pair.
+    - n_months: Number of simulated months.
+
+    Returns:
+    - np.ndarray of length n_months + 1
+    """
+    start_years = [start for start, _ in schedule]
+    if not start_years or start_years[0] != 0 or sorted(start_years) != start_years:
+        raise ValueError("schedule must be sorted by start year and start at year 0")
+
+    months = np.arange(1, n_months + 1)
+    # rate of the year each month belongs to
+    year_of_month = (months - 1) // 12
+    rates = np.asarray([rate for _, rate in schedule], dtype=float)
+    rate_per_month = rates[np.searchsorted(start_years, year_of_month, side='right') - 1]
+
+    factors = np.ones(n_months + 1)
+    factors[1:] = np.cumprod((1 + rate_per_month) ** (-1 / 12))
+    return factors
+
+
+def co2_price_path(start_year=SIMULATION_START_YEAR, n_years=TECH_LIFE_YEARS, lca_model=None):
+    """
+    CO2e prices (SEK/kg) for the simulation years from the valuation curve (co2_valuation.csv).
+
+    Parameters:
+    - start_year: Calendar year of the first simulated month.
+    - n_years: Number of simulated years.
+    - lca_model: LCAModel to read the valuation from, defaults to get_LCA_model().
+
+    Returns:
+    - np.ndarray of length n_years
+    """
+    if lca_model is None:
+        from rail_analysis.LCA import get_LCA_model
+        lca_model = get_LCA_model()
+    return np.asarray(lca_model.co2_price(start_year + np.arange(n_years)), dtype=float)
+
+
+def rising_co2_price_path(growth_rate, start_year=SIMULATION_START_YEAR, n_years=TECH_LIFE_YEARS, base_price=None, lca_model=None):
+    """
+    CO2e prices (SEK/kg) growing at a constant annual rate, e.g. for rising carbon-price scenarios.
+
+    Parameters:
+    - growth_rate: Annual growth rate of the CO2e price.
+    - start_year: Calendar year of the first simulated month.
+    - n_years: Number of simulated years.
+    - base_price: Price in the first year, defaults to the valuation curve in start_year.
+    - lca_model: LCAModel to read the base price from, defaults to get_LCA_model().
+
+    Returns:
+    - np.ndarray of length n_years
+    """
+    if base_price is None:
+        base_price = co2_price_path(start_year, 1, lca_model)[0]
+    return base_price * (1 + growth_rate) ** np.arange(n_years)
+
+
+def check_discount_factors(discount_factors, n_months):
+    """
+    Return the discount factors as an array, or the constant-rate factors if None,
+    and check that they cover the n_months simulated months.
+    """
+    if discount_factors is None:
+        return constant_discount_factors(DISCOUNT_RATE, n_months)
+    discount_factors = np.asarray(discount_factors, dtype=float)
+    if len(discount_factors) < n_months + 1:
+        raise ValueError(f"discount_factors must cover months 0 ... {n_months}, got {len(discount_factors)} values")
+    return discount_factors
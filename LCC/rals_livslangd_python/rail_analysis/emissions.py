@@ -0,0 +1,112 @@
+# rail_analysis/emissions.py
+"""
+Emissions ledger for the LCC simulations.
+
+The simulators record every maintenance event (grinding, milling, tamping, rail renewal)
+in an EmissionsLedger during the same monthly pass that accumulates the costs. Each event
+is converted to kg CO2e with the event factors of the LCA model and valued with the CO2e
+price of the calendar year in which it happens (co2_valuation.csv, or a per-year price
+path from rail_analysis.discounting), discounted like the other costs. With the default event
+factors (rail_analysis.LCA.DEFAULT_EVENT_EMISSION_FACTORS) only rail renewals carry emissions;
+grinding, milling and tamping count once their factors are set on a model passed as lca_model
+(e.g. get_LCA_model().set_event_factor('grinding', 0.05)).
+"""
+
+from rail_analysis.constants import DISCOUNT_RATE, SIMULATION_START_YEAR, TRACK_LENGTH_M
+
+
+class EmissionsLedger:
+    """
+    Collects the emission events of one simulation.
+
+    Parameters:
+    - lca_model: LCAModel providing the event factors and the CO2e valuation
+                 (defaults to rail_analysis.LCA.get_LCA_model()).
+    - track_length: Length of the track section in meters.
+    - start_year: Calendar year of the first simulated month.
+    - co2_prices: Optional CO2e prices (SEK/kg) per simulation year (index 0 = start_year),
+                  overriding the valuation curve of the LCA model.
+    - discount_factors: Optional discount factors per simulation month (index 0 = month 0),
+                        used when record() is called without a discount factor.
+    """
+
+    def __init__(self, lca_model=None, track_length=TRACK_LENGTH_M, start_year=SIMULATION_START_YEAR,
+                 co2_prices=None, discount_factors=None):
+        if lca_model is None:
+            from rail_analysis.LCA import get_LCA_model
+            lca_model = get_LCA_model()
+        self.lca_model = lca_model
+        self.track_length = track_length
+        self.start_year = start_year
+        self.co2_prices = co2_prices
+        self.discount_factors = discount_factors
+        self.events = []
+
+    def __len__(self):
+        return len(self.events)
+
+    def record(self, month, event, rail, discount_factor=None):
+        """
+        Record one maintenance event.
+
+        Parameters:
+        - month: Simulation month of the event (1-based).
+        - event: 'grinding', 'milling', 'tamping' or 'rail_renewal'.
+        - rail: 'H', 'L', 'High', 'Inner' or 'Track' (shared events such as tamping).
+        - discount_factor: Discount factor applied to the CO2e cost, defaults to the ledger's
+                           discount factors or 1 / (1 + DISCOUNT_RATE) ** (month / 12).
+        """
+        if discount_factor is None:
+            if self.discount_factors is not None:
+                discount_factor = self.discount_factors[month]
+            else:
+                discount_factor = 1 / (1 + DISCOUNT_RATE) ** (month / 12)
+        year = self.start_year + (month - 1) // 12
+        co2e_kg = self.lca_model.event_factor(event) * self.track_length
+        if co2e_kg == 0:
+            co2_price = 0.0  # nothing to value
+        elif self.co2_prices is not None:
+            co2_price = float(self.co2_prices[(month - 1) // 12])
+        else:
+            co2_price = float(self.lca_model.co2_price(year))
+        self.events.append({
+            'Month': month,
+            'Year': year,
+            'Event': event,
+            'Rail': rail,
+            'CO2e_kg': co2e_kg,
+            'CO2_cost': co2e_kg * co2_price * discount_factor,
+        })
+
+    def truncate(self, n_events):
+        """Keep only the first n_events events."""
+        del self.events[n_events:]
+
+    def totals(self):
+        """Return the total emissions (kg CO2e) and the total discounted CO2e cost (SEK)."""
+        return (
+            sum(event['CO2e_kg'] for event in self.events),
+            sum(event['CO2_cost'] for event in self.events),
+        )
+
+
+def summarise_emissions(events, horizon, track_length=TRACK_LENGTH_M):
+    """
+    Summarise the events of an emissions ledger next to the annuity of the same simulation.
+
+    Parameters:
+    - events: List of events as returned by the simulators with track_emissions=True.
+    - horizon: Lifetime/horizon in years that the annuity is computed over.
+    - track_length: Length of the track section in meters.
+
+    Returns:
+    - dict with 'CO2e_kg' (total emissions), 'CO2_cost' (total discounted CO2e cost, SEK)
+      and 'CO2_annuity' (SEK/m/year, comparable with the LCC annuity).
+    """
+    co2e_kg = sum(event['CO2e_kg'] for event in events)
+    co2_cost = sum(event['CO2_cost'] for event in events)
+    return {
+        'CO2e_kg': co2e_kg,
+        'CO2_cost': co2_cost,
+        'CO2_annuity': co2_cost / track_length / horizon if horizon > 0 else 0.0,
+    }
@@ -0,0 +1,756 @@
+# rail_analysis/network.py
+"""
+Network evaluation: the LCC of every curve of the track inventory.
+
+The curve inventory (data matching and clustering/matched_curves_within_tracks.csv, made by
+test_matching_curves.ipynb) gives the radius, length and track type of every curve. Every
+curve is mapped to the parameters of the batched engine (profile of both rails, radius, axle
+load and gauge widening); curves with the same parameters form one parameter tuple, which is
+simulated once for all strategies of the grid with the batched engine (through
+rail_analysis.sweep). The cheapest strategy of each tuple is then expanded back to its curves,
+and the annual cost of a curve is its annuity times its length (Curve_Langd_m).
+
+Radii are rounded to the radius grid of the tables (PreparedTables.grid_radius) and clamped to
+the tabulated range, so a network of some 20000 curves has a few hundred tuples and the
+network totals take seconds. Run it with
+
+    python -m rail_analysis network [--curves CSV] [--tables CSV ...] [--by Track_Bdl] [--output results.csv]
+
+from the rals_livslangd_python folder.
+
+Example (gauge widening by sleeper type):
+    tables = prepare_tables(data_df_interpolated)
+    results = evaluate_network(
+        read_curve_inventory(), tables,
+        gauge_widening_per_year=lambda curves: np.where(curves['Track_Sliper_typ'] == 'T', 1.5, 1.0)
+    )
+    network_totals(results, by='Track_Bdl')
+"""
+
+import hashlib
+import os
+import time
+
+import numpy as np  # type: ignore
+import pandas as pd  # type: ignore
+
+from rail_analysis.prepared_tables import DEFAULT_LOAD, TANGENT
+from rail_analysis.LCC_batched import EventLedger, default_costs, price_track_ledger, simulate_track_strategies
+from rail_analysis.sweep import run_sweep, scenario_grid, track_grid_task
+from rail_analysis.constants import SELECTED_GAUGE_WIDENING, SELECTED_PROFILE, TECH_LIFE_YEARS
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# curve inventory of the network, written by test_matching_curves.ipynb
+NETWORK_CURVES_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(_ROOT)), 'data matching and clustering', 'matched_curves_within_tracks.csv'
+)
+
+# degradation tables of the network command: file, or file:radius for a file labelled with a wrong radius
+DEFAULT_TABLES = [
+    os.path.join(_ROOT, 'data', 'raw', 'CM2025', 'BDL_111_results_JL_R1465.csv'),
+    os.path.join(_ROOT, 'data', 'raw', 'CM2025', 'BDL_111_results_JL_R495.csv') + ':495',
+]
+
+# inventory columns with the length and the (signed) radius of a curve, in metres
+LENGTH_COLUMN = 'Curve_Langd_m'
+RADIUS_COLUMN = 'Curve_Radie_m'
+
+# inventory columns carried into the results, when present
+KEEP_COLUMNS = ['Track_Bdl', 'Track_UNE', 'Track_Rälmodell', 'Track_Räl_vikt(kg/m)', 'Track_Sliper_typ']
+
+# parameters of a curve, i.e. the columns of a parameter tuple (get_annuity_track_batch arguments)
+PARAMETER_COLUMNS = ['profile_low_rail', 'profile_high_rail', 'radius', 'load', 'gauge_widening_per_year']
+
+# strategy columns and results kept for every curve
+STRATEGY_COLUMNS = ['grinding_freq_low', 'grinding_freq_high', 'gauge_freq']
+RESULT_COLUMNS = ['Annuity', 'Lifetime', 'Option']
+
+
+def read_curve_inventory(path=NETWORK_CURVES_PATH):
+    """The curve inventory, one row per curve (see NETWORK_CURVES_PATH)."""
+    return pd.read_csv(path, index_col=0)
+
+
+def curve_parameters(
+    curves,
+    tables,
+    profile_low_rail=SELECTED_PROFILE,
+    profile_high_rail=None,
+    load=DEFAULT_LOAD,
+    gauge_widening_per_year=SELECTED_GAUGE_WIDENING,
+    radius=None,
+    radius_step=None,
+):
+    """
+    Map every curve to the parameters of the batched engine.
+
+    Every parameter is a scalar, an array with one value per curve, or a function (curves) ->
+    array, e.g. to derive the profile from Track_Rälmodell or the gauge widening from
+    Track_Sliper_typ.
+
+    Parameters:
+    - curves: Curve inventory (see read_curve_inventory).
+    - tables: PreparedTables the curves are evaluated on.
+    - profile_low_rail, profile_high_rail: Rail profiles, the high rail defaults to the low rail.
+    - load: Axle load (tonnes).
+    - gauge_widening_per_year: Gauge widening (mm/year).
+    - radius: Curve radius (m), defaults to the absolute value of Curve_Radie_m. Radius 0 or
+              NaN is straight track.
+    - radius_step: Round the radii to this step (m) before the radius grid of the tables, for
+                   fewer parameter tuples. Defaults to the grid of the tables.
+
+    Returns:
+    - DataFrame with the index of `curves` and the PARAMETER_COLUMNS, the radius as the key of
+      a table (tabulated, or on the radius grid)
+    """
+    def values(value):
+        return _curve_values(curves, value)
+
+    low = values(profile_low_rail)
+    high = low if profile_high_rail is None else values(profile_high_rail)
+    return pd.DataFrame({
+        'profile_low_rail': low,
+        'profile_high_rail': high,
+        'radius': radius_keys(tables, low, high, curve_radii(curves, radius, radius_step)),
+        'load': values(load).astype(float),
+        'gauge_widening_per_year': values(gauge_widening_per_year).astype(float),
+    }, index=curves.index)
+
+
+def _curve_values(curves, value):
+    """One value per curve from a scalar, an array or a function (curves) -> array."""
+    value = value(curves) if callable(value) else value
+    return np.broadcast_to(np.asarray(value, dtype=object), (len(curves),))
+
+
+def curve_radii(curves, radius=None, radius_step=None):
+    """Curve radii (m, 0 for straight track), see curve_parameters."""
+    if radius is None:
+        radii = np.abs(curves[RADIUS_COLUMN].to_numpy(dtype=float))
+    else:
+        radii = _curve_values(curves, radius).astype(float)
+    radii = np.where(np.isnan(radii), 0.0, radii)
+    if radius_step:
+        radii = np.round(radii / radius_step) * radius_step
+    return radii
+
+
+def radius_keys(tables, profile_low_rail, profile_high_rail, radii):
+    """Table radius keys of curves with the given profiles and radii (m), see curve_parameters."""
+    # radius keys per (profiles, radius), a few thousand at most for a network
+    cases = pd.DataFrame({'low': profile_low_rail, 'high': profile_high_rail, 'radius': radii})
+    codes, unique = pd.MultiIndex.from_frame(cases).factorize()
+    tabulated = {}
+    for pair in set((pl, ph) for pl, ph, _ in unique):
+        tabulated[pair] = {}
+        for profile in pair:
+            for rail in ('High', 'Inner'):
+                tabulated[pair].update(zip(*tables.tabulated_radii(profile, rail)))
+    keys = np.array([_radius_key(tables, tabulated[pl, ph], r) for pl, ph, r in unique], dtype=object)
+    return keys[codes]
+
+
+def _radius_key(tables, tabulated, radius):
+    """
+    Table radius key for a curve radius (m, 0 for straight track), given the tabulated radii
+    {radius key: curvature} of the profiles: the tabulated radius for radii beyond the tabulated
+    range (the tables are clamped there), the nearest tabulated radius without radius
+    interpolation, else the key on the radius grid.
+    """
+    if not tabulated:
+        return None  # tables without radius
+    curvature = 0.0 if radius == 0 or not np.isfinite(radius) else 1 / radius
+    keys = sorted(tabulated, key=tabulated.get)
+    curvatures = np.array([tabulated[key] for key in keys])
+    if len(keys) < 2 or not tables.interpolate_radii:
+        return keys[int(np.argmin(np.abs(curvatures - curvature)))]
+    if curvature <= curvatures[0]:
+        return keys[0]
+    if curvature >= curvatures[-1]:
+        return keys[-1]
+    return tables.grid_radius(TANGENT if curvature == 0 else 1 / curvature)
+
+
+def parameter_tuples(parameters):
+    """
+    Group curves with the same parameters.
+
+    Returns:
+    - (tuples, codes): DataFrame with one row per unique parameter tuple, and for every curve
+      the row of its tuple
+    """
+    parameters = parameters[PARAMETER_COLUMNS]
+    # tuples in the order of their first curve, as numbered by ngroup(sort=False)
+    codes = parameters.groupby(PARAMETER_COLUMNS, sort=False, dropna=False).ngroup().to_numpy()
+    return parameters.drop_duplicates().reset_index(drop=True), codes
+
+
+def simulate_tuples(
+    tuples,
+    tables,
+    grinding_freqs=range(1, 13),
+    gauge_freqs=(48,),
+    same_grinding=False,
+    track_life=TECH_LIFE_YEARS,
+    discount_factors=None,
+    costs=None,
+    workers=1,
+    cache=None,
+    progress=None,
+):
+    """
+    Simulate every parameter tuple for all strategies of the grid and keep the cheapest.
+
+    Parameters:
+    - tuples: DataFrame with the PARAMETER_COLUMNS (see parameter_tuples).
+    - tables: PreparedTables.
+    - grinding_freqs: Grinding intervals (months) of the low and the high rail.
+    - gauge_freqs: Tamping intervals (months).
+    - same_grinding: Grind both rails with the same interval.
+    - track_life, discount_factors, costs: As in get_annuity_track_batch.
+    - workers, cache, progress: As in run_sweep.
+
+    Returns:
+    - DataFrame with one row per tuple: the PARAMETER_COLUMNS, the STRATEGY_COLUMNS of the
+      cheapest strategy and its results (Annuity in SEK/m/year, Lifetime, Option, ...)
+    """
+    strategies = strategy_grid(grinding_freqs, gauge_freqs, same_grinding)
+    scenarios = tuples[PARAMETER_COLUMNS].reset_index(drop=True).merge(strategies, how='cross')
+    common = {'tables': tables, 'track_life': track_life, 'costs': {**default_costs(), **(costs or {})}}
+    if discount_factors is not None:
+        common['discount_factors'] = discount_factors
+
+    _add_tuple_tables(tables, tuples)
+    results = run_sweep(track_grid_task, scenarios, common=common, workers=workers, cache=cache,
+                        vectorised=True, progress=progress, label='network')
+    # rows of a tuple are consecutive, n_strategies per tuple
+    annuity = results['Annuity'].to_numpy().reshape(len(tuples), len(strategies))
+    best = np.arange(len(tuples)) * len(strategies) + np.argmin(annuity, axis=1)
+    best = results.iloc[best].reset_index(drop=True)
+    best.attrs = {'strategies': len(strategies), 'simulated': len(scenarios)}
+    return best
+
+
+def strategy_grid(grinding_freqs=range(1, 13), gauge_freqs=(48,), same_grinding=False):
+    """Strategies evaluated for every parameter tuple: DataFrame with the STRATEGY_COLUMNS."""
+    grinding_freqs = list(grinding_freqs)
+    if same_grinding:
+        freqs = pd.DataFrame({'grinding_freq_low': grinding_freqs, 'grinding_freq_high': grinding_freqs})
+    else:
+        freqs = scenario_grid(grinding_freq_low=grinding_freqs, grinding_freq_high=grinding_freqs)
+    return freqs.merge(pd.DataFrame({'gauge_freq': list(gauge_freqs)}), how='cross')
+
+
+def _add_tuple_tables(tables, tuples):
+    """Add the radius-interpolated tables of the tuples in bulk rather than one by one in the simulation."""
+    profiles = set(tuples['profile_low_rail']) | set(tuples['profile_high_rail'])
+    tables.add_radii(tuples['radius'].dropna().unique(), profiles=profiles, loads=tuples['load'].unique())
+
+
+def evaluate_network(
+    curves,
+    tables,
+    grinding_freqs=range(1, 13),
+    gauge_freqs=(48,),
+    same_grinding=False,
+    track_life=TECH_LIFE_YEARS,
+    discount_factors=None,
+    costs=None,
+    workers=1,
+    cache=None,
+    progress=None,
+    **parameters,
+):
+    """
+    LCC of every curve of a network with its cheapest strategy.
+
+    Parameters:
+    - curves: Curve inventory (see read_curve_inventory).
+    - tables: PreparedTables.
+    - grinding_freqs, gauge_freqs, same_grinding: Strategy grid, see simulate_tuples. A single
+      grinding and tamping interval evaluates this strategy on the whole network.
+    - track_life, discount_factors, costs: As in get_annuity_track_batch.
+    - workers, cache, progress: As in run_sweep.
+    - parameters: Keyword arguments of curve_parameters (profiles, load, gauge widening, ...).
+
+    Returns:
+    - DataFrame with the index of `curves`: the KEEP_COLUMNS of the inventory, 'Length_m', the
+      parameters, 'Tuple' (row of the parameter tuple), the strategy, the RESULT_COLUMNS and
+      'Annual_Cost' (SEK/year = annuity x length). The number of curves, tuples and simulated
+      strategies are in results.attrs.
+    """
+    curve_params = curve_parameters(curves, tables, **parameters)
+    tuples, codes = parameter_tuples(curve_params)
+    best = simulate_tuples(tuples, tables, grinding_freqs, gauge_freqs, same_grinding, track_life,
+                           discount_factors, costs, workers, cache, progress)
+    return expand_to_curves(curves, curve_params, codes, best)
+
+
+def expand_to_curves(curves, parameters, codes, tuple_results):
+    """Per-curve results from the results of the parameter tuples (see evaluate_network)."""
+    results = curves[[column for column in KEEP_COLUMNS if column in curves]].copy()
+    results['Length_m'] = curves[LENGTH_COLUMN].to_numpy(dtype=float)
+    results[PARAMETER_COLUMNS] = parameters[PARAMETER_COLUMNS]
+    results['Tuple'] = codes
+    columns = STRATEGY_COLUMNS + [column for column in RESULT_COLUMNS if column in tuple_results]
+    for column in columns:
+        results[column] = tuple_results[column].to_numpy()[codes]
+    results['Annual_Cost'] = results['Annuity'] * results['Length_m']
+    results.attrs = {'curves': len(results), 'tuples': len(tuple_results), **tuple_results.attrs}
+    return results
+
+
+def network_totals(results, by=None):
+    """
+    Network totals of evaluate_network results, optionally per group (e.g. by='Track_Bdl').
+
+    Returns:
+    - DataFrame with the number of curves, the length (m), the annual cost (SEK/year) and the
+      length-weighted annuity (SEK/m/year) and lifetime (years); one row per group, or one row
+    """
+    weighted = results.assign(_lifetime_m=results['Lifetime'] * results['Length_m'])
+    groups = weighted.groupby(by, sort=True, dropna=False) if by is not None else weighted.groupby(np.zeros(len(weighted)))
+    totals = groups.agg(
+        Curves=('Length_m', 'size'),
+        Length_m=('Length_m', 'sum'),
+        Annual_Cost=('Annual_Cost', 'sum'),
+        _lifetime_m=('_lifetime_m', 'sum'),
+    )
+    totals['Annuity'] = totals['Annual_Cost'] / totals['Length_m']
+    totals['Lifetime'] = totals.pop('_lifetime_m') / totals['Length_m']
+    return totals if by is not None else totals.reset_index(drop=True)
+
+
+# events priced by a cost constant (see price_track_ledger); the other constants price every strategy
+PRICE_EVENTS = {
+    'GRINDING_COST_PER_M': ('grind', 'mill'),
+    'POSS_GRINDING': ('grind',),
+    'POSS_GRINDING_TWICE': ('mill',),
+    'TAMPING_COST_PER_M': ('tamp',),
+    'POSS_TAMPING': ('tamp',),
+}
+
+# EventLedger arrays stored by NetworkStudy, in the order of the EventLedger arguments
+_LEDGER_ARRAYS = ('grind', 'mill', 'renew', 'tamp', 'first_renewal')
+
+
+class NetworkStudy:
+    """
+    Network evaluation that recomputes only what a change affects, for what-if iterations.
+
+    The study keeps the EventLedger of every (parameter tuple, strategy) it simulated and the
+    tables every tuple depends on: the tabulated table of a rail, or all tabulated tables of
+    the (profile, rail) for a radius- or load-interpolated table.
+    - update_curves: new parameters for some curves (e.g. a re-measured gauge widening); only
+      tuples that were not simulated before are simulated.
+    - update_tables: new PreparedTables; only the tuples depending on a changed, added or
+      removed tabulated table are simulated again (and new tuples of curves whose radius now
+      maps to another table).
+    - update_costs, update_discount_factors: no simulation; the stored ledgers of the strategies
+      with events priced by the changed constants are priced again (price_track_ledger).
+    The results and the cached totals are then updated for the curves whose result changed, and
+    last_update reports what was recomputed. The ledgers take about 3 x 2 x 12 x track_life
+    bytes per simulated strategy (62 MB for the 28080 strategies of the matched curves).
+
+    Parameters:
+    - curves, tables, grinding_freqs, gauge_freqs, same_grinding, track_life, discount_factors,
+      costs: As in evaluate_network.
+    - radius, radius_step and parameters: As in curve_parameters.
+
+    Example:
+        study = NetworkStudy(read_curve_inventory(), tables)
+        study.update_curves([4711], gauge_widening_per_year=1.6)
+        study.update_costs(GRINDING_COST_PER_M=70)
+        study.totals(by='Track_Bdl'), study.last_update
+    """
+
+    def __init__(self, curves, tables, grinding_freqs=range(1, 13), gauge_freqs=(48,), same_grinding=False,
+                 track_life=TECH_LIFE_YEARS, discount_factors=None, costs=None, radius=None, radius_step=None,
+                 **parameters):
+        start = time.perf_counter()
+        self.curves = curves
+        self.tables = tables
+        self.strategies = strategy_grid(grinding_freqs, gauge_freqs, same_grinding)
+        self.track_life = track_life
+        self.discount_factors = discount_factors
+        self.costs = {**default_costs(), **(costs or {})}
+        self.radius_step = radius_step
+        self.parameters = curve_parameters(curves, tables, radius=radius, radius_step=radius_step, **parameters)
+        self._radii = curve_radii(curves, radius, radius_step)
+        self._lengths = curves[LENGTH_COLUMN].to_numpy(dtype=float)
+
+        # parameter tuples, id = position; rows of the stored arrays = id * n_strategies + strategy
+        self._tuples = []
+        self._tuple_ids = {}
+        self._valid = np.zeros(0, dtype=bool)  # simulated with the current tables
+        self._stale = np.zeros(0, dtype=bool)  # priced with earlier costs or discount factors
+        self._best = np.zeros(0, dtype=int)
+        self._events = {}
+        self._uses = {}
+        self._results = {}
+        self._sources = []
+        # table key or (profile, rail) -> ids of the tuples depending on it
+        self.dependencies = {}
+        self._fingerprints = _table_fingerprints(tables)
+
+        self._codes = self._assign(self.parameters)
+        self._annual_cost = np.zeros(len(curves))
+        self._lifetime = np.zeros(len(curves))
+        self._totals = {}
+        simulated, repriced = self._ensure(np.unique(self._codes))
+        self._refresh(np.arange(len(curves)))
+        self._report('init', start, simulated, repriced, len(curves))
+
+    # --- changes ---
+
+    def update_curves(self, index, radius=None, **parameters):
+        """
+        Change the parameters of some curves.
+
+        Parameters:
+        - index: Index labels of the curves in `curves`.
+        - radius: New curve radii (m).
+        - parameters: New values of the PARAMETER_COLUMNS (except radius), a scalar or one value
+          per curve.
+        """
+        start = time.perf_counter()
+        unknown = set(parameters) - set(PARAMETER_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown curve parameters {sorted(unknown)}, choose from {PARAMETER_COLUMNS}")
+        positions = self.curves.index.get_indexer(pd.Index(np.atleast_1d(index)))
+        if (positions < 0).any():
+            raise KeyError(f"Unknown curves {list(np.atleast_1d(index)[positions < 0])}")
+        for column, value in parameters.items():
+            self.parameters.iloc[positions, self.parameters.columns.get_loc(column)] = value
+        if radius is not None:
+            radii = np.abs(np.broadcast_to(np.asarray(radius, dtype=float), positions.shape))
+            radii = np.where(np.isnan(radii), 0.0, radii)
+            self._radii[positions] = np.round(radii / self.radius_step) * self.radius_step if self.radius_step else radii
+        self._remap(positions)
+        self._update_curves(positions, start, 'curves')
+
+    def update_tables(self, tables):
+        """Replace the degradation tables; only the tuples depending on changed tables are simulated again."""
+        start = time.perf_counter()
+        fingerprints = _table_fingerprints(tables)
+        changed = {key for key in set(fingerprints) | set(self._fingerprints)
+                   if fingerprints.get(key) != self._fingerprints.get(key)}
+        affected = set()
+        for source in changed | {key[:2] for key in changed}:
+            affected |= self.dependencies.get(source, set())
+        for tuple_id in affected:
+            self._forget(tuple_id)
+        self._valid[list(affected)] = False
+        self.tables = tables
+        self._fingerprints = fingerprints
+
+        # the tabulated radii may have changed, and with them the radius keys of the curves
+        positions = np.arange(len(self.curves))
+        low = self.parameters['profile_low_rail'].to_numpy()
+        high = self.parameters['profile_high_rail'].to_numpy()
+        keys = radius_keys(tables, low, high, self._radii)
+        moved = positions[keys != self.parameters['radius'].to_numpy()]
+        changed_curves = np.flatnonzero(np.isin(self._codes, list(affected)))
+        self._remap(moved)
+        self._update_curves(np.union1d(moved, changed_curves), start, 'tables')
+
+    def update_costs(self, **costs):
+        """Change cost constants (see default_costs); the stored ledgers are priced again."""
+        start = time.perf_counter()
+        unknown = set(costs) - set(self.costs)
+        if unknown:
+            raise ValueError(f"Unknown cost constants {sorted(unknown)}")
+        changed = {name for name, value in costs.items() if self.costs[name] != value}
+        self.costs.update(costs)
+        if any(name not in PRICE_EVENTS for name in changed):
+            events = None  # every strategy
+        else:
+            events = {event for name in changed for event in PRICE_EVENTS[name]}
+        self._reprice_changed(events if changed else set(), start, 'costs')
+
+    def update_discount_factors(self, discount_factors):
+        """Change the discount factors; all stored ledgers are priced again."""
+        start = time.perf_counter()
+        self.discount_factors = discount_factors
+        self._reprice_changed(None, start, 'discount_factors')
+
+    # --- results ---
+
+    @property
+    def results(self):
+        """Per-curve results, as evaluate_network."""
+        tuples = pd.DataFrame(self._tuples, columns=PARAMETER_COLUMNS)
+        rows = self._best
+        tuple_results = pd.concat([
+            tuples,
+            self.strategies.iloc[rows % len(self.strategies)].reset_index(drop=True),
+            pd.DataFrame({name: values[rows] for name, values in self._results.items()}),
+        ], axis=1)
+        tuple_results.attrs = {'strategies': len(self.strategies), 'simulated': int(self._valid.sum()) * len(self.strategies)}
+        return expand_to_curves(self.curves, self.parameters, self._codes, tuple_results)
+
+    def totals(self, by=None):
+        """Network totals, as network_totals; kept up to date with the changed curves only."""
+        key = tuple(np.atleast_1d(by)) if by is not None else ()
+        if key not in self._totals:
+            if key:
+                groups = self.curves.groupby(list(key), sort=True, dropna=False)
+                codes, labels = groups.ngroup().to_numpy(dtype=int), groups.size().index
+            else:
+                codes, labels = np.zeros(len(self.curves), dtype=int), pd.RangeIndex(1)
+            sums = np.zeros((len(labels), 4))
+            np.add.at(sums, codes, np.column_stack(self._curve_sums(np.arange(len(self.curves)))))
+            self._totals[key] = (codes, labels, sums)
+        codes, labels, sums = self._totals[key]
+        totals = pd.DataFrame(sums[:, :3], index=labels, columns=['Curves', 'Length_m', 'Annual_Cost'])
+        totals['Curves'] = totals['Curves'].astype(int)
+        totals['Annuity'] = totals['Annual_Cost'] / totals['Length_m']
+        totals['Lifetime'] = sums[:, 3] / totals['Length_m']
+        return totals if key else totals.reset_index(drop=True)
+
+    @property
+    def curve_tuples(self):
+        """Parameter tuple id of every curve."""
+        return self._codes.copy()
+
+    def tuple_ledger(self, tuple_ids):
+        """
+        Stored ledger of all strategies of some tuples, e.g. for track_ledger_calendar.
+
+        Returns:
+        - (ledger, results): EventLedger with n_strategies rows per tuple (in the order of
+          tuple_ids and self.strategies) and its priced results
+        """
+        tuple_ids = np.asarray(tuple_ids, dtype=int)
+        self._ensure(tuple_ids)
+        rows = self._rows(tuple_ids)
+        ledger = EventLedger(None, *(self._events[name][rows] for name in _LEDGER_ARRAYS), self._n_months)
+        return ledger, pd.DataFrame({name: values[rows] for name, values in self._results.items()})
+
+    # --- internals ---
+
+    def _assign(self, parameters):
+        """Tuple ids of parameter rows, registering new tuples."""
+        frame = parameters[PARAMETER_COLUMNS]
+        tuples, codes = parameter_tuples(frame)
+        ids = np.empty(len(tuples), dtype=int)
+        for k, row in enumerate(tuples.itertuples(index=False, name=None)):
+            tuple_id = self._tuple_ids.get(row)
+            if tuple_id is None:
+                tuple_id = self._tuple_ids[row] = len(self._tuples)
+                self._tuples.append(row)
+                self._sources.append(set())
+            ids[k] = tuple_id
+        n = len(self._tuples)
+        self._valid = np.concatenate([self._valid, np.zeros(n - len(self._valid), dtype=bool)])
+        self._stale = np.concatenate([self._stale, np.zeros(n - len(self._stale), dtype=bool)])
+        self._best = np.concatenate([self._best, np.zeros(n - len(self._best), dtype=int)])
+        return ids[codes]
+
+    def _remap(self, positions):
+        """Recompute the radius keys and tuples of some curves."""
+        if len(positions) == 0:
+            return
+        params = self.parameters.iloc[positions]
+        keys = radius_keys(self.tables, params['profile_low_rail'].to_numpy(),
+                           params['profile_high_rail'].to_numpy(), self._radii[positions])
+        self.parameters.iloc[positions, self.parameters.columns.get_loc('radius')] = keys
+        self._codes[positions] = self._assign(self.parameters.iloc[positions])
+
+    def _update_curves(self, positions, start, change):
+        simulated, repriced = self._ensure(np.unique(self._codes[positions]))
+        self._refresh(positions)
+        self._report(change, start, simulated, repriced, len(positions))
+
+    def _ensure(self, tuple_ids):
+        """Simulate the tuples that are not valid and price the stale ones; returns the counts."""
+        tuple_ids = np.asarray(tuple_ids, dtype=int)
+        simulate = tuple_ids[~self._valid[tuple_ids]]
+        reprice = tuple_ids[self._valid[tuple_ids] & self._stale[tuple_ids]]
+        if len(simulate):
+            self._simulate(simulate)
+        if len(reprice):
+            self._price(self._rows(reprice))
+            self._stale[reprice] = False
+            self._choose(reprice)
+        return len(simulate), len(reprice) * len(self.strategies)
+
+    def _rows(self, tuple_ids):
+        n = len(self.strategies)
+        return (np.asarray(tuple_ids)[:, None] * n + np.arange(n)).ravel()
+
+    def _simulate(self, tuple_ids):
+        tuples = pd.DataFrame([self._tuples[t] for t in tuple_ids], columns=PARAMETER_COLUMNS)
+        _add_tuple_tables(self.tables, tuples)
+        scenarios = tuples.merge(self.strategies, how='cross')
+        ledger = simulate_track_strategies(
+            self.tables, track_life=self.track_life, **{name: scenarios[name].to_numpy() for name in scenarios}
+        )
+        rows = self._rows(tuple_ids)
+        self._grow(self._rows([len(self._tuples) - 1])[-1] + 1, ledger)
+        for name in _LEDGER_ARRAYS:
+            self._events[name][rows] = getattr(ledger, name)
+        self._uses['grind'][rows] = ledger.grind.any(axis=(1, 2))
+        self._uses['mill'][rows] = ledger.mill.any(axis=(1, 2))
+        self._uses['tamp'][rows] = ledger.tamp.any(axis=1)
+        self._price(rows, ledger)
+
+        for tuple_id, (profile_low, profile_high, radius, load, _) in zip(tuple_ids, tuples.itertuples(index=False)):
+            for profile, rail in ((profile_low, 'Inner'), (profile_high, 'High')):
+                table = self.tables.table_index(profile, rail, radius, load)
+                key = self.tables.keys[table]
+                source = key[:2] if self.tables.is_derived(table) else key
+                self._sources[tuple_id].add(source)
+                self.dependencies.setdefault(source, set()).add(tuple_id)
+        self._valid[tuple_ids] = True
+        self._stale[tuple_ids] = False
+        self._choose(tuple_ids)
+
+    def _grow(self, n_rows, ledger):
+        """Make room for n_rows in the stored events, uses and results."""
+        current = len(self._events['tamp']) if self._events else 0
+        if n_rows <= current:
+            return
+        n_rows = max(n_rows, 2 * current)
+        templates = {name: getattr(ledger, name) for name in _LEDGER_ARRAYS}
+        for name, template in templates.items():
+            grown = np.zeros((n_rows,) + template.shape[1:], dtype=template.dtype)
+            if current:
+                grown[:current] = self._events[name]
+            self._events[name] = grown
+        for name in ('grind', 'mill', 'tamp'):
+            grown = np.zeros(n_rows, dtype=bool)
+            grown[:current] = self._uses.get(name, grown[:0])
+            self._uses[name] = grown
+        self._n_months = ledger.n_months
+        for name, values in self._results.items():
+            grown = np.empty(n_rows, dtype=values.dtype)
+            grown[:current] = values
+            self._results[name] = grown
+
+    def _price(self, rows, ledger=None):
+        """Price stored (or just simulated) ledger rows with the current costs and discount factors."""
+        if ledger is None:
+            ledger = EventLedger(None, *(self._events[name][rows] for name in _LEDGER_ARRAYS), self._n_months)
+        priced = price_track_ledger(ledger, discount_factors=self.discount_factors, costs=self.costs)
+        n_rows = len(self._events['tamp'])
+        for name in priced:
+            values = priced[name].to_numpy()
+            if name not in self._results:
+                self._results[name] = np.empty(n_rows, dtype=values.dtype)
+            self._results[name][rows] = values
+
+    def _choose(self, tuple_ids):
+        n = len(self.strategies)
+        annuity = self._results['Annuity'][self._rows(tuple_ids)].reshape(len(tuple_ids), n)
+        self._best[tuple_ids] = np.asarray(tuple_ids) * n + np.argmin(annuity, axis=1)
+
+    def _forget(self, tuple_id):
+        for source in self._sources[tuple_id]:
+            self.dependencies[source].discard(tuple_id)
+        self._sources[tuple_id] = set()
+
+    def _reprice_changed(self, events, start, change):
+        """Price again the valid strategies with the given events (None: all)."""
+        valid = np.flatnonzero(self._valid)
+        live = np.intersect1d(valid, self._codes)
+        repriced = 0
+        if events is None or events:
+            rows = self._rows(live)
+            if events is not None:
+                rows = rows[np.any([self._uses[event][rows] for event in events], axis=0)]
+            if len(rows):
+                self._price(rows)
+            repriced = len(rows)
+            self._stale[np.setdiff1d(valid, live)] = True
+            live_changed = np.unique(rows // len(self.strategies))
+        else:
+            live_changed = np.zeros(0, dtype=int)
+        if len(live_changed):
+            self._choose(live_changed)
+        positions = np.flatnonzero(np.isin(self._codes, live_changed))
+        self._refresh(positions)
+        self._report(change, start, 0, repriced, len(positions))
+
+    def _curve_sums(self, positions):
+        return (np.ones(len(positions)), self._lengths[positions], self._annual_cost[positions],
+                self._lifetime[positions] * self._lengths[positions])
+
+    def _refresh(self, positions):
+        """Update the annual cost and lifetime of some curves and the cached totals."""
+        if len(positions) == 0:
+            return
+        old = np.column_stack(self._curve_sums(positions))
+        rows = self._best[self._codes[positions]]
+        self._annual_cost[positions] = self._results['Annuity'][rows] * self._lengths[positions]
+        self._lifetime[positions] = self._results['Lifetime'][rows]
+        delta = np.column_stack(self._curve_sums(positions)) - old
+        for codes, _, sums in self._totals.values():
+            np.add.at(sums, codes[positions], delta)
+
+    def _report(self, change, start, simulated, repriced, curves):
+        self.last_update = {
+            'change': change,
+            'simulated_tuples': simulated,
+            'simulated_strategies': simulated * len(self.strategies),
+            'repriced_strategies': repriced,
+            'curves_updated': curves,
+            'seconds': time.perf_counter() - start,
+        }
+
+
+def _table_fingerprints(tables):
+    """Digest of the values of every tabulated (not derived) table, by key."""
+    fingerprints = {}
+    for table, key in enumerate(tables.keys):
+        if not tables.is_derived(table):
+            n = tables.n_gauges[table]
+            digest = hashlib.blake2b(tables.gauges[table, :n].tobytes(), digest_size=16)
+            digest.update(np.ascontiguousarray(tables.values[table, :n]).tobytes())
+            fingerprints[key] = digest.hexdigest()
+    return fingerprints
+
+
+def load_network_tables(entries=DEFAULT_TABLES):
+    """
+    PreparedTables of degradation table files.
+
+    Parameters:
+    - entries: Table files, 'file:radius' for a file labelled with a wrong radius.
+    """
+    from preprocessings.read_input_data import read_input_data
+    from rail_analysis.interpolation import interpolate_rail_data
+    from rail_analysis.prepared_tables import prepare_tables
+
+    frames = []
+    for entry in entries:
+        path, radius = _table_entry(entry)
+        data_df = interpolate_rail_data(read_input_data(path))
+        if radius:
+            data_df['Radius'] = radius
+        frames.append(data_df)
+    return prepare_tables(pd.concat(frames, ignore_index=True))
+
+
+def main(args):
+    """Evaluate a network for the `network` command."""
+    start = time.perf_counter()
+    tables = load_network_tables(args.tables)
+    curves = read_curve_inventory(args.curves)
+    results = evaluate_network(curves, tables, grinding_freqs=args.grinding_freqs, gauge_freqs=args.gauge_freqs,
+                               profile_low_rail=args.profile, load=args.load, workers=args.workers)
+    if args.output:
+        results.to_csv(args.output)
+    with pd.option_context('display.width', 200, 'display.max_columns', None):
+        print(network_totals(results, by=args.by).to_string(float_format=lambda x: f'{x:.4g}'))
+    print(f"{results.attrs['curves']} curves, {results.attrs['tuples']} parameter tuples, "
+          f"{results.attrs['simulated']} strategies simulated in {time.perf_counter() - start:.1f} s")
+
+
+def _table_entry(entry):
+    """(path, radius or None) of a --tables entry 'file' or 'file:radius'."""
+    path, _, radius = entry.rpartition(':')
+    if path and (radius.isdigit() or radius.capitalize() == TANGENT):
+        return path, radius
+    return entry, None
@@ -0,0 +1,442 @@
+# rail_analysis/portfolio.py
+"""
+Budget- and possession-constrained choice of one maintenance strategy per section.
+
+Every curve of a NetworkStudy (rail_analysis.network) is a section. For every parameter tuple
+the study keeps the ledgers of all strategies of its grid; track_ledger_calendar turns them into
+yearly direct costs and possession hours, which scale with the length of the section.
+optimise_portfolio chooses one strategy per section that minimises the network LCC (annuity x
+length, SEK/year) with caps per group (e.g. per line) and year on the direct cost (SEK) and on
+the possession hours:
+
+- 'lagrangian': subgradient method on the multipliers of the caps. For given multipliers all
+  sections of a (group, tuple) choose the same strategy, so an iteration costs
+  O(units x strategies x years) however many curves there are. The best feasible iterate is
+  kept; when there is none, the least violating one is repaired with the greedy method.
+- 'greedy': starts from the unconstrained optimum and switches sections of the violating
+  groups, cheapest extra annual cost per unit of excess removed first, until the caps hold.
+The heuristic solutions are finally improved by switching sections back to cheaper strategies
+wherever the caps of their group still hold.
+- 'ilp': integer program (scipy.optimize.milp) restricted to at most max_candidates
+  non-dominated strategies of each tuple and stopped at the relative gap or the time limit,
+  for up to some thousands of sections (2000 curves of the matched inventory take about half
+  a minute). Its solution is improved as the heuristic ones and the better of it and the
+  greedy solution is returned.
+
+Example:
+    study = NetworkStudy(read_curve_inventory(), tables)
+    problem = portfolio_problem(study, n_years=10, group='Track_Bdl')
+    plan = optimise_portfolio(problem, budget=4e6, hours=300)
+    portfolio_loads(problem, plan['Strategy'])
+"""
+
+import time
+
+import numpy as np  # type: ignore
+import pandas as pd  # type: ignore
+from scipy.optimize import LinearConstraint, milp  # type: ignore
+from scipy.sparse import csr_matrix  # type: ignore
+
+from rail_analysis.LCC_batched import track_ledger_calendar
+from rail_analysis.network import STRATEGY_COLUMNS
+
+METHODS = ('lagrangian', 'greedy', 'ilp')
+
+# label of the single group when the caps apply to the whole network
+NETWORK_GROUP = 'Network'
+
+
+class PortfolioProblem:
+    """
+    Sections, their candidate strategies and their yearly direct cost and possession hours.
+
+    Attributes (T tuples, S strategies, Y years):
+    - sections: DataFrame with the index of the curves: 'Group' (position in groups), 'Tuple'
+      (0 ... T - 1) and 'Length_m'.
+    - groups: Labels of the groups the caps apply to.
+    - strategies: DataFrame with the STRATEGY_COLUMNS of the S strategies.
+    - annuity: Array (T, S), SEK/m/year.
+    - cost, hours: Arrays (T, S, Y), direct cost (SEK) and possession hours per metre of track.
+    """
+
+    def __init__(self, sections, groups, strategies, annuity, cost, hours):
+        self.sections = sections
+        self.groups = groups
+        self.strategies = strategies
+        self.annuity = annuity
+        self.cost = cost
+        self.hours = hours
+
+    @property
+    def n_years(self):
+        return self.cost.shape[2]
+
+    def evaluate(self, strategy):
+        """
+        Objective and loads of a choice (strategy position per section).
+
+        Returns:
+        - (objective in SEK/year, cost load (groups, years) in SEK, hours load (groups, years))
+        """
+        tuples = self.sections['Tuple'].to_numpy()
+        length = self.sections['Length_m'].to_numpy()
+        group = self.sections['Group'].to_numpy()
+        strategy = np.asarray(strategy, dtype=int)
+        objective = float((self.annuity[tuples, strategy] * length).sum())
+        cost = np.zeros((len(self.groups), self.n_years))
+        hours = np.zeros((len(self.groups), self.n_years))
+        np.add.at(cost, group, self.cost[tuples, strategy] * length[:, None])
+        np.add.at(hours, group, self.hours[tuples, strategy] * length[:, None])
+        return objective, cost, hours
+
+
+def portfolio_problem(study, n_years=10, group='Track_Bdl'):
+    """
+    Portfolio problem of the curves of a NetworkStudy.
+
+    Parameters:
+    - study: NetworkStudy; its strategy grid gives the candidate strategies of every section.
+    - n_years: Years of the caps, from the start of the plan.
+    - group: Inventory column (or list of columns) the caps apply to, None for the whole network.
+    """
+    codes = study.curve_tuples
+    live, tuples = np.unique(codes, return_inverse=True)
+    ledger, results = study.tuple_ledger(live)
+    calendar = track_ledger_calendar(ledger, results, study.costs, n_years)
+    n_tuples, n_strategies = len(live), len(study.strategies)
+    per_metre = 1 / study.costs['TRACK_LENGTH_M']
+
+    if group is None:
+        group_codes, groups = np.zeros(len(codes), dtype=int), pd.Index([NETWORK_GROUP])
+    else:
+        grouped = study.curves.groupby(group, sort=True, dropna=False)
+        group_codes, groups = grouped.ngroup().to_numpy(dtype=int), grouped.size().index
+    sections = pd.DataFrame({
+        'Group': group_codes,
+        'Tuple': tuples,
+        'Length_m': study.curves['Curve_Langd_m'].to_numpy(dtype=float),
+    }, index=study.curves.index)
+    shape = (n_tuples, n_strategies, n_years)
+    return PortfolioProblem(
+        sections, groups, study.strategies.reset_index(drop=True),
+        results['Annuity'].to_numpy().reshape(n_tuples, n_strategies),
+        calendar['cost'].sum(axis=2).reshape(shape) * per_metre,
+        calendar['hours'].sum(axis=2).reshape(shape) * per_metre,
+    )
+
+
+def optimise_portfolio(problem, budget=None, hours=None, method='lagrangian', iterations=200, step=0.5,
+                       max_candidates=20, time_limit=600, gap=0.005, progress=None):
+    """
+    Choose one strategy per section minimising the network LCC under yearly caps.
+
+    Parameters:
+    - problem: PortfolioProblem (see portfolio_problem).
+    - budget: Direct cost cap (SEK) per group and year: a scalar, a Series indexed by group,
+              an array of shape (years,) or (groups, years), or a DataFrame (groups x years).
+              None for no cap.
+    - hours: Possession-hour cap per group and year, as budget.
+    - method: 'lagrangian', 'greedy' or 'ilp'.
+    - iterations, step: Number of subgradient iterations and their initial step ('lagrangian').
+    - max_candidates: Strategies per tuple in the integer program ('ilp').
+    - time_limit: Time limit (s) of the integer program ('ilp').
+    - gap: Relative optimality gap at which the integer program stops ('ilp').
+    - progress: Function called with progress messages, None for no messages.
+
+    Returns:
+    - DataFrame with the index of the sections: 'Group', 'Tuple', 'Length_m', 'Strategy'
+      (position in problem.strategies), the STRATEGY_COLUMNS, 'Annuity' and 'Annual_Cost'.
+      results.attrs holds the method, the 'objective' and 'unconstrained_objective' (SEK/year),
+      'feasible', the remaining relative 'excess' over the caps and the 'seconds'.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown method {method}, choose from {METHODS}")
+    start = time.perf_counter()
+    progress = progress or (lambda message: None)
+    caps = (_caps(budget, problem), _caps(hours, problem))
+    unconstrained = np.argmin(problem.annuity, axis=1)[problem.sections['Tuple'].to_numpy()]
+
+    if method == 'lagrangian':
+        strategy = _lagrangian(problem, caps, iterations, step, progress)
+    elif method == 'greedy':
+        strategy = _improve(problem, caps, _greedy(problem, caps, unconstrained, progress))
+    else:
+        # the program is restricted to the candidates and stopped at the gap: keep the better of
+        # its improved solution and the greedy solution
+        strategy = _ilp(problem, caps, max_candidates, time_limit, gap, progress)
+        candidates = [_improve(problem, caps, _greedy(problem, caps, unconstrained, progress))]
+        if strategy is not None:
+            candidates.append(_improve(problem, caps, strategy))
+        strategy = min(candidates, key=lambda candidate: _penalised(problem, caps, candidate))
+
+    objective, cost, hours_load = problem.evaluate(strategy)
+    excess = _excess(cost, caps[0]) + _excess(hours_load, caps[1])
+    plan = problem.sections.copy()
+    plan['Strategy'] = strategy
+    plan[STRATEGY_COLUMNS] = problem.strategies[STRATEGY_COLUMNS].to_numpy()[strategy]
+    plan['Annuity'] = problem.annuity[plan['Tuple'].to_numpy(), strategy]
+    plan['Annual_Cost'] = plan['Annuity'] * plan['Length_m']
+    plan.attrs = {
+        'method': method,
+        'objective': objective,
+        'unconstrained_objective': problem.evaluate(unconstrained)[0],
+        'feasible': bool(excess <= 1e-9),
+        'excess': excess,
+        'seconds': time.perf_counter() - start,
+    }
+    return plan
+
+
+def portfolio_loads(problem, strategy, budget=None, hours=None):
+    """
+    Yearly direct cost and possession hours per group of a choice of strategies.
+
+    Returns:
+    - DataFrame indexed by (group, year) with 'Cost_SEK' and 'Hours', and 'Budget' and
+      'Hours_Cap' when the caps are given
+    """
+    _, cost, hours_load = problem.evaluate(strategy)
+    index = pd.MultiIndex.from_product([problem.groups, range(1, problem.n_years + 1)], names=['Group', 'Year'])
+    loads = pd.DataFrame({'Cost_SEK': cost.ravel(), 'Hours': hours_load.ravel()}, index=index)
+    if budget is not None:
+        loads['Budget'] = _caps(budget, problem).ravel()
+    if hours is not None:
+        loads['Hours_Cap'] = _caps(hours, problem).ravel()
+    return loads
+
+
+# === METHODS ===
+
+def _lagrangian(problem, caps, iterations, step, progress):
+    """Subgradient method on (group, tuple) units, repaired greedily when no iterate is feasible."""
+    sections = problem.sections
+    units, unit_of_section = np.unique(sections[['Group', 'Tuple']].to_numpy(), axis=0, return_inverse=True)
+    unit_of_section = unit_of_section.ravel()
+    unit_group, unit_tuple = units[:, 0], units[:, 1]
+    unit_length = np.bincount(unit_of_section, weights=sections['Length_m'].to_numpy(), minlength=len(units))
+    loads = (problem.cost[unit_tuple], problem.hours[unit_tuple])  # (units, strategies, years)
+    annuity = problem.annuity[unit_tuple]
+
+    # multipliers in SEK/m/year of annuity per unit of yearly load per metre, scaled so that a
+    # relative violation of 1 moves them by about step x the typical annuity per typical load
+    constrained = [np.isfinite(cap) for cap in caps]
+    scales = [annuity.mean() / max(load.mean(), 1e-12) for load in loads]
+    multipliers = [np.zeros_like(cap) for cap in caps]
+
+    best, best_objective, least, least_excess = None, np.inf, None, np.inf
+    for k in range(iterations):
+        score = annuity.copy()
+        for load, multiplier in zip(loads, multipliers):
+            score += np.einsum('usy,uy->us', load, multiplier[unit_group])
+        choice = np.argmin(score, axis=1)
+        objective = float((annuity[np.arange(len(units)), choice] * unit_length).sum())
+        usage = []
+        for load, cap in zip(loads, caps):
+            used = np.zeros_like(cap)
+            np.add.at(used, unit_group, load[np.arange(len(units)), choice] * unit_length[:, None])
+            usage.append(used)
+        excess = sum(_excess(used, cap) for used, cap in zip(usage, caps))
+        if excess <= 1e-9 and objective < best_objective:
+            best, best_objective = choice, objective
+        if excess < least_excess:
+            least, least_excess = choice, excess
+        if excess <= 1e-9 and not any(m.any() for m in multipliers):
+            break  # the unconstrained optimum is feasible
+        alpha = step / np.sqrt(k + 1)
+        for multiplier, used, cap, scale, mask in zip(multipliers, usage, caps, scales, constrained):
+            gradient = np.where(mask, (used - np.where(mask, cap, 0)) / np.where(mask & (cap > 0), cap, 1), 0)
+            multiplier += alpha * scale * gradient
+            np.maximum(multiplier, 0, out=multiplier)
+        if k % 20 == 0:
+            progress(f"lagrangian {k}: objective {objective:.6g} SEK/year, excess {excess:.3g}")
+
+    # the best feasible iterate and the least violating one, repaired, then improved
+    candidates = [] if best is None else [best[unit_of_section]]
+    if least_excess > 1e-9:
+        progress(f"lagrangian: repairing the least violating iterate (excess {least_excess:.3g}) greedily")
+        candidates.append(_greedy(problem, caps, least[unit_of_section], progress))
+    candidates = [_improve(problem, caps, candidate) for candidate in candidates]
+    return min(candidates, key=lambda candidate: _penalised(problem, caps, candidate))
+
+
+def _penalised(problem, caps, strategy):
+    """(excess, objective) of a choice, to rank choices feasible first."""
+    objective, cost, hours = problem.evaluate(strategy)
+    excess = _excess(cost, caps[0]) + _excess(hours, caps[1])
+    return (round(excess, 9), objective)
+
+
+def _greedy(problem, caps, strategy, progress):
+    """Switch sections of violating groups, least extra annual cost per excess removed first."""
+    strategy = np.array(strategy, dtype=int)
+    tuples = problem.sections['Tuple'].to_numpy()
+    length = problem.sections['Length_m'].to_numpy()
+    group = problem.sections['Group'].to_numpy()
+    _, cost, hours = problem.evaluate(strategy)
+    usage = [cost, hours]
+    tables = (problem.cost, problem.hours)
+
+    for g in range(len(problem.groups)):
+        members = np.flatnonzero(group == g)
+        while sum(_excess(used[g], cap[g]) for used, cap in zip(usage, caps)) > 1e-9:
+            excess = sum(_excess(used[g], cap[g]) for used, cap in zip(usage, caps))
+            # every switch of every member at once: (members, strategies)
+            t, current, m_length = tuples[members], strategy[members], length[members]
+            delta_objective = (problem.annuity[t] - problem.annuity[t, current][:, None]) * m_length[:, None]
+            after = 0
+            deltas = []
+            for table, used, cap in zip(tables, usage, caps):
+                delta = (table[t] - table[t, current][:, None, :]) * m_length[:, None, None]
+                deltas.append(delta)
+                after = after + _excess(used[g] + delta, cap[g], axis=-1)
+            reduction = excess - after
+            reduction[reduction <= 1e-12] = 0
+            if not reduction.any():
+                progress(f"greedy: group {problem.groups[g]} stays over its caps (excess {excess:.3g})")
+                break
+            # best switch of every member, applied in order while it still removes excess (every
+            # member moves at most once per pass, so its deltas stay relative to its strategy)
+            ratio = np.where(reduction > 0, delta_objective / np.maximum(reduction, 1e-300), np.inf)
+            choice = np.argmin(ratio, axis=1)
+            order = np.argsort(ratio[np.arange(len(members)), choice])
+            for i in order:
+                j = choice[i]
+                if not np.isfinite(ratio[i, j]):
+                    break
+                before = sum(_excess(used[g], cap[g]) for used, cap in zip(usage, caps))
+                moved = sum(_excess(used[g] + delta[i, j], cap[g]) for used, cap, delta in zip(usage, caps, deltas))
+                if moved >= before - 1e-12:
+                    continue
+                for used, delta in zip(usage, deltas):
+                    used[g] += delta[i, j]
+                strategy[members[i]] = j
+                if moved <= 1e-9:
+                    break
+    return strategy
+
+
+def _improve(problem, caps, strategy, passes=3):
+    """Switch sections to strategies with a lower annuity as long as the caps of their group hold."""
+    strategy = np.array(strategy, dtype=int)
+    tuples = problem.sections['Tuple'].to_numpy()
+    length = problem.sections['Length_m'].to_numpy()
+    group = problem.sections['Group'].to_numpy()
+    _, cost, hours = problem.evaluate(strategy)
+    usage = [cost, hours]
+    tables = (problem.cost, problem.hours)
+
+    for g in range(len(problem.groups)):
+        members = np.flatnonzero(group == g)
+        # a group over its caps stays as it is
+        if sum(_excess(used[g], cap[g]) for used, cap in zip(usage, caps)) > 1e-9:
+            continue
+        for _ in range(passes):
+            t, current, m_length = tuples[members], strategy[members], length[members]
+            saving = (problem.annuity[t, current][:, None] - problem.annuity[t]) * m_length[:, None]
+            deltas = [(table[t] - table[t, current][:, None, :]) * m_length[:, None, None] for table in tables]
+            for used, cap, delta in zip(usage, caps, deltas):
+                saving[((used[g] + delta) > cap[g] * (1 + 1e-12)).any(axis=2)] = 0
+            choice = np.argmax(saving, axis=1)
+            best_saving = saving[np.arange(len(members)), choice]
+            applied = 0
+            for i in np.argsort(-best_saving):
+                if best_saving[i] <= 0:
+                    break
+                j = choice[i]
+                if any(((used[g] + delta[i, j]) > cap[g] * (1 + 1e-12)).any() for used, cap, delta in zip(usage, caps, deltas)):
+                    continue
+                for used, delta in zip(usage, deltas):
+                    used[g] += delta[i, j]
+                strategy[members[i]] = j
+                applied += 1
+            if not applied:
+                break
+    return strategy
+
+
+def _ilp(problem, caps, max_candidates, time_limit, gap, progress):
+    """
+    Integer program over the non-dominated strategies of each tuple.
+
+    Returns:
+    - Strategy of every section, None when no solution was found
+    """
+    candidates = [_candidates(problem, t, max_candidates) for t in range(len(problem.annuity))]
+    tuples = problem.sections['Tuple'].to_numpy()
+    length = problem.sections['Length_m'].to_numpy()
+    group = problem.sections['Group'].to_numpy()
+
+    counts = np.array([len(candidates[t]) for t in tuples])
+    section = np.repeat(np.arange(len(tuples)), counts)
+    strategy = np.concatenate([candidates[t] for t in tuples])
+    variable_tuple = tuples[section]
+    n_variables = len(strategy)
+    progress(f"ilp: {n_variables} variables for {len(tuples)} sections")
+
+    objective = problem.annuity[variable_tuple, strategy] * length[section]
+    constraints = [LinearConstraint(
+        csr_matrix((np.ones(n_variables), (section, np.arange(n_variables))), shape=(len(tuples), n_variables)), 1, 1
+    )]
+    n_years = problem.n_years
+    for table, cap in zip((problem.cost, problem.hours), caps):
+        rows = np.flatnonzero(np.isfinite(cap).ravel())
+        if not len(rows):
+            continue
+        # rows divided by their cap, so that all right-hand sides are 1
+        row = group[section][:, None] * n_years + np.arange(n_years)
+        scale = 1 / np.where(cap > 0, cap, 1).ravel()
+        values = table[variable_tuple, strategy] * length[section][:, None] * scale[row]  # (variables, years)
+        matrix = csr_matrix((values.ravel(), (row.ravel(), np.repeat(np.arange(n_variables), n_years))),
+                            shape=(len(problem.groups) * n_years, n_variables))[rows]
+        constraints.append(LinearConstraint(matrix, -np.inf, (cap.ravel() * scale)[rows]))
+
+    result = milp(objective, integrality=np.ones(n_variables), bounds=(0, 1), constraints=constraints,
+                  options={'time_limit': time_limit, 'mip_rel_gap': gap})
+    progress(f"ilp: {result.message}")
+    if result.x is None:
+        return None
+    chosen = result.x > 0.5
+    choice = np.empty(len(tuples), dtype=int)
+    choice[section[chosen]] = strategy[chosen]
+    return choice
+
+
+def _candidates(problem, t, max_candidates):
+    """
+    Strategies of a tuple that are not dominated (no other strategy has a lower or equal
+    annuity, cost and hours in every year, and is lower in one), at most max_candidates: the
+    cheapest annuities and the lowest total cost and hours.
+    """
+    values = np.column_stack([problem.annuity[t], problem.cost[t], problem.hours[t]])  # (strategies, 1 + 2 years)
+    values, first = np.unique(values, axis=0, return_index=True)
+    no_worse = (values[:, None, :] <= values[None, :, :]).all(axis=2)  # [i, j]: i no worse than j
+    dominated = (no_worse & ~np.eye(len(values), dtype=bool)).any(axis=0)
+    kept = first[~dominated]
+    if len(kept) > max_candidates:
+        order = kept[np.argsort(problem.annuity[t, kept])]
+        extremes = [kept[np.argmin(problem.cost[t, kept].sum(axis=1))], kept[np.argmin(problem.hours[t, kept].sum(axis=1))]]
+        kept = np.unique(np.concatenate([order[:max_candidates - 2], extremes]))
+    return kept
+
+
+# === HELPER FUNCTIONS ===
+
+def _caps(value, problem):
+    """Caps of shape (groups, years), inf where there is none."""
+    shape = (len(problem.groups), problem.n_years)
+    if value is None:
+        return np.full(shape, np.inf)
+    if isinstance(value, pd.DataFrame):
+        value = value.reindex(problem.groups).to_numpy(dtype=float)
+    elif isinstance(value, pd.Series):
+        value = value.reindex(problem.groups).to_numpy(dtype=float)[:, None]
+    caps = np.broadcast_to(np.asarray(value, dtype=float), shape).copy()
+    return np.where(np.isnan(caps), np.inf, caps)
+
+
+def _excess(used, cap, axis=None):
+    """Load over the caps relative to the caps, summed over the groups and years (or an axis)."""
+    finite = np.isfinite(cap)
+    over = np.where(finite, np.maximum(used - np.where(finite, cap, 0), 0), 0)
+    relative = over / np.where(finite & (cap > 0), cap, 1)
+    return relative.sum(axis=axis)
@@ -0,0 +1,320 @@
+# rail_analysis/possessions.py
+"""
+Shared possessions for neighbouring sections: grinding and tamping months aligned along a line.
+
+get_annuity_track_refactored shares the possession of one track when both rails are ground in
+the same month, but the curves of a line are still priced as separate possessions. Here the
+curves of a NetworkStudy (rail_analysis.network) are ordered by their position along the track
+(Curve_Start_Meters) and neighbouring curves form bundles: curves of the same line and track
+with gaps of at most max_gap_m between them, over at most max_bundle_m. All sections of a bundle
+worked in the same month share one possession, which saves its setup (closing the line, moving
+the machine to and from the site) for all but one of them.
+
+schedule_possessions chooses the strategy of every section of a bundle among the strategies
+whose annuity is at most max_deviation above the section's own optimum (the strategy grid of
+the study, priced by the batched engine), trading the extra LCC against the setups saved by
+aligning the grinding and tamping months. Sections of a bundle with the same parameter tuple
+take the same strategy; the alignment of each bundle is a local search over these units that
+moves one unit at a time to the strategy that lowers LCC + setup cost most, starting from the
+best of the own optima and of one common strategy for all units. possession_plan lists the
+resulting possessions (bundle, month, activity, sections, hours).
+
+The setup cost of a possession is setup_hours x CAP_POSS_PER_HOUR in the month of the
+possession, discounted as the LCC and divided by the years of the calendar, so that it adds to
+the annual costs (annuity x length) in SEK/year.
+
+Example:
+    study = NetworkStudy(read_curve_inventory(), tables)
+    schedule = schedule_possessions(study, max_deviation=0.05)
+    schedule.attrs['separate_cost'], schedule.attrs['aligned_cost']
+    plan = possession_plan(study, schedule)
+"""
+
+import time
+
+import numpy as np  # type: ignore
+import pandas as pd  # type: ignore
+
+from rail_analysis.constants import SIMULATION_START_YEAR
+from rail_analysis.discounting import check_discount_factors
+from rail_analysis.LCC_batched import track_ledger_calendar
+from rail_analysis.network import LENGTH_COLUMN, STRATEGY_COLUMNS
+
+# hours of a possession that do not depend on the length of track worked
+SETUP_HOURS = 0.5
+
+# neighbouring curves: largest gap between two curves and largest length of a bundle (m)
+MAX_GAP_M = 500.0
+MAX_BUNDLE_M = 10000.0
+
+# inventory columns of the track a curve lies on, and of its position along the line (m)
+TRACK_COLUMNS = ['Track_Bdl', 'Track_UNE', 'Track_spår']
+START_COLUMN = 'Curve_Start_Meters'
+END_COLUMN = 'Curve_End_Meters'
+
+# activities with shared possessions and their positions in ACTIVITIES (LCC_batched): milling
+# is done in the grinding possession
+POSSESSION_ACTIVITIES = {'grinding': (0, 1), 'tamping': (2,)}
+
+
+def possession_bundles(curves, max_gap_m=MAX_GAP_M, max_bundle_m=MAX_BUNDLE_M, by=TRACK_COLUMNS):
+    """
+    Bundles of neighbouring curves along each track.
+
+    Parameters:
+    - curves: Curve inventory (read_curve_inventory).
+    - max_gap_m: Largest distance between the end of a curve and the start of the next one.
+    - max_bundle_m: Largest distance from the start of the first curve of a bundle to the end of
+                    its last curve.
+    - by: Inventory columns identifying a track (those missing from curves are ignored).
+
+    Returns:
+    - DataFrame with the index of the curves: the `by` columns, 'Bundle' (0 ... bundles - 1, in
+      the order of the tracks and positions), 'Position' (order within the bundle), 'Start_m'
+      and 'End_m'
+    """
+    by = [column for column in np.atleast_1d(by) if column in curves.columns]
+    start = np.fmin(curves[START_COLUMN], curves[END_COLUMN]).to_numpy(dtype=float)
+    end = np.fmax(curves[START_COLUMN], curves[END_COLUMN]).to_numpy(dtype=float)
+    if by:
+        track = curves.groupby(by, sort=True, dropna=False).ngroup().to_numpy(dtype=int)
+    else:
+        track = np.zeros(len(curves), dtype=int)
+    order = np.lexsort((start, track))
+
+    bundle = np.empty(len(curves), dtype=int)
+    b, previous, first, reach = -1, None, 0.0, 0.0
+    for k in order:
+        if (track[k] != previous or not np.isfinite(start[k]) or start[k] - reach > max_gap_m
+                or end[k] - first > max_bundle_m):
+            b, previous, first, reach = b + 1, track[k], start[k], end[k]
+        else:
+            reach = max(reach, end[k])
+        bundle[k] = b
+    position = np.empty(len(curves), dtype=int)
+    ranks = np.arange(len(curves))
+    position[order] = ranks - np.maximum.accumulate(np.where(np.diff(bundle[order], prepend=-1) != 0, ranks, 0))
+
+    bundles = curves[by].copy()
+    bundles['Bundle'] = bundle
+    bundles['Position'] = position
+    bundles['Start_m'] = start
+    bundles['End_m'] = end
+    return bundles
+
+
+def schedule_possessions(study, bundles=None, setup_hours=SETUP_HOURS, max_deviation=0.05, max_candidates=12,
+                         n_years=None, iterations=100, progress=None):
+    """
+    Strategies of the curves of a NetworkStudy aligned into shared possessions per bundle.
+
+    Parameters:
+    - study: NetworkStudy; its strategy grid gives the candidate strategies of every section.
+    - bundles: possession_bundles of study.curves, defaults to possession_bundles(study.curves).
+    - setup_hours: Possession hours shared by the sections worked in the same month.
+    - max_deviation: Largest relative increase of the annuity of a section over its own optimum.
+    - max_candidates: Cheapest strategies per section considered, its own optimum included.
+    - n_years: Years of the calendar, defaults to the simulated horizon of the study.
+    - iterations: Largest number of moves of the local search per bundle.
+    - progress: Function called with progress messages, None for no messages.
+
+    Returns:
+    - DataFrame with the columns of bundles and 'Tuple', 'Length_m', 'Own_Strategy', 'Strategy'
+      (positions in study.strategies), the STRATEGY_COLUMNS, 'Own_Annuity', 'Annuity' and
+      'Annual_Cost'. schedule.attrs holds the annual costs (LCC + setups, SEK/year) of the own
+      optima in separate possessions ('separate_cost') and in shared possessions
+      ('shared_cost'), of the aligned strategies ('aligned_cost'), the extra LCC of the aligned
+      strategies ('deviation_cost'), the number of possessions per year ('separate_possessions',
+      'aligned_possessions') and the 'seconds'.
+    """
+    start = time.perf_counter()
+    progress = progress or (lambda message: None)
+    bundles = possession_bundles(study.curves) if bundles is None else bundles.reindex(study.curves.index)
+    codes = study.curve_tuples
+    live, tuples = np.unique(codes, return_inverse=True)
+    ledger, results = study.tuple_ledger(live)
+    n_strategies = len(study.strategies)
+    annuity = results['Annuity'].to_numpy().reshape(len(live), n_strategies)
+    own = np.argmin(annuity, axis=1)
+
+    # candidate strategies of every tuple, and the possession months of each (tuple, strategy)
+    rank = np.argsort(np.argsort(annuity, axis=1, kind='stable'), axis=1)
+    allowed = (annuity <= annuity[np.arange(len(live)), own][:, None] * (1 + max_deviation)) & (rank < max_candidates)
+    pairs = np.flatnonzero(allowed)
+    months, _ = _possession_calendar(study, ledger, results, pairs, n_years)
+    n_months = months.shape[1]
+    pair_of = np.full(allowed.shape, -1)
+    pair_of.ravel()[pairs] = np.arange(len(pairs))
+    progress(f"possessions: {len(pairs)} candidate strategies for {len(live)} tuples")
+
+    # setup cost (SEK/year) of a possession in every month of the calendar
+    discount_factors = check_discount_factors(study.discount_factors, n_months)
+    weight = setup_hours * study.costs['CAP_POSS_PER_HOUR'] * discount_factors[1:n_months + 1] / (n_months / 12)
+
+    # units: the sections of a bundle with the same tuple take the same strategy
+    length = study.curves[LENGTH_COLUMN].to_numpy(dtype=float)
+    bundle = bundles['Bundle'].to_numpy(dtype=int)
+    units, unit_of_section = np.unique(np.column_stack([bundle, tuples]), axis=0, return_inverse=True)
+    unit_of_section = unit_of_section.ravel()
+    unit_length = np.bincount(unit_of_section, weights=length, minlength=len(units))
+    unit_sections = np.bincount(unit_of_section, minlength=len(units))
+    unit_bundle, unit_tuple = units[:, 0], units[:, 1]
+    choice = own[unit_tuple].copy()
+
+    separate = shared = aligned = 0.0
+    separate_count = aligned_count = 0.0
+    bounds = np.flatnonzero(np.diff(unit_bundle, prepend=-1, append=-1))
+    for b, (first, last) in enumerate(zip(bounds[:-1], bounds[1:])):
+        members = np.arange(first, last)
+        t = unit_tuple[members]
+        strategies = np.flatnonzero(allowed[t].any(axis=0))
+        lcc = np.where(allowed[t][:, strategies], annuity[t][:, strategies] * unit_length[members, None], np.inf)
+        masks = np.zeros((len(members), len(strategies), n_months, len(POSSESSION_ACTIVITIES)), dtype=bool)
+        candidate = pair_of[t[:, None], strategies[None, :]]
+        masks[candidate >= 0] = months[candidate[candidate >= 0]]
+        start_choice = np.searchsorted(strategies, own[t])
+
+        own_masks = masks[np.arange(len(members)), start_choice]
+        own_lcc = lcc[np.arange(len(members)), start_choice].sum()
+        separate += own_lcc + (own_masks.sum(axis=2) @ weight * unit_sections[members]).sum()
+        separate_count += (own_masks.sum(axis=(1, 2)) * unit_sections[members]).sum()
+        shared += own_lcc + (own_masks.any(axis=0) * weight[:, None]).sum()
+
+        local, cost = _align(lcc, masks, weight, start_choice, iterations)
+        choice[members] = strategies[local]
+        aligned += cost
+        aligned_count += masks[np.arange(len(members)), local].any(axis=0).sum()
+        if b % 500 == 0:
+            progress(f"possessions: bundle {b} of {len(bounds) - 1}")
+
+    years = n_months / 12
+    strategy = choice[unit_of_section]
+    schedule = bundles.copy()
+    schedule['Tuple'] = tuples
+    schedule['Length_m'] = length
+    schedule['Own_Strategy'] = own[tuples]
+    schedule['Strategy'] = strategy
+    schedule[STRATEGY_COLUMNS] = study.strategies[STRATEGY_COLUMNS].to_numpy()[strategy]
+    schedule['Own_Annuity'] = annuity[tuples, own[tuples]]
+    schedule['Annuity'] = annuity[tuples, strategy]
+    schedule['Annual_Cost'] = schedule['Annuity'] * length
+    schedule.attrs = {
+        'bundles': len(bounds) - 1,
+        'setup_hours': setup_hours,
+        'separate_cost': float(separate),
+        'shared_cost': float(shared),
+        'aligned_cost': float(aligned),
+        'deviation_cost': float(((schedule['Annuity'] - schedule['Own_Annuity']) * length).sum()),
+        'separate_possessions': float(separate_count / years),
+        'aligned_possessions': float(aligned_count / years),
+        'seconds': time.perf_counter() - start,
+    }
+    return schedule
+
+
+def possession_plan(study, schedule, n_years=None, start_year=SIMULATION_START_YEAR):
+    """
+    Possessions of a schedule: one row per bundle, month and activity with work.
+
+    Parameters:
+    - study: NetworkStudy the schedule was made for.
+    - schedule: schedule_possessions (or any frame with 'Bundle', 'Tuple', 'Length_m' and
+                'Strategy' per curve).
+    - n_years: Years of the calendar, defaults to the simulated horizon of the study.
+    - start_year: Calendar year of the first month.
+
+    Returns:
+    - DataFrame with the track columns of the bundle, 'Bundle', 'Year', 'Month' (1 ... 12),
+      'Activity', 'Sections' (curves worked), 'Length_m', 'Start_m', 'End_m' (extent of the
+      curves worked) and 'Hours' (the setup plus the hours of the LCC model for the length worked)
+    """
+    setup_hours = schedule.attrs.get('setup_hours', SETUP_HOURS)
+    codes = study.curve_tuples
+    live = np.unique(codes)
+    ledger, results = study.tuple_ledger(live)
+    n_strategies = len(study.strategies)
+    rows = schedule['Tuple'].to_numpy(dtype=int) * n_strategies + schedule['Strategy'].to_numpy(dtype=int)
+    pairs, pair_of_section = np.unique(rows, return_inverse=True)
+    months, hours = _possession_calendar(study, ledger, results, pairs, n_years)
+    per_metre = 1 / study.costs['TRACK_LENGTH_M']
+
+    # sections with work in every (section, month, activity), taken bundle by bundle
+    pair_of_section = pair_of_section.ravel()
+    worked = months[pair_of_section]
+    section, month, activity = np.nonzero(worked)
+    length = schedule['Length_m'].to_numpy(dtype=float)[section]
+    frame = pd.DataFrame({
+        'Bundle': schedule['Bundle'].to_numpy(dtype=int)[section],
+        'Month_Index': month,
+        'Activity': np.asarray(list(POSSESSION_ACTIVITIES))[activity],
+        'Sections': 1,
+        'Length_m': length,
+        'Start_m': schedule['Start_m'].to_numpy(dtype=float)[section] if 'Start_m' in schedule else np.nan,
+        'End_m': schedule['End_m'].to_numpy(dtype=float)[section] if 'End_m' in schedule else np.nan,
+        'Hours': hours[pair_of_section[section], month, activity] * length * per_metre,
+    })
+    plan = frame.groupby(['Bundle', 'Month_Index', 'Activity'], sort=True).agg(
+        Sections=('Sections', 'sum'), Length_m=('Length_m', 'sum'), Start_m=('Start_m', 'min'),
+        End_m=('End_m', 'max'), Hours=('Hours', 'sum'),
+    ).reset_index()
+    plan['Hours'] += setup_hours
+    plan.insert(1, 'Year', start_year + plan['Month_Index'] // 12)
+    plan.insert(2, 'Month', plan['Month_Index'] % 12 + 1)
+    plan = plan.drop(columns='Month_Index')
+
+    tracks = [column for column in TRACK_COLUMNS if column in schedule.columns]
+    if tracks:
+        labels = schedule.groupby('Bundle', sort=True)[tracks].first()
+        plan = labels.reindex(plan['Bundle']).reset_index(drop=True).join(plan)
+    return plan
+
+
+# === HELPER FUNCTIONS ===
+
+def _possession_calendar(study, ledger, results, pairs, n_years):
+    """
+    Months with a possession (pairs, months, activities) and its hours of the LCC model per
+    TRACK_LENGTH_M, for rows `pairs` of a tuple_ledger.
+    """
+    calendar = track_ledger_calendar(ledger.take(pairs), results.iloc[pairs].reset_index(drop=True), study.costs,
+                                     n_years or ledger.n_months // 12, monthly=True)
+    hours = np.stack([calendar['hours'][..., list(columns)].sum(axis=2)
+                      for columns in POSSESSION_ACTIVITIES.values()], axis=2)
+    return hours > 0, hours
+
+
+def _align(lcc, masks, weight, choice, iterations):
+    """
+    Local search of the strategies of the units of a bundle.
+
+    Parameters:
+    - lcc: Annual LCC (SEK/year) of every unit and candidate strategy, inf if not allowed.
+    - masks: Possession months (units, strategies, months, activities).
+    - weight: Setup cost (SEK/year) of a possession in every month.
+    - choice: Starting strategy of every unit (its own optimum).
+
+    Returns:
+    - (strategy of every unit, annual LCC + setup cost of the bundle)
+    """
+    rows = np.arange(len(lcc))
+
+    def total(choice):
+        return lcc[rows, choice].sum() + (masks[rows, choice].any(axis=0) * weight[:, None]).sum()
+
+    # start from the own optima or from one common strategy for all units that allow it
+    starts = [choice] + [np.where(np.isfinite(lcc[:, s]), s, choice) for s in range(lcc.shape[1])]
+    choice = min(starts, key=total)
+    counts = masks[rows, choice].sum(axis=0).astype(int)
+    current = total(choice)
+    for _ in range(iterations):
+        # every move of every unit at once: (units, strategies)
+        after = counts[None, None] - masks[rows, choice][:, None] + masks
+        setup = ((after > 0) * weight[None, None, :, None]).sum(axis=(2, 3))
+        moved = lcc[rows, choice].sum() - lcc[rows, choice][:, None] + lcc + setup
+        i, s = np.unravel_index(np.argmin(moved), moved.shape)
+        if not moved[i, s] < current - 1e-9 * max(abs(current), 1):
+            break
+        counts += masks[i, s].astype(int) - masks[i, choice[i]]
+        choice[i] = s
+        current = total(choice)
+    return choice, current
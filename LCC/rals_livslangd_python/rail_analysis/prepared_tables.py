@@ -0,0 +1,564 @@
+# rail_analysis/prepared_tables.py
+"""
+Degradation tables stacked into arrays for the batched LCC engine (rail_analysis.LCC_batched).
+
+The scalar simulators filter the long input DataFrame with get_table and build a new
+PchipInterpolator over the gauge levels for every lookup. PreparedTables does this work
+once: every (profile, rail, radius, load) combination in the input becomes one table of
+shape (gauge, condition, month), and the PCHIP coefficients over the gauge axis are stored
+for all tables, conditions and months, so that a lookup for many strategies at once is a
+single gather and a cubic evaluation.
+
+Axle load and curve radius are treated as continuous parameters: tables for loads between
+(or beyond) the tabulated ones are interpolated along the load axis, and tables for other
+radii with monotone PCHIP in the curvature 1/R, cached on a radius grid (RADIUS_STEP).
+Derived tables are added on first use, or in bulk with add_loads and add_radii.
+
+Usage:
+    data_df = interpolate_rail_data(read_input_data(file_path))
+    tables = prepare_tables(data_df)
+    k = tables.table_index('MB4', 'High', radius='1465')
+    tables.add_loads([30, 32.5, 35])
+    tables.add_radii(curves['Radius'])
+"""
+
+import numpy as np  # type: ignore
+import pandas as pd  # type: ignore
+from scipy.interpolate import PchipInterpolator  # type: ignore
+
+# conditions in the order of the condition axis
+CONDITIONS = ('h-index', 'wear', 'rcf-residual', 'rcf-depth')
+H_INDEX, WEAR, RCF_RESIDUAL, RCF_DEPTH = range(len(CONDITIONS))
+
+# default axle load, as in get_table
+DEFAULT_LOAD = 32.5
+
+# resolution (m) of the radius grid that radius-interpolated tables are cached on
+RADIUS_STEP = 5
+
+# radius label of straight track, i.e. curvature 0
+TANGENT = 'Tangent'
+
+# months used by interpolate_condition_data for the PCHIP over the months
+VALID_MONTHS = np.array([0, 7, 8, 9, 10, 11, 12])
+
+
+class PreparedTables:
+    """
+    Stacked degradation tables with PCHIP coefficients over the gauge axis.
+
+    Parameters:
+    - keys: List of (profile, rail, radius, load) tuples, one per table. rail and radius may
+            be None for input files without these columns; such a table then matches any
+            rail/radius in table_index.
+    - gauges: List with the sorted gauge levels (mm) of each table.
+    - values: List of arrays of shape (n_gauges, len(CONDITIONS), n_months) with the table values
+              for the months 1 ... n_months since the last grinding.
+    - interpolate_loads: Derive tables for axle loads that are not tabulated by interpolating
+                         along the load axis (see add_loads). Defaults to True.
+    - interpolate_radii: Derive tables for curve radii that are not tabulated by interpolating
+                         in the curvature 1/R (see add_radii). Defaults to True.
+    - radius_step: Resolution (m) of the radius grid that interpolated tables are cached on.
+    """
+
+    def __init__(self, keys, gauges, values, interpolate_loads=True, interpolate_radii=True, radius_step=RADIUS_STEP):
+        self.interpolate_loads = interpolate_loads
+        self.interpolate_radii = interpolate_radii
+        self.radius_step = radius_step
+        self.keys = []
+        self._index = {}
+        self._gauges = []
+        self._values = []
+        self._coefficients = []
+        self._derived = []
+        self.n_months = None
+        for key, table_gauges, table_values in zip(keys, gauges, values):
+            self._append(key, table_gauges, table_values)
+        self._stack()
+
+    # --- construction ---
+
+    def _append(self, key, gauges, values, derived=False, coefficients=None):
+        key = _normalise_key(*key)
+        gauges = np.asarray(gauges, dtype=float)
+        values = np.asarray(values, dtype=float)
+        if values.shape[:2] != (len(gauges), len(CONDITIONS)):
+            raise ValueError(f"Table {key} must have shape (n_gauges, {len(CONDITIONS)}, n_months), got {values.shape}")
+        if self.n_months is None:
+            self.n_months = values.shape[2]
+        elif values.shape[2] != self.n_months:
+            raise ValueError(f"Table {key} has {values.shape[2]} months, expected {self.n_months}")
+        if len(gauges) < 2:
+            raise ValueError(f"Table {key} needs at least two gauge levels")
+        if np.isnan(values).any():
+            missing = [CONDITIONS[c] for c in range(len(CONDITIONS)) if np.isnan(values[:, c]).any()]
+            raise ValueError(f"Table {key} has missing values for {missing}")
+        order = np.argsort(gauges)
+        if key in self._index:
+            raise ValueError(f"Duplicate table {key}")
+        self._index[key] = len(self.keys)
+        self.keys.append(key)
+        self._gauges.append(gauges[order])
+        self._values.append(values[order])
+        # (n_gauges - 1, conditions, months, 4), highest degree first; `coefficients` are the
+        # PPoly coefficients of the sorted table when computed together with other tables
+        if coefficients is None:
+            coefficients = PchipInterpolator(gauges[order], values[order], axis=0).c
+        self._coefficients.append(np.moveaxis(coefficients, 0, -1))
+        self._derived.append(derived)
+        return self._index[key]
+
+    def _stack(self):
+        n_tables = len(self.keys)
+        max_gauges = max((len(g) for g in self._gauges), default=2)
+
+        # gauge breakpoints, padded with +inf so that interval searches ignore the padding
+        self.gauges = np.full((n_tables, max_gauges), np.inf)
+        self.n_gauges = np.zeros(n_tables, dtype=int)
+        self.values = np.full((n_tables, max_gauges, len(CONDITIONS), self.n_months or 0), np.nan)
+        # cubic coefficients (highest degree first) per table, gauge interval, condition and month
+        self.coefficients = np.zeros((n_tables, max_gauges - 1, len(CONDITIONS), self.n_months or 0, 4))
+        for k, (gauges, values, coefficients) in enumerate(zip(self._gauges, self._values, self._coefficients)):
+            n = len(gauges)
+            self.gauges[k, :n] = gauges
+            self.n_gauges[k] = n
+            self.values[k, :n] = values
+            self.coefficients[k, :n - 1] = coefficients
+
+    def shared_state(self):
+        """
+        Metadata and stacked arrays of the tables, e.g. to place the arrays in shared memory
+        (rail_analysis.shared_arrays); see from_shared_state.
+        """
+        metadata = {
+            'keys': list(self.keys),
+            'derived': list(self._derived),
+            'n_months': self.n_months,
+            'interpolate_loads': self.interpolate_loads,
+            'interpolate_radii': self.interpolate_radii,
+            'radius_step': self.radius_step,
+        }
+        arrays = {'gauges': self.gauges, 'n_gauges': self.n_gauges, 'values': self.values,
+                  'coefficients': self.coefficients}
+        return metadata, arrays
+
+    @classmethod
+    def from_shared_state(cls, metadata, arrays):
+        """
+        Tables on the given stacked arrays (from shared_state) without copying them or
+        computing the PCHIP coefficients again. Added tables are stacked into new arrays.
+        """
+        tables = cls.__new__(cls)
+        tables.interpolate_loads = metadata['interpolate_loads']
+        tables.interpolate_radii = metadata['interpolate_radii']
+        tables.radius_step = metadata['radius_step']
+        tables.n_months = metadata['n_months']
+        tables.keys = list(metadata['keys'])
+        tables._index = {key: k for k, key in enumerate(tables.keys)}
+        tables._derived = list(metadata['derived'])
+        tables.gauges = arrays['gauges']
+        tables.n_gauges = arrays['n_gauges']
+        tables.values = arrays['values']
+        tables.coefficients = arrays['coefficients']
+        tables._gauges = [tables.gauges[k, :n] for k, n in enumerate(tables.n_gauges)]
+        tables._values = [tables.values[k, :n] for k, n in enumerate(tables.n_gauges)]
+        tables._coefficients = [tables.coefficients[k, :n - 1] for k, n in enumerate(tables.n_gauges)]
+        return tables
+
+    def add_table(self, key, gauges, values, derived=True):
+        """
+        Add a (derived) table, e.g. interpolated to a new load or radius, and return its index.
+        Returns the existing index if a table with the same key is already present.
+        """
+        key = _normalise_key(*key)
+        if key in self._index:
+            return self._index[key]
+        index = self._append(key, gauges, values, derived=derived)
+        self._stack()
+        return index
+
+    # --- axle load axis ---
+
+    def tabulated_loads(self, profile, rail, radius):
+        """Return the sorted tabulated loads and the matching table indices for a (profile, rail, radius)."""
+        profile, rail, radius, _ = _normalise_key(profile, rail, radius, None)
+        matches = sorted((key[3], k) for key, k in self._index.items()
+                         if key[:3] == (profile, rail, radius) and not self._derived[k])
+        return [load for load, _ in matches], [k for _, k in matches]
+
+    def load_values(self, profile, rail, radius, load):
+        """
+        Interpolate the table values of a (profile, rail, radius) to an axle load.
+
+        The tabulated loads are interpolated with PCHIP along the load axis (linear for two
+        loads) and extrapolated beyond them, e.g. from 30 t and 32.5 t to 35 t. Quantities
+        that are non-negative in all tabulated loads are kept non-negative.
+
+        Returns:
+        - (gauges, values) of the interpolated table
+        """
+        loads, indices = self.tabulated_loads(profile, rail, radius)
+        if len(loads) < 2:
+            raise ValueError(f"Load interpolation needs at least two tabulated loads for "
+                             f"profile={profile}, rail={rail}, radius={radius}, found {loads}")
+        gauges = np.unique(np.concatenate([self._gauges[k] for k in indices]))
+        stacked = np.stack([self._values_on_gauges(k, gauges) for k in indices])  # (loads, gauges, conditions, months)
+        values = PchipInterpolator(loads, stacked, axis=0)(float(load))
+        return gauges, np.maximum(values, np.minimum(stacked.min(axis=0), 0))
+
+    def add_loads(self, loads, profiles=None):
+        """
+        Add load-interpolated tables for every (profile, rail, radius) with at least two
+        tabulated loads, so that a sweep over continuous axle loads needs no new input files.
+
+        Parameters:
+        - loads: Axle loads (t) to add.
+        - profiles: Restrict to these profiles, defaults to all.
+
+        Returns:
+        - list of the added table keys
+        """
+        groups = {key[:3] for key, k in self._index.items() if not self._derived[k]}
+        if profiles is not None:
+            profiles = {str(p).strip().upper() for p in profiles}
+            groups = {g for g in groups if g[0] in profiles}
+        added = []
+        for profile, rail, radius in sorted(groups, key=str):
+            if len(self.tabulated_loads(profile, rail, radius)[0]) < 2:
+                continue
+            for load in loads:
+                key = _normalise_key(profile, rail, radius, load)
+                if key in self._index:
+                    continue
+                gauges, values = self.load_values(profile, rail, radius, load)
+                self._append(key, gauges, values, derived=True)
+                added.append(key)
+        if added:
+            self._stack()
+        return added
+
+    # --- radius axis ---
+
+    def tabulated_radii(self, profile, rail):
+        """
+        Return the tabulated radii of a (profile, rail) sorted by curvature 1/R, with 'Tangent'
+        as curvature 0, together with the curvatures.
+        """
+        profile, rail, _, _ = _normalise_key(profile, rail, None, None)
+        radii = {key[2] for key, k in self._index.items()
+                 if key[:2] == (profile, rail) and not self._derived[k] and _curvature(key[2]) is not None}
+        radii = sorted(radii, key=_curvature)
+        return radii, [_curvature(radius) for radius in radii]
+
+    def grid_radius(self, radius):
+        """Round a radius (m) to the radius grid, returned as a radius key (e.g. '600')."""
+        curvature = _curvature(_normalise_key('', None, radius, None)[2])
+        if curvature is None:
+            raise ValueError(f"Radius {radius} is not a number or '{TANGENT}'")
+        if curvature == 0:
+            return TANGENT
+        radius = 1 / curvature
+        if self.radius_step:
+            radius = max(round(radius / self.radius_step), 1) * self.radius_step
+        return _normalise_key('', None, radius, None)[2]
+
+    def radius_values(self, profile, rail, radius, load=DEFAULT_LOAD):
+        """
+        Interpolate the table values of a (profile, rail, load) to a curve radius.
+
+        Values are interpolated with monotone PCHIP in the curvature 1/R across the tabulated
+        radii ('Tangent' being curvature 0). Radii outside the tabulated range use the table
+        of the nearest tabulated radius.
+
+        Returns:
+        - (gauges, values) of the interpolated table
+        """
+        gauges, curvatures, pchip = self._radius_interpolator(profile, rail, load)
+        curvature = _curvature(_normalise_key('', None, radius, None)[2])
+        curvature = min(max(curvature, curvatures[0]), curvatures[-1])
+        return gauges, pchip(curvature)
+
+    def _radius_interpolator(self, profile, rail, load):
+        """(gauges, tabulated curvatures, PCHIP in the curvature) of a (profile, rail, load)."""
+        radii, curvatures = self.tabulated_radii(profile, rail)
+        if len(radii) < 2:
+            raise ValueError(f"Radius interpolation needs at least two tabulated radii for "
+                             f"profile={profile}, rail={rail}, found {radii}")
+        indices = [self.table_index(profile, rail, r, load) for r in radii]
+        gauges = np.unique(np.concatenate([self._gauges[k] for k in indices]))
+        stacked = np.stack([self._values_on_gauges(k, gauges) for k in indices])  # (radii, gauges, conditions, months)
+        return gauges, curvatures, PchipInterpolator(curvatures, stacked, axis=0)
+
+    def add_radii(self, radii, profiles=None, loads=None):
+        """
+        Add radius-interpolated tables on the radius grid for every (profile, rail) with at
+        least two tabulated radii, e.g. for all curve radii of a network.
+
+        Parameters:
+        - radii: Curve radii (m), rounded to the radius grid.
+        - profiles: Restrict to these profiles, defaults to all.
+        - loads: Axle loads, defaults to the tabulated loads.
+
+        Returns:
+        - list of the added table keys
+        """
+        groups = {key[:2] for key, k in self._index.items() if not self._derived[k]}
+        if profiles is not None:
+            profiles = {str(p).strip().upper() for p in profiles}
+            groups = {g for g in groups if g[0] in profiles}
+        loads = self.loads if loads is None else loads
+        grid_radii = sorted({self.grid_radius(radius) for radius in radii}, key=_radius_sort_key)
+        added = []
+        for profile, rail in sorted(groups, key=str):
+            if len(self.tabulated_radii(profile, rail)[0]) < 2:
+                continue
+            for load in loads:
+                keys = [_normalise_key(profile, rail, radius, load) for radius in grid_radii]
+                keys = [key for key in keys if key not in self._index]
+                if not keys:
+                    continue
+                # one PCHIP in the curvature and one over the gauge for all radii of the group
+                gauges, curvatures, pchip = self._radius_interpolator(profile, rail, load)
+                curvature = np.clip([_curvature(key[2]) for key in keys], curvatures[0], curvatures[-1])
+                values = pchip(curvature)  # (radii, gauges, conditions, months)
+                coefficients = PchipInterpolator(gauges, values, axis=1).c
+                for i, key in enumerate(keys):
+                    self._append(key, gauges, values[i], derived=True, coefficients=coefficients[:, :, i])
+                    added.append(key)
+        if added:
+            self._stack()
+        return added
+
+    def _values_on_gauges(self, table, gauges):
+        """Values of a table at the given gauge levels, using its PCHIP over the gauge."""
+        if np.array_equal(self._gauges[table], gauges):
+            return self._values[table]
+        n = len(gauges)
+        values = np.empty((n, len(CONDITIONS), self.n_months))
+        for month in range(1, self.n_months + 1):
+            values[:, :, month - 1] = self.evaluate(np.full(n, table), np.full(n, month), gauges)
+        return values
+
+    # --- queries ---
+
+    def __len__(self):
+        return len(self.keys)
+
+    @property
+    def profiles(self):
+        return sorted({key[0] for key in self.keys})
+
+    @property
+    def radii(self):
+        return sorted({key[2] for key in self.keys if key[2] is not None}, key=_radius_sort_key)
+
+    @property
+    def loads(self):
+        """Tabulated axle loads (without load-interpolated tables)."""
+        return sorted({key[3] for key, k in self._index.items() if not self._derived[k]})
+
+    def is_derived(self, table):
+        """Whether a table is interpolated from the tabulated ones (to another load or radius)."""
+        return self._derived[table]
+
+    def table_index(self, profile, rail, radius=None, load=DEFAULT_LOAD):
+        """
+        Return the index of the table for the profile, rail ('High' or 'Inner'), radius and load.
+        Tables without rail or radius information match any rail or radius. With
+        interpolate_loads, a load that is not tabulated is interpolated (see add_loads), and
+        with interpolate_radii, a radius that is not tabulated is interpolated on the radius
+        grid (see add_radii).
+        """
+        profile, rail, radius, load = _normalise_key(profile, rail, radius, load)
+        candidates = ((profile, rail, radius, load), (profile, None, radius, load),
+                      (profile, rail, None, load), (profile, None, None, load))
+        for candidate in candidates:
+            if candidate in self._index:
+                return self._index[candidate]
+        if self.interpolate_loads:
+            for candidate in candidates:
+                if len(self.tabulated_loads(*candidate[:3])[0]) >= 2:
+                    gauges, values = self.load_values(*candidate)
+                    return self.add_table(candidate, gauges, values)
+        if self.interpolate_radii and radius is not None and _curvature(radius) is not None:
+            grid_radius = self.grid_radius(radius)
+            key = (profile, rail, grid_radius, load)
+            if key in self._index:
+                return self._index[key]
+            if len(self.tabulated_radii(profile, rail)[0]) >= 2:
+                gauges, values = self.radius_values(profile, rail, grid_radius, load)
+                return self.add_table(key, gauges, values)
+        raise ValueError(f"No table for profile={profile}, rail={rail}, radius={radius}, load={load}")
+
+    def table_indices(self, profile, rail, radius=None, load=DEFAULT_LOAD):
+        """Vectorised table_index: the arguments are broadcast against each other."""
+        profile, rail, radius, load = np.broadcast_arrays(
+            np.asarray(profile, dtype=object), np.asarray(rail, dtype=object),
+            np.asarray(radius, dtype=object), np.asarray(load, dtype=object)
+        )
+        lookup = {}
+        indices = np.empty(profile.shape, dtype=int)
+        for pos in np.ndindex(profile.shape):
+            args = (profile[pos], rail[pos], radius[pos], load[pos])
+            if args not in lookup:
+                lookup[args] = self.table_index(*args)
+            indices[pos] = lookup[args]
+        return indices
+
+    def gauge_interval(self, table, gauge):
+        """Index of the gauge interval of each (table, gauge) pair, extrapolating at both ends like PCHIP."""
+        interval = np.sum(gauge[:, None] >= self.gauges[table, 1:], axis=1)
+        return np.minimum(interval, self.n_gauges[table] - 2)
+
+    def evaluate(self, table, month, gauge, condition=None):
+        """
+        Evaluate the tables at the given month since grinding (1-based) and gauge.
+
+        Parameters:
+        - table: Array of table indices.
+        - month: Array of months since the last grinding (1 ... n_months).
+        - gauge: Array of gauge levels (mm).
+        - condition: Index of one condition (H_INDEX, WEAR, ...), or None for all conditions.
+
+        Returns:
+        - np.ndarray of shape (n,) for one condition, else (n, len(CONDITIONS))
+        """
+        table = np.asarray(table)
+        gauge = np.asarray(gauge, dtype=float)
+        interval = self.gauge_interval(table, gauge)
+        dx = gauge - self.gauges[table, interval]
+        if condition is None:
+            c = self.coefficients[table, interval, :, np.asarray(month) - 1]  # (n, conditions, 4)
+            dx = dx[:, None]
+        else:
+            c = self.coefficients[table, interval, condition, np.asarray(month) - 1]  # (n, 4)
+        return ((c[..., 0] * dx + c[..., 1]) * dx + c[..., 2]) * dx + c[..., 3]
+
+    def evaluate_fractional(self, table, month, gauge, condition=None):
+        """
+        Evaluate the tables at a fractional month since grinding (e.g. accumulated traffic in
+        months at the reference traffic), linear between the tabulated months. The conditions
+        are 0 at month 0 and months beyond n_months are clamped to the last tabulated month.
+        Integer months give exactly the values of evaluate.
+        """
+        month = np.clip(np.asarray(month, dtype=float), 0, self.n_months)
+        lower = np.floor(month).astype(int)
+        weight = month - lower
+        upper = np.minimum(lower + 1, self.n_months)
+        low_values = self.evaluate(table, np.maximum(lower, 1), gauge, condition)
+        high_values = self.evaluate(table, upper, gauge, condition)
+        if condition is None:
+            weight = weight[:, None]
+            lower = lower[:, None]
+        low_values = np.where(lower >= 1, low_values, 0)
+        return low_values + weight * (high_values - low_values)
+
+    def to_frame(self):
+        """Return the tables in the long format of the input data."""
+        records = []
+        for (profile, rail, radius, load), gauges, values in zip(self.keys, self._gauges, self._values):
+            for g, gauge in enumerate(gauges):
+                for c, condition in enumerate(CONDITIONS):
+                    for month in range(1, self.n_months + 1):
+                        records.append((profile, load, condition, gauge, radius, rail, month, values[g, c, month - 1]))
+        return pd.DataFrame.from_records(
+            records, columns=['Profile', 'Load', 'Condition', 'Gauge', 'Radius', 'Rail', 'Month', 'Value']
+        )
+
+
+def prepare_tables(data_df, interpolate_months=False, grinding_freq_max=12, interpolate_loads=True,
+                   interpolate_radii=True, radius_step=RADIUS_STEP):
+    """
+    Stack the degradation tables of a long-format DataFrame into PreparedTables.
+
+    Parameters:
+    - data_df: DataFrame with the columns 'Profile', 'Load', 'Condition', 'Gauge', 'Month',
+               'Value' and optionally 'Radius' and 'Rail', i.e. the output of
+               interpolate_rail_data (or of read_input_data with interpolate_months=True).
+    - interpolate_months: Apply the PCHIP over the months of interpolate_rail_data
+                          (months 0, 7 ... 12) before stacking.
+    - grinding_freq_max: Number of months of the interpolated tables.
+    - interpolate_loads: Interpolate tables for axle loads that are not tabulated.
+    - interpolate_radii: Interpolate tables for curve radii that are not tabulated.
+    - radius_step: Resolution (m) of the radius grid of the interpolated tables.
+
+    Returns:
+    - PreparedTables
+    """
+    df = data_df.copy()
+    if 'Load' not in df.columns:
+        df['Load'] = DEFAULT_LOAD
+    for column in ('Rail', 'Radius'):
+        if column not in df.columns:
+            df[column] = ''
+        df[column] = df[column].fillna('').astype(str).str.strip()
+    df['Profile'] = df['Profile'].astype(str).str.strip().str.upper()
+    df['Condition'] = df['Condition'].astype(str).str.strip().str.lower()
+    df = df[df['Condition'].isin(CONDITIONS)]
+
+    group_columns = ['Profile', 'Rail', 'Radius', 'Load']
+    months = np.sort(df['Month'].unique())
+    keys, gauges, values = [], [], []
+    for key, group in df.groupby(group_columns, sort=True):
+        table = group.groupby(['Gauge', 'Condition', 'Month'])['Value'].first()
+        table_gauges = np.sort(group['Gauge'].unique())
+        index = pd.MultiIndex.from_product([table_gauges, CONDITIONS, months])
+        table_values = table.reindex(index).to_numpy().reshape(len(table_gauges), len(CONDITIONS), len(months))
+        if interpolate_months:
+            table_values = _interpolate_months(table_values, months, grinding_freq_max)
+        profile, rail, radius, load = key
+        keys.append((profile, rail or None, radius or None, load))
+        gauges.append(table_gauges)
+        values.append(table_values)
+
+    if not keys:
+        raise ValueError("No degradation tables found in the input data")
+    return PreparedTables(keys, gauges, values, interpolate_loads=interpolate_loads,
+                          interpolate_radii=interpolate_radii, radius_step=radius_step)
+
+
+# === HELPER FUNCTIONS ===
+
+def _interpolate_months(values, months, grinding_freq_max):
+    """PCHIP over the months (0, 7 ... 12) with value 0 at month 0, as interpolate_condition_data."""
+    all_months = np.concatenate(([0], months))
+    all_values = np.concatenate((np.zeros(values.shape[:2] + (1,)), values), axis=-1)
+    valid = np.isin(all_months, VALID_MONTHS)
+    pchip = PchipInterpolator(all_months[valid], all_values[..., valid], axis=-1)
+    return pchip(np.arange(1, grinding_freq_max + 1))
+
+
+def _normalise_key(profile, rail, radius, load):
+    profile = str(profile).strip().upper()
+    if rail is not None:
+        rail = str(rail).strip().capitalize()
+        rail = 'Inner' if rail in ('Low', 'L') else 'High' if rail == 'H' else rail
+    if radius is not None:
+        radius = str(radius).strip()
+        try:
+            radius_value = float(radius)
+            if radius_value.is_integer():
+                radius = str(int(radius_value))
+        except ValueError:
+            radius = radius.capitalize()
+    load = round(float(load if load is not None else DEFAULT_LOAD), 3)
+    return profile, rail, radius, load
+
+
+def _curvature(radius):
+    """Curvature 1/R (1/m) of a normalised radius key, 0 for straight track, None if unknown."""
+    if radius is None:
+        return None
+    if radius == TANGENT:
+        return 0.0
+    try:
+        return 1 / float(radius)
+    except (ValueError, ZeroDivisionError):
+        return None
+
+
+def _radius_sort_key(radius):
+    try:
+        return (0, float(radius))
+    except ValueError:
+        return (1, float('inf'))
@@ -0,0 +1,108 @@
+# rail_analysis/profiling.py
+"""
+Opt-in instrumentation of the scalar LCC simulators.
+
+get_annuity_refactored and get_annuity_track_refactored take collect_stats=True (or an existing
+SimulationStats to accumulate over several calls) and then return a SimulationStats as the last
+element of their result tuple, with
+- counts: table loads (get_table calls), table lookups (month filters of a table), interpolator
+  builds (PchipInterpolator constructions), simulated months, renewal options evaluated,
+- times: seconds spent in each phase ('tables', 'grinding', 'tamping', 'milling', 'renewal',
+  'history', 'renewal_options') and the number of times each phase was entered.
+
+Without collect_stats the simulators use NULL_STATS, whose methods do nothing, so the
+instrumentation costs a few no-op calls per month.
+
+Example:
+    annuity, lifetime, _, stats = get_annuity_refactored(data_df, (5, 48), collect_stats=True)
+    print(stats.to_frame())
+"""
+
+import time
+from contextlib import nullcontext
+
+import pandas as pd  # type: ignore
+
+
+class SimulationStats:
+    """Counters and phase timers of one or more simulator calls."""
+
+    enabled = True
+
+    def __init__(self):
+        self.counts = {}
+        self.times = {}
+        self.calls = {}
+        self._phases = {}
+
+    def count(self, name, n=1):
+        self.counts[name] = self.counts.get(name, 0) + n
+
+    def phase(self, name):
+        """Context manager adding the time spent in the block to the phase `name`."""
+        phase = self._phases.get(name)
+        if phase is None:
+            phase = self._phases[name] = _Phase(self, name)
+        return phase
+
+    def merge(self, other):
+        """Add the counts and times of another SimulationStats."""
+        for name, n in other.counts.items():
+            self.count(name, n)
+        for name, seconds in other.times.items():
+            self.times[name] = self.times.get(name, 0.0) + seconds
+            self.calls[name] = self.calls.get(name, 0) + other.calls[name]
+        return self
+
+    def to_frame(self):
+        """DataFrame with the seconds, calls and share of the total time per phase, and the counts."""
+        total = sum(self.times.values())
+        phases = pd.DataFrame({
+            'Seconds': pd.Series(self.times, dtype=float),
+            'Calls': pd.Series(self.calls, dtype=float),
+        })
+        phases['Share'] = phases['Seconds'] / total if total > 0 else 0.0
+        counts = pd.DataFrame({'Count': pd.Series(self.counts, dtype=float)})
+        return pd.concat([phases, counts], axis=1)
+
+    def __repr__(self):
+        counts = ', '.join(f"{name}={n}" for name, n in self.counts.items())
+        times = ', '.join(f"{name}={seconds:.4f}s" for name, seconds in self.times.items())
+        return f"SimulationStats({counts}; {times})"
+
+
+class _Phase:
+    def __init__(self, stats, name):
+        self.stats = stats
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        stats = self.stats
+        stats.times[self.name] = stats.times.get(self.name, 0.0) + time.perf_counter() - self.start
+        stats.calls[self.name] = stats.calls.get(self.name, 0) + 1
+
+
+class _NullStats:
+    """Disabled instrumentation: every method is a no-op."""
+
+    enabled = False
+    _context = nullcontext()
+
+    def count(self, name, n=1):
+        pass
+
+    def phase(self, name):
+        return self._context
+
+
+NULL_STATS = _NullStats()
+
+
+def simulation_stats(collect_stats):
+    """Stats object for the collect_stats argument of the simulators (False, True or a SimulationStats)."""
+    if isinstance(collect_stats, SimulationStats):
+        return collect_stats
+    return SimulationStats() if collect_stats else NULL_STATS
@@ -0,0 +1,189 @@
+# rail_analysis/result_cache.py
+"""
+Persistent, content-addressed cache for simulation results.
+
+The same strategy is often evaluated by several studies (e.g. plot_variation_annuity_lifetime
+and compare_joint_vs_separate). The results of every evaluated scenario are stored in an
+SQLite database in data/processed, keyed by a hash of
+- the content of the input tables (interpolated DataFrame or PreparedTables),
+- the task and the strategy parameters (grinding and tamping intervals, radius, profiles, ...),
+- every cost constant in rail_analysis.constants and other shared arguments (cost overrides,
+  discount factors, ...),
+- the LCA data folder and the default LCAModel (its event factors and valuation curve),
+so a cached result is only reused when all of these are unchanged. rail_analysis.sweep.run_sweep
+looks the scenarios up and computes only the missing ones:
+
+    with ResultCache() as cache:
+        results = run_sweep(single_rail_task, scenarios, common={'data_df': data_df}, cache=cache)
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import time
+
+import numpy as np  # type: ignore
+import pandas as pd  # type: ignore
+
+from rail_analysis import constants
+from rail_analysis.prepared_tables import PreparedTables
+
+# default location of the cache, next to the other processed data files
+RESULT_CACHE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'processed', 'result_cache.sqlite'
+)
+
+# bump when the engines change their results to invalidate old entries
+RESULT_CACHE_VERSION = 1
+
+
+def value_digest(value):
+    """
+    SHA-256 digest of the content of a value: DataFrames, arrays and PreparedTables by their
+    data, JSON-like values by their JSON text and other objects by their pickle.
+    """
+    digest = hashlib.sha256()
+    if isinstance(value, PreparedTables):
+        # tabulated tables only: derived (interpolated) tables follow from them
+        tabulated = [k for k, derived in enumerate(value._derived) if not derived]
+        digest.update(repr([value.keys[k] for k in tabulated]).encode('utf-8'))
+        digest.update(repr((value.interpolate_loads, value.interpolate_radii, value.radius_step)).encode('utf-8'))
+        digest.update(np.ascontiguousarray(value.values[tabulated]).tobytes())
+        digest.update(np.ascontiguousarray(value.gauges[tabulated]).tobytes())
+    elif isinstance(value, pd.DataFrame):
+        digest.update(repr(list(value.columns)).encode('utf-8'))
+        digest.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+    elif isinstance(value, np.ndarray) and value.dtype != object:
+        digest.update(repr((value.shape, value.dtype.str)).encode('utf-8'))
+        digest.update(np.ascontiguousarray(value).tobytes())
+    else:
+        try:
+            digest.update(json.dumps(value, sort_keys=True, default=json_default).encode('utf-8'))
+        except TypeError:
+            digest.update(pickle.dumps(value))
+    return digest.hexdigest()
+
+
+def cost_constants():
+    """Numeric and text constants of rail_analysis.constants, including the track renewal cost."""
+    values = {
+        name: value for name, value in vars(constants).items()
+        if name.isupper() and isinstance(value, (int, float, str))
+    }
+    values['TRACK_RENEWAL_COST'] = constants.get_track_renewal_cost()
+    return values
+
+
+def lca_state():
+    """
+    LCA data folder and content of the default LCAModel (rail_analysis.LCA.get_LCA_model): its
+    event factors, assets and CO2e valuation.
+    """
+    from rail_analysis.LCA import get_LCA_data_dir, get_LCA_model
+    model = get_LCA_model()
+    return {
+        'data_dir': os.path.abspath(get_LCA_data_dir()),
+        'event_factors': dict(sorted(model.event_factors.items())),
+        'assets': model.assets,
+        'co2_per_m': value_digest(model.co2_per_m),
+        'energy_per_m': value_digest(model.energy_per_m),
+        'co2_price_by_year': value_digest(model.co2_price_by_year),
+        'first_year': model.first_year,
+    }
+
+
+def scenario_key(task_name, common_digest, scenario):
+    """Cache key of one scenario of a task, given the digest of the shared arguments (common_digest)."""
+    payload = json.dumps({
+        'task': task_name,
+        'common': common_digest,
+        'scenario': scenario,
+        'version': RESULT_CACHE_VERSION,
+    }, sort_keys=True, default=json_default)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def common_digest(common):
+    """Digest of the shared arguments of a sweep together with the cost constants and the LCA model."""
+    digests = {name: value_digest(value) for name, value in sorted(common.items())}
+    digests['constants'] = value_digest(cost_constants())
+    digests['lca'] = value_digest(lca_state())
+    return value_digest(digests)
+
+
+class ResultCache:
+    """
+    SQLite store of scenario results (dicts of numbers and text), keyed by scenario_key.
+
+    Parameters:
+    - path: Database file, defaults to RESULT_CACHE_PATH (':memory:' for a temporary cache).
+    """
+
+    def __init__(self, path=None):
+        self.path = path or RESULT_CACHE_PATH
+        if self.path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.connection = sqlite3.connect(self.path)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "key TEXT PRIMARY KEY, task TEXT, scenario TEXT, result TEXT, created REAL)"
+        )
+        self.connection.commit()
+
+    def get_many(self, keys):
+        """Return a dict {key: result} with the cached results of the given keys."""
+        found = {}
+        keys = list(keys)
+        # stay below SQLite's limit on the number of query parameters
+        for start in range(0, len(keys), 500):
+            batch = keys[start:start + 500]
+            rows = self.connection.execute(
+                f"SELECT key, result FROM results WHERE key IN ({','.join('?' * len(batch))})", batch
+            )
+            found.update((key, json.loads(result)) for key, result in rows)
+        return found
+
+    def put_many(self, entries):
+        """Store (key, task_name, scenario, result) entries, replacing existing ones."""
+        now = time.time()
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO results (key, task, scenario, result, created) VALUES (?, ?, ?, ?, ?)",
+            [(key, task, json.dumps(scenario, sort_keys=True, default=json_default),
+              json.dumps(result, default=json_default), now)
+             for key, task, scenario, result in entries]
+        )
+        self.connection.commit()
+
+    def clear(self, task_name=None):
+        """Remove all entries (of one task if task_name is given) and return their number."""
+        if task_name is None:
+            removed = self.connection.execute("DELETE FROM results").rowcount
+        else:
+            removed = self.connection.execute("DELETE FROM results WHERE task = ?", (task_name,)).rowcount
+        self.connection.commit()
+        return removed
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def json_default(value):
+    """JSON encoding of numpy values, ranges, tuples and sets (json.dumps default=)."""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, set):
+        return sorted(value)
+    if isinstance(value, (np.ndarray, range, tuple)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
@@ -0,0 +1,260 @@
+# rail_analysis/scenario_runner.py
+"""
+Batch runner for declarative scenario files.
+
+A scenario file (YAML) lists studies; every study is expanded into a job grid and evaluated
+with the batched engine through rail_analysis.sweep (parallel, cached and checkpointed). The
+results of each study are written as one columnar file. Run it with
+
+    python -m rail_analysis run scenarios.yaml [--workers 32] [--output results]
+
+from the rals_livslangd_python folder. Example file (paths are relative to the file):
+
+    output: ../results/overnight        # output folder, defaults to results/ next to the file
+    format: csv                         # csv, parquet (needs pyarrow or fastparquet) or feather
+                                        # (needs pyarrow), defaults to parquet when installed
+    workers: 32                         # defaults to all cores
+    cache: true                         # true (data/processed/result_cache.sqlite), false or a path
+    checkpoint: true                    # resume interrupted studies from <output>/checkpoints
+    defaults:                           # merged into every study
+      gauge_freqs: [24, 48]
+    studies:
+      - name: r1465
+        datasets: [data/raw/CM2025/BDL_111_results_JL_R1465.csv]
+        profiles: [MB4]                 # defaults to all profiles in the datasets
+        radii: ['1465']                 # defaults to all tabulated radii
+        loads: [32.5]                   # defaults to all tabulated loads
+        grinding_freqs: {start: 1, stop: 12}
+        same_grinding: false
+        same_profile: false
+        gauge_widenings: [1]
+        track_lives: [30]
+        discount_rates: [0.04, 0.035]   # or discount_schedule: [[0, 0.035], [30, 0.025]]
+        traffic_growth: [0.0, 0.02]     # optional, with annual_mgt: 35
+        costs: {GRINDING_COST_PER_M: 70}
+      - name: r495
+        datasets: [{path: data/raw/CM2025/BDL_111_results_JL_R495.csv, radius: '495'}]
+
+A dataset is a file path, or a dict with the path and a radius that replaces the Radius
+column of the file before interpolation (for files without, or with a wrong, radius). Every
+combination of dataset, track life, discount rate and traffic growth is a job group; within
+a group the strategies of the grid are evaluated in parallel chunks. The output format is
+checked before any study runs.
+"""
+
+import importlib.util
+import itertools
+import os
+
+import pandas as pd  # type: ignore
+import yaml  # type: ignore
+
+from preprocessings.read_input_data import read_input_data
+from rail_analysis.interpolation import interpolate_rail_data
+from rail_analysis.prepared_tables import prepare_tables
+from rail_analysis.LCC_batched import default_costs, track_grid
+from rail_analysis.discounting import constant_discount_factors, declining_discount_factors
+from rail_analysis.traffic import growing_traffic, traffic_factors
+from rail_analysis.sweep import run_sweep, track_grid_task
+from rail_analysis.telemetry import format_progress
+from rail_analysis.constants import ANNUAL_MGT, DISCOUNT_RATE, SELECTED_GAUGE_WIDENING, TECH_LIFE_YEARS
+
+OUTPUT_FORMATS = ('parquet', 'feather', 'csv')
+
+# study keys and their defaults
+STUDY_DEFAULTS = {
+    'datasets': None,
+    'profiles': None,
+    'radii': None,
+    'loads': None,
+    'grinding_freqs': list(range(1, 13)),
+    'gauge_freqs': [48],
+    'gauge_widenings': [SELECTED_GAUGE_WIDENING],
+    'same_grinding': False,
+    'same_profile': False,
+    'track_lives': [TECH_LIFE_YEARS],
+    'discount_rates': [DISCOUNT_RATE],
+    'discount_schedule': None,
+    'annual_mgt': ANNUAL_MGT,
+    'traffic_growth': None,
+    'costs': None,
+}
+
+
+def load_scenario_file(path):
+    """
+    Read a scenario file and return its settings with the studies completed by the defaults
+    and the dataset paths made absolute.
+    """
+    with open(path, encoding='utf-8') as f:
+        config = yaml.safe_load(f) or {}
+    base_dir = os.path.dirname(os.path.abspath(path))
+    if not config.get('studies'):
+        raise ValueError(f"{path}: no studies defined")
+
+    studies = []
+    for k, study in enumerate(config['studies']):
+        study = {**STUDY_DEFAULTS, **(config.get('defaults') or {}), **study}
+        study.setdefault('name', f"study_{k + 1}")
+        unknown = set(study) - set(STUDY_DEFAULTS) - {'name'}
+        if unknown:
+            raise ValueError(f"{path}: unknown keys {sorted(unknown)} in study {study['name']}")
+        if not study['datasets']:
+            raise ValueError(f"{path}: study {study['name']} has no datasets")
+        study['datasets'] = [_dataset(entry, base_dir) for entry in study['datasets']]
+        study['grinding_freqs'] = _values(study['grinding_freqs'])
+        study['gauge_freqs'] = _values(study['gauge_freqs'])
+        if study['costs']:
+            unknown = set(study['costs']) - set(default_costs())
+            if unknown:
+                raise ValueError(f"{path}: unknown cost constants {sorted(unknown)} in study {study['name']}")
+        studies.append(study)
+
+    output_format = config.get('format') or ('parquet' if _has_parquet_engine() else 'csv')
+    _check_format(output_format, path)
+    cache = config.get('cache', True)
+    if isinstance(cache, str):
+        cache = os.path.join(base_dir, cache)
+    return {
+        'output': os.path.join(base_dir, config.get('output', 'results')),
+        'format': output_format,
+        'workers': config.get('workers'),
+        'chunk_size': config.get('chunk_size'),
+        'cache': cache,
+        'checkpoint': config.get('checkpoint', True),
+        'studies': studies,
+    }
+
+
+def study_jobs(study):
+    """
+    Expand a study into its job groups: yields (group, common, scenarios) with the group
+    parameters (dataset, track life, discount rate, traffic growth), the shared arguments of
+    the group and the strategy grid.
+    """
+    discount_rates = [None] if study['discount_schedule'] else list(study['discount_rates'])
+    growths = [None] if study['traffic_growth'] is None else list(study['traffic_growth'])
+    for dataset in study['datasets']:
+        tables = load_tables(dataset)
+        scenarios = track_grid(
+            tables, study['grinding_freqs'], study['gauge_freqs'], study['profiles'], study['radii'],
+            study['loads'], study['gauge_widenings'], study['same_grinding'], study['same_profile']
+        )
+        for track_life, rate, growth in itertools.product(study['track_lives'], discount_rates, growths):
+            n_months = 12 * track_life
+            if rate is None:
+                discount_factors = declining_discount_factors(study['discount_schedule'], n_months)
+            else:
+                discount_factors = constant_discount_factors(rate, n_months)
+            common = {
+                'tables': tables,
+                'track_life': track_life,
+                'discount_factors': discount_factors,
+                'costs': {**default_costs(), **(study['costs'] or {})},
+            }
+            if growth is not None:
+                common['traffic_factors'] = traffic_factors(
+                    growing_traffic(study['annual_mgt'], growth, track_life), n_months
+                )
+            group = {
+                'Dataset': os.path.basename(dataset['path']),
+                'TrackLife': track_life,
+                'DiscountRate': 'schedule' if rate is None else rate,
+                'TrafficGrowth': growth,
+            }
+            yield group, common, scenarios
+
+
+def load_tables(dataset):
+    """PreparedTables of a dataset entry (see load_scenario_file)."""
+    data_df = read_input_data(dataset['path'])
+    if data_df is None:
+        raise ValueError(f"Could not read {dataset['path']}")
+    if dataset.get('radius') is not None:
+        data_df['Radius'] = str(dataset['radius'])
+    for column in ('Rail', 'Radius'):
+        if column not in data_df.columns:
+            raise ValueError(f"{dataset['path']}: no {column} column")
+    return prepare_tables(interpolate_rail_data(data_df))
+
+
+def run_scenario_file(path, workers=None, output=None, output_format=None, progress=print):
+    """
+    Run all studies of a scenario file and write one results file per study.
+
+    Parameters:
+    - path: Scenario file (YAML).
+    - workers, output, output_format: Override the settings of the file.
+    - progress: Function called with progress messages, None for no messages.
+
+    The telemetry of every job group (throughput, cache hits, worker busy time, ETA) is
+    appended to <output>/metrics.jsonl.
+
+    Returns:
+    - dict {study name: path of the results file}
+    """
+    config = load_scenario_file(path)
+    workers = workers or config['workers']
+    output = output or config['output']
+    output_format = output_format or config['format']
+    _check_format(output_format, path)
+    os.makedirs(output, exist_ok=True)
+    progress = progress or (lambda message: None)
+
+    written = {}
+    for study in config['studies']:
+        frames = []
+        for n, (group, common, scenarios) in enumerate(study_jobs(study)):
+            progress(f"{study['name']}: {group} ({len(scenarios)} strategies)")
+            checkpoint = None
+            if config['checkpoint']:
+                checkpoint = os.path.join(output, 'checkpoints', study['name'], str(n))
+            results = run_sweep(
+                track_grid_task, scenarios, common=common, workers=workers, chunk_size=config['chunk_size'],
+                cache=config['cache'] or None, checkpoint=checkpoint, vectorised=True,
+                progress=lambda report: progress(format_progress(report)),
+                metrics_file=os.path.join(output, 'metrics.jsonl'), label=f"{study['name']}[{n}]"
+            )
+            frames.append(pd.concat([pd.DataFrame([group] * len(results)), results], axis=1))
+        file_path = os.path.join(output, f"{study['name']}.{output_format}")
+        write_results(pd.concat(frames, ignore_index=True), file_path, output_format)
+        progress(f"{study['name']}: results written to {file_path}")
+        written[study['name']] = file_path
+    return written
+
+
+def write_results(results, file_path, output_format):
+    """Write a results DataFrame as parquet, feather or csv."""
+    if output_format == 'parquet':
+        results.to_parquet(file_path, index=False)
+    elif output_format == 'feather':
+        results.to_feather(file_path)
+    else:
+        results.to_csv(file_path, index=False)
+
+
+def _dataset(entry, base_dir):
+    if isinstance(entry, str):
+        entry = {'path': entry}
+    return {**entry, 'path': os.path.join(base_dir, entry['path'])}
+
+
+def _values(values):
+    """List of values, or a {start, stop, step} range (stop included)."""
+    if isinstance(values, dict):
+        return list(range(values['start'], values['stop'] + 1, values.get('step', 1)))
+    return list(values)
+
+
+def _check_format(output_format, path):
+    """Fail before any study runs when the output format is unknown or its engine is missing."""
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"{path}: format must be one of {OUTPUT_FORMATS}")
+    if output_format == 'parquet' and not _has_parquet_engine():
+        raise ImportError(f"{path}: format parquet needs pyarrow or fastparquet, install one or use csv")
+    if output_format == 'feather' and importlib.util.find_spec('pyarrow') is None:
+        raise ImportError(f"{path}: format feather needs pyarrow, install it or use csv")
+
+
+def _has_parquet_engine():
+    return any(importlib.util.find_spec(name) is not None for name in ('pyarrow', 'fastparquet'))
@@ -0,0 +1,114 @@
+# rail_analysis/shared_arrays.py
+"""
+Shared-memory arrays for the sweep workers.
+
+The parent process copies the prepared degradation tables (PreparedTables) and arrays such
+as the discount factors once into multiprocessing.shared_memory blocks. The workers only
+receive small handles (block name, shape and dtype) and attach to the blocks without
+copying, so the memory use and the cost of starting a task do not grow with the number of
+workers. The attached arrays are read-only; a worker that derives new tables (e.g. an
+interpolated load) builds them in its own memory.
+
+Usage (rail_analysis.sweep.run_sweep does this for the common arguments):
+    with SharedArrays() as shared:
+        handle = shared.share_value(tables)   # in the parent
+        ...
+        tables = attach(handle)               # in a worker
+"""
+
+import sys
+from multiprocessing import shared_memory
+
+import numpy as np  # type: ignore
+
+from rail_analysis.prepared_tables import PreparedTables
+
+
+class ArrayHandle:
+    """Name, shape and dtype of an array in a shared-memory block."""
+
+    def __init__(self, name, shape, dtype):
+        self.name = name
+        self.shape = shape
+        self.dtype = dtype
+
+
+class TablesHandle:
+    """PreparedTables metadata (keys, settings) and the handles of its stacked arrays."""
+
+    def __init__(self, metadata, arrays):
+        self.metadata = metadata
+        self.arrays = arrays
+
+
+class SharedArrays:
+    """
+    Owner of the shared-memory blocks in the parent process. The blocks are released when the
+    object is closed (or at the end of the with block), after the workers have finished.
+    """
+
+    def __init__(self):
+        self._blocks = []
+
+    def share(self, array):
+        """Copy an array into a new shared-memory block and return its ArrayHandle."""
+        array = np.ascontiguousarray(array)
+        block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        self._blocks.append(block)
+        np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+        return ArrayHandle(block.name, array.shape, array.dtype.str)
+
+    def share_tables(self, tables):
+        """Share the stacked arrays of a PreparedTables and return its TablesHandle."""
+        metadata, arrays = tables.shared_state()
+        return TablesHandle(metadata, {name: self.share(array) for name, array in arrays.items()})
+
+    def share_value(self, value):
+        """
+        Return a handle for PreparedTables and numeric arrays, other values unchanged
+        (they are pickled as usual).
+        """
+        if isinstance(value, PreparedTables):
+            return self.share_tables(value)
+        if isinstance(value, np.ndarray) and value.dtype != object and value.size > 0:
+            return self.share(value)
+        return value
+
+    def close(self):
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# shared-memory blocks attached in this process, kept open while their arrays are in use
+_attached = {}
+
+
+def attach(handle):
+    """
+    Return the value of a handle from SharedArrays: a read-only array for an ArrayHandle,
+    PreparedTables on the shared arrays for a TablesHandle, other values unchanged.
+    """
+    if isinstance(handle, TablesHandle):
+        arrays = {name: attach(array) for name, array in handle.arrays.items()}
+        return PreparedTables.from_shared_state(handle.metadata, arrays)
+    if not isinstance(handle, ArrayHandle):
+        return handle
+    block = _attached.get(handle.name)
+    if block is None:
+        if sys.version_info >= (3, 13):
+            # the parent owns (and unlinks) the block
+            block = shared_memory.SharedMemory(name=handle.name, track=False)
+        else:
+            block = shared_memory.SharedMemory(name=handle.name)
+        _attached[handle.name] = block
+    array = np.ndarray(handle.shape, dtype=np.dtype(handle.dtype), buffer=block.buf)
+    array.flags.writeable = False
+    return array
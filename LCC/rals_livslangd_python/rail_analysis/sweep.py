@@ -0,0 +1,253 @@
+# rail_analysis/sweep.py
+"""
+Sweep executor: runs a task for every scenario of a grid on a pool of worker processes.
+
+The scenario grid is split into chunks of consecutive scenarios, the chunks are run in a
+ProcessPoolExecutor and the results are put back together in the order of the grid, so the
+result does not depend on the number of workers or on which worker finishes first.
+Arguments shared by all scenarios (e.g. the interpolated tables) are sent once to every
+worker, not with every chunk. Prepared tables (PreparedTables) and numeric arrays such as the
+discount factors are placed in shared memory (rail_analysis.shared_arrays), so the workers
+only receive the block names and attach to them without copying.
+
+A task is a module-level function (it must be picklable) called as
+task(**common, **scenario) and returning a dict of results (or a scalar, stored as 'Result').
+A vectorised task (vectorised=True) is called once per chunk as task(scenarios, **common) with
+the list of scenario dicts and returns one dict of results per scenario, e.g. track_grid_task
+evaluating a whole chunk in one batched-engine call.
+
+Example (single-rail annuity for all grinding intervals, on all cores):
+    scenarios = scenario_grid(grinding_freq=range(1, 13), gauge_freq=[24, 48])
+    results = run_sweep(single_rail_task, scenarios, common={'data_df': data_df_interpolated})
+
+Example (batched engine on shared tables):
+    scenarios = scenario_grid(grinding_freq_low=range(1, 13), grinding_freq_high=range(1, 13))
+    results = run_sweep(track_batch_task, scenarios, common={'tables': prepare_tables(data_df_interpolated)})
+
+With a ResultCache (rail_analysis.result_cache), scenarios that were evaluated before with the
+same tables, arguments and cost constants are read from the cache and only the missing ones
+are run; results.attrs['cache_hits'] holds the number of cached scenarios. With a checkpoint
+directory the completed chunks are saved as they finish, and an interrupted sweep resumes
+where it stopped (rail_analysis.checkpoint). Throughput, cache hit rate, worker busy time and
+ETA are reported after every chunk to a progress callback and/or a JSON-lines metrics file
+(rail_analysis.telemetry).
+
+On Windows the calling script needs the usual `if __name__ == "__main__":` guard.
+"""
+
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd  # type: ignore
+
+from rail_analysis.LCC_single_rail import get_annuity_refactored
+from rail_analysis.LCC_two_rails import get_annuity_track_refactored
+from rail_analysis.LCC_batched import get_annuity_track_batch
+from rail_analysis.shared_arrays import SharedArrays, attach
+from rail_analysis.result_cache import ResultCache, common_digest, scenario_key
+from rail_analysis.checkpoint import SweepCheckpoint, sweep_digest
+from rail_analysis.telemetry import SweepTelemetry
+from rail_analysis.constants import TECH_LIFE_YEARS
+
+
+def scenario_grid(**axes):
+    """
+    Full factorial grid of the given axes, e.g. scenario_grid(grinding_freq=range(1, 13), gauge_freq=[24, 48]).
+
+    Returns:
+    - DataFrame with one column per axis and one row per scenario (the last axis varies fastest).
+    """
+    names = list(axes)
+    return pd.MultiIndex.from_product([list(values) for values in axes.values()], names=names).to_frame(index=False)
+
+
+def run_sweep(task, scenarios, common=None, workers=None, chunk_size=None, include_scenarios=True,
+              share_memory=True, cache=None, checkpoint=None, vectorised=False, progress=None,
+              metrics_file=None, label=None):
+    """
+    Run task(**common, **scenario) for every scenario.
+
+    Parameters:
+    - task: Module-level function returning a dict of results (or a scalar).
+    - scenarios: DataFrame (one row per scenario, columns are the task arguments) or list of dicts.
+    - common: Dict of arguments shared by all scenarios.
+    - workers: Number of worker processes, defaults to os.cpu_count(). With 1 the scenarios
+               run in the calling process.
+    - chunk_size: Number of scenarios per chunk, defaults to about four chunks per worker.
+    - include_scenarios: Put the scenario columns in front of the results.
+    - share_memory: Place PreparedTables and numeric arrays of `common` in shared memory
+                    instead of pickling a copy for every worker.
+    - cache: ResultCache (or the path of its database) to read and store the results.
+    - checkpoint: Directory to write the completed chunks to (rail_analysis.checkpoint). A sweep
+                  started again with the same directory only runs the remaining scenarios.
+    - vectorised: Call the task once per chunk with the list of scenarios (see above).
+    - progress: Function called with a telemetry report (dict) after every chunk, e.g.
+                rail_analysis.telemetry.print_progress.
+    - metrics_file: JSON-lines file the telemetry reports are appended to.
+    - label: Name of the sweep in the telemetry reports.
+
+    Returns:
+    - DataFrame with one row per scenario, in the order of `scenarios`. results.attrs holds
+      'cache_hits' and the final telemetry report ('telemetry').
+    """
+    if not isinstance(scenarios, pd.DataFrame):
+        scenarios = pd.DataFrame(list(scenarios))
+    scenarios = scenarios.reset_index(drop=True)
+    common = dict(common or {})
+    records = scenarios.to_dict('records')
+    task_name = f"{task.__module__}.{task.__qualname__}"
+    digest = common_digest(common) if cache is not None or checkpoint is not None else None
+
+    rows = {}
+    own_cache = cache is not None and not isinstance(cache, ResultCache)
+    if own_cache:
+        cache = ResultCache(None if cache is True else cache)
+    if cache is not None:
+        keys = [scenario_key(task_name, digest, record) for record in records]
+        cached = cache.get_many(keys)
+        rows.update((i, cached[key]) for i, key in enumerate(keys) if key in cached)
+    n_cached = len(rows)
+    if checkpoint is not None:
+        checkpoint = SweepCheckpoint(checkpoint, sweep_digest(task_name, digest, records), len(records))
+        rows.update(checkpoint.load())
+
+    todo = [i for i in range(len(records)) if i not in rows]
+    workers = (os.cpu_count() or 1) if workers is None else max(int(workers), 1)
+    workers = max(min(workers, len(todo)), 1)
+    if 'track_life' in scenarios:
+        months = 12 * float(scenarios['track_life'].mean())
+    else:
+        months = 12 * common.get('track_life', TECH_LIFE_YEARS)
+    telemetry = SweepTelemetry(len(records), done=len(rows), cached=n_cached, months=months, workers=workers,
+                               progress=progress, metrics_file=metrics_file, label=label)
+    try:
+        chunks = _run_chunks(task, records, todo, common, workers, chunk_size, share_memory, vectorised)
+        for indices, chunk_rows, worker, busy in chunks:
+            rows.update(zip(indices, chunk_rows))
+            telemetry.chunk_done(len(indices), worker, busy)
+            if checkpoint is not None:
+                checkpoint.append(indices, chunk_rows)
+            if cache is not None:
+                cache.put_many((keys[i], task_name, records[i], row) for i, row in zip(indices, chunk_rows))
+    finally:
+        if own_cache:
+            cache.close()
+
+    results = pd.DataFrame([rows[i] for i in range(len(records))], index=scenarios.index)
+    if include_scenarios:
+        results = pd.concat([scenarios, results.drop(columns=scenarios.columns, errors='ignore')], axis=1)
+    results.attrs['cache_hits'] = n_cached
+    results.attrs['telemetry'] = telemetry.finish()
+    return results
+
+
+def _run_chunks(task, records, todo, common, workers, chunk_size, share_memory, vectorised):
+    """
+    Run the task for the scenarios at the indices `todo`, in chunks on a process pool, and
+    yield (indices, result rows, worker process id, busy seconds) of every chunk as soon as it
+    is completed.
+    """
+    if not todo:
+        return
+    if chunk_size is None:
+        chunk_size = max(math.ceil(len(todo) / (4 * workers)), 1)
+    chunks = [todo[i:i + chunk_size] for i in range(0, len(todo), chunk_size)]
+
+    if workers == 1:
+        for indices in chunks:
+            yield (indices, *_timed_chunk([records[i] for i in indices], task, common, vectorised))
+        return
+    with SharedArrays() as shared:
+        if share_memory:
+            common = {name: shared.share_value(value) for name, value in common.items()}
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(task, common, vectorised)) as executor:
+            futures = {
+                executor.submit(_run_worker_chunk, [records[i] for i in indices]): indices
+                for indices in chunks
+            }
+            try:
+                for future in as_completed(futures):
+                    yield (futures[future], *future.result())
+            finally:
+                # on an error (or an interrupted sweep) do not start the remaining chunks
+                for future in futures:
+                    future.cancel()
+
+
+# === TASKS ===
+
+def single_rail_task(data_df, grinding_freq, gauge_freq=48, high_or_low_rail='High', **kwargs):
+    """Annuity and lifetime of one single-rail strategy (get_annuity_refactored)."""
+    annuity, lifetime, _ = get_annuity_refactored(
+        data_df, (grinding_freq, gauge_freq), high_or_low_rail=high_or_low_rail, **kwargs
+    )
+    return {'Annuity': annuity, 'Lifetime': lifetime}
+
+
+def track_task(data_df, grinding_freq_low, grinding_freq_high, gauge_freq=48, **kwargs):
+    """Annuity and lifetime of one two-rail strategy (get_annuity_track_refactored)."""
+    annuity, lifetime, _ = get_annuity_track_refactored(
+        data_df, grinding_freq_low, grinding_freq_high, gauge_freq, **kwargs
+    )
+    return {'Annuity': annuity, 'Lifetime': lifetime}
+
+
+def track_batch_task(tables, grinding_freq_low, grinding_freq_high, gauge_freq=48, **kwargs):
+    """Results of one two-rail strategy with the batched engine (get_annuity_track_batch) on PreparedTables."""
+    results = get_annuity_track_batch(tables, grinding_freq_low, grinding_freq_high, gauge_freq, **kwargs)
+    return results.iloc[0].to_dict()
+
+
+def track_grid_task(scenarios, tables, **kwargs):
+    """
+    Vectorised task: the two-rail strategies of a chunk in one get_annuity_track_batch call.
+    The scenarios hold get_annuity_track_batch arguments (e.g. the rows of LCC_batched.track_grid).
+    """
+    arguments = pd.DataFrame(scenarios)
+    results = get_annuity_track_batch(tables, **{name: arguments[name].to_numpy() for name in arguments}, **kwargs)
+    # the strategy parameters are already in the scenarios
+    results = results.drop(columns=_TRACK_STRATEGY_COLUMNS)
+    return results.to_dict('records')
+
+
+_TRACK_STRATEGY_COLUMNS = ['Profile_Low', 'Profile_High', 'Radius', 'Load', 'GrindingFreq_Low',
+                           'GrindingFreq_High', 'GaugeFreq', 'GaugeWidening']
+
+
+# === WORKERS ===
+
+_worker_task = None
+_worker_common = None
+_worker_vectorised = False
+
+
+def _init_worker(task, common, vectorised):
+    global _worker_task, _worker_common, _worker_vectorised
+    _worker_task = task
+    _worker_common = {name: attach(value) for name, value in common.items()}
+    _worker_vectorised = vectorised
+
+
+def _run_worker_chunk(chunk):
+    return _timed_chunk(chunk, _worker_task, _worker_common, _worker_vectorised)
+
+
+def _timed_chunk(chunk, task, common, vectorised):
+    start = time.perf_counter()
+    rows = _run_chunk(chunk, task, common, vectorised)
+    return rows, os.getpid(), time.perf_counter() - start
+
+
+def _run_chunk(chunk, task, common, vectorised=False):
+    if vectorised:
+        rows = list(task(chunk, **common))
+        if len(rows) != len(chunk):
+            raise ValueError(f"{task.__name__} returned {len(rows)} results for {len(chunk)} scenarios")
+        return rows
+    rows = []
+    for scenario in chunk:
+        result = task(**common, **scenario)
+        rows.append(result if isinstance(result, dict) else {'Result': result})
+    return rows
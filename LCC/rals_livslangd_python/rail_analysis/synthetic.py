@@ -0,0 +1,284 @@
+# rail_analysis/synthetic.py
+"""
+Synthetic inputs for load tests and benchmarks at network scale.
+
+synthetic_degradation_tables generates degradation tables (h-index, wear, rcf-depth and
+rcf-residual over gauge x month) for any number of profiles, radii and loads, in the long
+format of read_input_data. The curves follow the shape of the CM2025 tables and are scaled by
+a severity that grows with the curvature (1/R) and the axle load, with a random factor per
+profile and rail; every curve is non-decreasing in the month and in the gauge, so the PCHIP
+interpolation of the simulators stays monotone.
+
+synthetic_curve_inventory generates a curve inventory with the columns of
+matched_curves_within_tracks.csv (data matching and clustering): curves along lines (Track_Bdl),
+grouped in track sections sharing rail model, rail weight, sleeper and fastening type. The
+distributions of radius, length and track types follow the matched inventory, or are
+resampled from a given inventory (template).
+
+Both are generated with numpy from a seed, e.g. 10^6 curves in a few seconds:
+
+    tables = synthetic_degradation_tables(profiles=8, radii=range(300, 3001, 100), loads=(25, 30, 32.5))
+    curves = synthetic_curve_inventory(1_000_000, seed=1)
+
+or from the command line (writes degradation_tables.csv and curves.csv):
+
+    python -m rail_analysis synth --curves 1000000 --profiles 8 --output data/synthetic
+"""
+
+import os
+
+import numpy as np  # type: ignore
+import pandas as pd  # type: ignore
+
+from rail_analysis.prepared_tables import CONDITIONS, DEFAULT_LOAD, TANGENT
+
+# curve shapes, fitted to the CM2025 tables of radius 1465 m (severity 1)
+H_INDEX_BASE = 0.3          # h-index after grinding, up to the knee month
+H_INDEX_KNEE = 6            # month from which the h-index after grinding grows
+H_INDEX_SLOPE = 0.055       # growth per month after the knee
+WEAR_SCALE = 0.1            # wear in the first month (high rail)
+WEAR_EXPONENT = 0.7         # wear grows as month ** WEAR_EXPONENT
+RCF_DEPTH_MAX = 0.045       # saturation depth of RCF
+RCF_DEPTH_MONTHS = 3.0      # time constant (months) of the RCF depth
+RCF_RESIDUAL_STEP = 0.03    # RCF left after grinding once the crack depth is too large
+RCF_RESIDUAL_MONTHS = 19.0  # grinding interval from which RCF is left, at severity 1
+
+REFERENCE_RADIUS = 1465
+RADIUS_EXPONENT = 0.6
+LOAD_EXPONENT = 1.5
+TANGENT_SEVERITY = 0.35
+RAIL_FACTORS = {'High': 1.0, 'Inner': 0.8}
+GAUGE_STEP_FACTOR = 0.04    # relative increase per 5 mm of gauge widening
+
+N_MONTHS = 12
+
+# track types of the matched inventory: (rail model, rail weight kg/m, sleeper, fastening) and share
+TRACK_TYPES = [
+    ('UIC', 60.0, 'B2.5', 'P-Ec', 0.271),
+    ('UIC', 60.0, 'B', 'P-Ec', 0.062),
+    ('BV', 50.0, 'B2.5', 'P-Ec', 0.054),
+    ('E1', 60.0, 'B2.5', 'P-Fc', 0.054),
+    ('E1', 60.0, 'B2.5', 'P-FE', 0.052),
+    ('UIC', 60.0, 'B2.5', 'P-Fc', 0.044),
+    ('SJ', 50.0, 'B2.5', 'P-Ec', 0.042),
+    ('SJ', 43.0, 'T', 'R-und', 0.033),
+    ('SJ', 50.0, 'B', 'P-Ec', 0.033),
+    ('SJ', 50.0, 'B', 'Hambo', 0.031),
+    ('E1', 60.0, 'B35', 'P-Fc', 0.025),
+    ('SJ', 50.0, 'T', 'Hey', 0.021),
+    ('SJ', 50.0, 'T', 'R-und', 0.021),
+    ('BV', 50.0, 'B', 'P-Ec', 0.016),
+    ('UIC', 60.0, 'B35', 'P-Fc', 0.014),
+    ('E1', 60.0, 'B', 'P-Fc', 0.012),
+    ('E3', 60.0, 'B2.5', 'P-Fc', 0.050),
+    ('SJ', 34.0, 'T', 'Skruv', 0.010),
+]
+# maintenance districts (Track_UNE) of the lines and their share
+DISTRICTS = {'E': 0.73, 'U': 0.11, 'N': 0.11, 'E2': 0.02, 'U2': 0.015, 'N2': 0.015}
+
+# log-normal radius (m) and curve length (m) of the matched inventory
+LOG_RADIUS_MEAN, LOG_RADIUS_STD = 6.95, 1.0
+MIN_RADIUS, MAX_RADIUS = 150, 100000
+LOG_LENGTH_MEAN, LOG_LENGTH_STD = 4.2, 1.0
+CURVES_PER_LINE = 90
+CURVES_PER_SECTION = 3
+MEAN_GAP_M = 400
+
+INVENTORY_COLUMNS = [
+    'Curve_Kmtal', 'Curve_Kmtalti', 'Curve_Langd_m', 'Curve_Radie_m', 'Curve_Kmtal_km', 'Curve_Kmtal_meter',
+    'Curve_Kmtaltil_km', 'Curve_Kmtaltil_meter', 'Curve_Start_Meters', 'Curve_End_Meters', 'Track_Bdl',
+    'Track_Km', 'Track_+m', 'Track_Kmti', 'Track_+mti', 'Track_spm', 'Track_UNE', 'Track_spår', 'Track_Pl/Str',
+    'Track_Rälmodell', 'Track_Räl_vikt(kg/m)', 'Track_Sliper_typ', 'Track_Befästning_typ',
+    'Track_Start_Meters', 'Track_End_Meters',
+]
+
+
+def severity(radius, load=DEFAULT_LOAD):
+    """
+    Degradation severity of a radius (m, or 'Tangent') and axle load (t), 1 at 1465 m and 32.5 t.
+    """
+    radius = np.asarray(radius, dtype=object)
+    curvature = np.array([0.0 if str(r) == TANGENT else 1 / abs(float(r)) for r in radius.ravel()]).reshape(radius.shape)
+    s = TANGENT_SEVERITY + (1 - TANGENT_SEVERITY) * (curvature * REFERENCE_RADIUS) ** RADIUS_EXPONENT
+    return s * (np.asarray(load, dtype=float) / DEFAULT_LOAD) ** LOAD_EXPONENT
+
+
+def synthetic_degradation_tables(profiles=4, radii=(300, 495, 800, 1465, 3000, TANGENT), loads=(DEFAULT_LOAD,),
+                                 gauges=(1440, 1445, 1450), rails=('High', 'Inner'), spread=0.1, seed=0):
+    """
+    Synthetic degradation tables in the long format of read_input_data.
+
+    Parameters:
+    - profiles: Number of profiles (named SYN1, SYN2, ...) or list of profile names.
+    - radii: Radii (m, or 'Tangent').
+    - loads: Axle loads (t).
+    - gauges: Gauge levels (mm).
+    - rails: Rails ('High', 'Inner').
+    - spread: Spread of the random factor of each profile and rail (factor 1 +- spread).
+    - seed: Seed of the random factors.
+
+    Returns:
+    - DataFrame with the columns 'Profile', 'Load', 'Condition', 'Gauge', 'Radius', 'Rail',
+      'Month' and 'Value', one row per table entry
+    """
+    rng = np.random.default_rng(seed)
+    if isinstance(profiles, int):
+        profiles = [f'SYN{k}' for k in range(1, profiles + 1)]
+    profiles, radii, loads, gauges, rails = (list(v) for v in (profiles, radii, loads, gauges, rails))
+    profile_factor = rng.uniform(1 - spread, 1 + spread, (len(profiles), len(rails)))
+    rail_factor = np.array([RAIL_FACTORS.get(rail, 1.0) for rail in rails])
+
+    # axes: profile, radius, load, rail, gauge, month
+    s = severity(np.array(radii, dtype=object)[:, None], np.array(loads, dtype=float)[None, :])
+    s = s[None, :, :, None, None, None] * profile_factor[:, None, None, :, None, None]
+    gauge_factor = (1 + GAUGE_STEP_FACTOR * (np.asarray(gauges, dtype=float) - gauges[0]) / 5)[None, None, None, None, :, None]
+    month = np.arange(1, N_MONTHS + 1, dtype=float)[None, None, None, None, None, :]
+    shape = (len(profiles), len(radii), len(loads), len(rails), len(gauges), N_MONTHS)
+
+    tables = {
+        'h-index': s * gauge_factor * (H_INDEX_BASE + H_INDEX_SLOPE * np.maximum(month - H_INDEX_KNEE, 0)),
+        'wear': s * gauge_factor * rail_factor[None, None, None, :, None, None] * WEAR_SCALE * month ** WEAR_EXPONENT,
+        'rcf-depth': s ** 1.3 * gauge_factor * RCF_DEPTH_MAX * (1 - np.exp(-month / RCF_DEPTH_MONTHS)),
+        'rcf-residual': RCF_RESIDUAL_STEP * (month >= RCF_RESIDUAL_MONTHS / (s * gauge_factor)),
+    }
+    frames = []
+    index = pd.MultiIndex.from_product(
+        [profiles, [str(r) for r in radii], loads, rails, gauges, range(1, N_MONTHS + 1)],
+        names=['Profile', 'Radius', 'Load', 'Rail', 'Gauge', 'Month']
+    )
+    for condition in CONDITIONS:
+        values = np.broadcast_to(tables[condition], shape).reshape(-1)
+        frame = index.to_frame(index=False)
+        frame['Condition'] = condition
+        frame['Value'] = np.round(values, 4)
+        frames.append(frame)
+    data = pd.concat(frames, ignore_index=True)
+    data['Load'] = data['Load'].astype(float)
+    return data[['Profile', 'Load', 'Condition', 'Gauge', 'Radius', 'Rail', 'Month', 'Value']]
+
+
+def to_wide_format(data):
+    """
+    Wide table (one column per month, as in the CSV input files) of a long table; the inverse
+    of preprocessings.read_input_data.to_long_format.
+    """
+    wide = data.pivot_table(
+        index=['Rail', 'Radius', 'Profile', 'Load', 'Condition', 'Gauge'], columns='Month', values='Value', sort=False
+    )
+    wide.columns = [f'month {m}' for m in wide.columns]
+    return wide.reset_index()
+
+
+def synthetic_curve_inventory(n_curves, seed=0, template=None, curves_per_line=CURVES_PER_LINE,
+                              curves_per_section=CURVES_PER_SECTION):
+    """
+    Synthetic curve inventory with the columns of matched_curves_within_tracks.csv.
+
+    Parameters:
+    - n_curves: Number of curves.
+    - seed: Seed of the generator.
+    - template: Optional inventory (e.g. the matched curves) the radii, lengths and track types
+                are resampled from, instead of the built-in distributions.
+    - curves_per_line: Mean number of curves per line (Track_Bdl).
+    - curves_per_section: Mean number of curves per track section.
+
+    Returns:
+    - DataFrame with one row per curve (see INVENTORY_COLUMNS)
+    """
+    rng = np.random.default_rng(seed)
+    n = int(n_curves)
+
+    # lines and track sections: consecutive curves, a new one starts with a fixed probability
+    new_line = rng.random(n) < 1 / curves_per_line
+    new_line[0] = True
+    line = np.cumsum(new_line) - 1
+    new_section = new_line | (rng.random(n) < 1 / curves_per_section)
+    section = np.cumsum(new_section) - 1
+    n_lines, n_sections = line[-1] + 1, section[-1] + 1
+
+    if template is not None:
+        template = template.dropna(subset=['Curve_Radie_m', 'Curve_Langd_m'])
+        picked = template.iloc[rng.integers(0, len(template), n)]
+        radius = picked['Curve_Radie_m'].to_numpy(dtype=float)
+        length = picked['Curve_Langd_m'].to_numpy(dtype=float)
+        section_types = template.iloc[rng.integers(0, len(template), n_sections)]
+        types = {
+            column: section_types[column].to_numpy()[section]
+            for column in ('Track_Rälmodell', 'Track_Räl_vikt(kg/m)', 'Track_Sliper_typ', 'Track_Befästning_typ')
+        }
+        line_districts = template['Track_UNE'].dropna().to_numpy()[rng.integers(0, template['Track_UNE'].notna().sum(), n_lines)]
+    else:
+        radius = np.exp(rng.normal(LOG_RADIUS_MEAN, LOG_RADIUS_STD, n)).clip(MIN_RADIUS, MAX_RADIUS)
+        radius = np.round(radius / 5) * 5 * rng.choice([-1, 1], n)
+        length = np.round(np.exp(rng.normal(LOG_LENGTH_MEAN, LOG_LENGTH_STD, n)), 3)
+        shares = np.array([t[-1] for t in TRACK_TYPES])
+        section_type = rng.choice(len(TRACK_TYPES), n_sections, p=shares / shares.sum())[section]
+        types = {
+            column: np.array([t[k] for t in TRACK_TYPES], dtype=object if k != 1 else float)[section_type]
+            for k, column in enumerate(('Track_Rälmodell', 'Track_Räl_vikt(kg/m)', 'Track_Sliper_typ', 'Track_Befästning_typ'))
+        }
+        line_districts = rng.choice(list(DISTRICTS), n_lines, p=np.array(list(DISTRICTS.values())) / sum(DISTRICTS.values()))
+
+    # positions along the line: gap, then the curve
+    gap = rng.exponential(MEAN_GAP_M, n)
+    step = gap + length
+    position = np.cumsum(step)
+    first_of_line = np.flatnonzero(new_line)
+    offset = np.repeat(position[first_of_line] - step[first_of_line], np.diff(np.append(first_of_line, n)))
+    start = np.round(position - length - offset)
+    end = np.round(start + length)
+
+    # track sections span their curves with some slack
+    section_start = np.round(pd.Series(start).groupby(section).transform('min').to_numpy() - rng.exponential(100, n_sections)[section])
+    section_end = np.round(pd.Series(end).groupby(section).transform('max').to_numpy() + rng.exponential(100, n_sections)[section])
+    section_start = np.maximum(section_start, 0)
+
+    curves = pd.DataFrame({
+        'Curve_Kmtal': _kmtal(start),
+        'Curve_Kmtalti': _kmtal(end),
+        'Curve_Langd_m': length,
+        'Curve_Radie_m': radius,
+        'Curve_Kmtal_km': start // 1000,
+        'Curve_Kmtal_meter': start % 1000,
+        'Curve_Kmtaltil_km': end // 1000,
+        'Curve_Kmtaltil_meter': end % 1000,
+        'Curve_Start_Meters': start,
+        'Curve_End_Meters': end,
+        'Track_Bdl': (101 + line).astype(float),
+        'Track_Km': section_start // 1000,
+        'Track_+m': section_start % 1000,
+        'Track_Kmti': section_end // 1000,
+        'Track_+mti': section_end % 1000,
+        'Track_spm': section_end - section_start,
+        'Track_UNE': line_districts[line],
+        'Track_spår': rng.choice(['1', '2', '3', '4'], n_sections, p=[0.35, 0.4, 0.2, 0.05])[section],
+        'Track_Pl/Str': np.char.add('S', (section % 997).astype(str)),
+        **types,
+        'Track_Start_Meters': section_start,
+        'Track_End_Meters': section_end,
+    })
+    return curves[INVENTORY_COLUMNS]
+
+
+def write_synthetic_inputs(output, n_curves=100000, profiles=4, radii=(300, 495, 800, 1465, 3000, TANGENT),
+                           loads=(DEFAULT_LOAD,), seed=0):
+    """
+    Write synthetic degradation tables (degradation_tables.csv, in the input CSV format) and a
+    curve inventory (curves.csv, in the format of matched_curves_within_tracks.csv) to `output`.
+
+    Returns:
+    - dict with the paths of the two files
+    """
+    os.makedirs(output, exist_ok=True)
+    tables_path = os.path.join(output, 'degradation_tables.csv')
+    curves_path = os.path.join(output, 'curves.csv')
+    wide = to_wide_format(synthetic_degradation_tables(profiles, radii, loads, seed=seed))
+    wide.to_csv(tables_path, sep=';', index=False, encoding='utf-8')
+    synthetic_curve_inventory(n_curves, seed=seed).to_csv(curves_path)
+    return {'tables': tables_path, 'curves': curves_path}
+
+
+def _kmtal(meters):
+    """Kilometre marks 'km+m' of positions in metres."""
+    meters = np.asarray(meters, dtype=np.int64)
+    return np.char.add(np.char.add((meters // 1000).astype(str), '+'), (meters % 1000).astype(str))
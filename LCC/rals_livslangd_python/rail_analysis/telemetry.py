@@ -0,0 +1,119 @@
+# rail_analysis/telemetry.py
+"""
+Telemetry for sweeps (rail_analysis.sweep.run_sweep).
+
+After every completed chunk a report is passed to a progress callback and appended as one
+JSON line to a metrics file, with
+- completed and total strategies, and the strategies read from the result cache or checkpoint,
+- throughput in strategies per second and simulated months per second (strategies times
+  their simulation horizon, since the start of the sweep),
+- the cache hit rate,
+- the busy time of every worker process (seconds spent running chunks) and the utilisation
+  (busy time over elapsed time times the number of workers),
+- the estimated time to completion (ETA).
+A final report with event 'done' is written when the sweep ends. The reports are used to size
+jobs and to spot stragglers (workers with a low busy time, chunks with a long duration).
+
+Example:
+    run_sweep(task, scenarios, common, progress=print_progress, metrics_file='metrics.jsonl')
+"""
+
+import json
+import os
+import time
+
+
+class SweepTelemetry:
+    """
+    Collects the chunk timings of one sweep and reports them.
+
+    Parameters:
+    - total: Number of strategies in the sweep.
+    - done: Number of strategies already available (cache hits and checkpoint).
+    - cached: Number of cache hits among them.
+    - months: Simulated months per strategy.
+    - workers: Number of worker processes.
+    - progress: Function called with every report (dict), or None.
+    - metrics_file: JSON-lines file the reports are appended to, or None.
+    - label: Name of the sweep, stored in the reports.
+    """
+
+    def __init__(self, total, done=0, cached=0, months=0, workers=1, progress=None, metrics_file=None, label=None):
+        self.total = total
+        self.done = done
+        self.cached = cached
+        self.restored = done
+        self.months = months
+        self.workers = workers
+        self.progress = progress
+        self.metrics_file = metrics_file
+        self.label = label
+        self.start = time.perf_counter()
+        self.computed = 0
+        self.busy = {}
+        if metrics_file:
+            os.makedirs(os.path.dirname(os.path.abspath(metrics_file)), exist_ok=True)
+
+    def chunk_done(self, n, worker, busy):
+        """Record a completed chunk of n strategies run by `worker` (process id) in `busy` seconds."""
+        self.done += n
+        self.computed += n
+        self.busy[str(worker)] = self.busy.get(str(worker), 0.0) + busy
+        report = self.report('chunk')
+        report['chunk_strategies'] = n
+        report['chunk_seconds'] = busy
+        self._emit(report)
+
+    def finish(self):
+        """Emit and return the final report."""
+        report = self.report('done')
+        self._emit(report)
+        return report
+
+    def report(self, event):
+        elapsed = time.perf_counter() - self.start
+        rate = self.computed / elapsed if elapsed > 0 else 0.0
+        remaining = self.total - self.done
+        busy_total = sum(self.busy.values())
+        return {
+            'event': event,
+            'label': self.label,
+            'time': time.time(),
+            'elapsed_s': elapsed,
+            'completed': self.done,
+            'total': self.total,
+            'computed': self.computed,
+            'cached': self.cached,
+            'restored': self.restored - self.cached,
+            'cache_hit_rate': self.cached / self.total if self.total else 0.0,
+            'strategies_per_s': rate,
+            'months_per_s': rate * self.months,
+            'eta_s': remaining / rate if rate > 0 else (0.0 if remaining == 0 else None),
+            'worker_busy_s': dict(self.busy),
+            'utilisation': busy_total / (elapsed * self.workers) if elapsed > 0 else 0.0,
+        }
+
+    def _emit(self, report):
+        if self.progress is not None:
+            self.progress(report)
+        if self.metrics_file:
+            with open(self.metrics_file, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(report) + '\n')
+
+
+def print_progress(report):
+    """Progress callback printing one line per report."""
+    print(format_progress(report))
+
+
+def format_progress(report):
+    """One-line summary of a telemetry report."""
+    label = f"{report['label']}: " if report['label'] else ''
+    eta = '-' if report['eta_s'] is None else f"{report['eta_s']:.0f} s"
+    return (
+        f"{label}{report['completed']}/{report['total']} strategies "
+        f"({100 * report['completed'] / max(report['total'], 1):.0f} %), "
+        f"{report['strategies_per_s']:.1f} strategies/s, {report['months_per_s']:.0f} months/s, "
+        f"cache hits {100 * report['cache_hit_rate']:.0f} %, "
+        f"utilisation {100 * report['utilisation']:.0f} %, ETA {eta}"
+    )
@@ -0,0 +1,66 @@
+# rail_analysis/traffic.py
+"""
+Traffic profiles for the batched LCC engine.
+
+The degradation tables give the rail condition per month since grinding at the reference
+traffic ANNUAL_MGT. With a traffic profile (million gross tonnes per year), every simulated
+month is weighted by its tonnage relative to the reference: the batched engine
+(rail_analysis.LCC_batched) then indexes the tables by the accumulated tonnage since the
+last grinding instead of by calendar months, and scales the monthly wear increments.
+
+The factors are computed once per scenario as a vector over the simulated months
+(index m is month m, index 0 is unused), so the simulation loop stays array-only.
+
+Example (35 MGT/year growing 2 % per year):
+    traffic = traffic_factors(growing_traffic(35, 0.02))
+    sweep_track(tables, traffic_factors=traffic)
+"""
+
+import numpy as np  # type: ignore
+
+from rail_analysis.constants import ANNUAL_MGT, MAX_MONTHS, TECH_LIFE_YEARS
+
+
+def traffic_factors(annual_mgt, n_months=MAX_MONTHS, reference_mgt=ANNUAL_MGT):
+    """
+    Traffic factor of every month relative to the reference traffic of the degradation tables.
+
+    Parameters:
+    - annual_mgt: Traffic in MGT per year, a scalar or one value per simulation year
+                  (the last value is kept for later years).
+    - n_months: Number of simulated months.
+    - reference_mgt: Traffic (MGT/year) the degradation tables were computed for.
+
+    Returns:
+    - np.ndarray of length n_months + 1
+    """
+    annual_mgt = np.atleast_1d(np.asarray(annual_mgt, dtype=float))
+    if np.any(annual_mgt < 0):
+        raise ValueError("Traffic must not be negative")
+    years = (np.arange(1, n_months + 1) - 1) // 12
+    factors = np.zeros(n_months + 1)
+    factors[1:] = annual_mgt[np.minimum(years, len(annual_mgt) - 1)] / reference_mgt
+    return factors
+
+
+def growing_traffic(base_mgt, growth_rate, n_years=TECH_LIFE_YEARS):
+    """
+    Traffic (MGT/year) growing at a constant annual rate.
+
+    Parameters:
+    - base_mgt: Traffic in the first year.
+    - growth_rate: Annual growth rate, e.g. 0.02.
+    - n_years: Number of years.
+
+    Returns:
+    - np.ndarray of length n_years
+    """
+    return base_mgt * (1 + growth_rate) ** np.arange(n_years)
+
+
+def accumulated_mgt(factors, reference_mgt=ANNUAL_MGT):
+    """
+    Accumulated traffic (MGT) at the end of every month for the given traffic factors
+    (index m is month m), e.g. to express lifetimes in MGT.
+    """
+    return np.cumsum(np.asarray(factors, dtype=float), axis=-1) * reference_mgt / 12